@@ -1,11 +1,42 @@
+import logging
+import time
+
 from pyramid.config import Configurator
 from pyramid.renderers import JSON
+from pyramid.settings import asbool
 from .security.cors import cors_tween_factory
 
+log = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Records how long each phase of application startup takes."""
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.phases = {}
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    @property
+    def total(self):
+        return self._last - self.started
+
+    def as_dict(self):
+        return dict(self.phases, total=self.total)
+
+    def __str__(self):
+        parts = ', '.join(f'{phase}={seconds * 1000:.1f}ms' for phase, seconds in self.phases.items())
+        return f'{self.total * 1000:.1f}ms ({parts})'
+
 
 def main(global_config, **settings):
     """ This function returns a Pyramid WSGI application.
     """
+    timer = StartupTimer()
     with Configurator(settings=settings) as config:
         config.add_tween('.cors_tween_factory')  # Add CORS tween
         config.add_renderer('json', JSON(indent=4))
@@ -17,9 +48,31 @@ def main(global_config, **settings):
                 'strict': True  # Raise errors for unknown fields
             }
         })
-        config.include('pyramid_jinja2')
+        timer.mark('renderers')
+        # Jinja hanya dipakai oleh template bawaan; aktifkan lewat superbmd.jinja2 = true
+        if asbool(settings.get('superbmd.jinja2', False)):
+            config.include('pyramid_jinja2')
+            timer.mark('jinja2')
         config.include('.routes')
+        timer.mark('routes')
         config.include('.models')
-        config.scan()
-    return config.make_wsgi_app()
+        config.include('.services.dashboard_events')
+        config.include('.services.label_service')
+        config.include('.services.scan_index')
+        config.include('.services.pagination')
+        config.include('.services.columnar_snapshot')
+        config.include('.services.pivot_service')
+        config.include('.services.valuation_service')
+        config.include('.services.job_queue')
+        config.include('.services.singleflight')
+        config.include('.services.admission')
+        timer.mark('models')
+        # Hanya scan package views, bukan scripts/alembic
+        config.scan('.views')
+        timer.mark('scan')
+        app = config.make_wsgi_app()
+        timer.mark('make_wsgi_app')
 
+    app.registry['startup_timings'] = timer.as_dict()
+    log.info(f"Application startup took {timer}")
+    return app
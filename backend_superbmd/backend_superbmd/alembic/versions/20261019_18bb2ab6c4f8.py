@@ -0,0 +1,56 @@
+"""Soft delete and barang archive
+
+Revision ID: 18bb2ab6c4f8
+Revises: 3d5f7a237046
+Create Date: 2026-10-19 15:05:26.216863
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '18bb2ab6c4f8'
+down_revision = '3d5f7a237046'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('barang') as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_barang_deleted_at'), ['deleted_at'], unique=False)
+
+    op.create_table('barang_arsip',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('nama_barang', sa.String(length=200), nullable=False),
+    sa.Column('kode_barang', sa.String(length=100), nullable=False),
+    # Tipe enum kondisibarang dan metodepenyusutan sudah dibuat bersama tabel barang
+    sa.Column('kondisi', sa.Enum('BAIK', 'RUSAK_RINGAN', 'RUSAK_BERAT', name='kondisibarang').with_variant(
+        postgresql.ENUM('BAIK', 'RUSAK_RINGAN', 'RUSAK_BERAT', name='kondisibarang', create_type=False), 'postgresql'
+    ), nullable=False),
+    sa.Column('id_lokasi', sa.Integer(), nullable=False),
+    sa.Column('penanggung_jawab', sa.String(length=50), nullable=False),
+    sa.Column('id_penanggung_jawab', sa.Integer(), nullable=True),
+    sa.Column('tanggal_masuk', sa.DateTime(), nullable=False),
+    sa.Column('tanggal_pembaruan', sa.DateTime(), nullable=True),
+    sa.Column('gambar_aset', sa.Text(), nullable=True),
+    sa.Column('nilai_perolehan', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('umur_manfaat', sa.Integer(), nullable=True),
+    sa.Column('metode_penyusutan', sa.Enum('GARIS_LURUS', 'SALDO_MENURUN', name='metodepenyusutan').with_variant(
+        postgresql.ENUM('GARIS_LURUS', 'SALDO_MENURUN', name='metodepenyusutan', create_type=False), 'postgresql'
+    ), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_barang_arsip'))
+    )
+    op.create_index(op.f('ix_barang_arsip_kode_barang'), 'barang_arsip', ['kode_barang'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_barang_arsip_kode_barang'), table_name='barang_arsip')
+    op.drop_table('barang_arsip')
+    with op.batch_alter_table('barang') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_barang_deleted_at'))
+        batch_op.drop_column('deleted_at')
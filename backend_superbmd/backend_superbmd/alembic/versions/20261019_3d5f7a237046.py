@@ -0,0 +1,33 @@
+"""Barang valuation fields
+
+Revision ID: 3d5f7a237046
+Revises: 7c6d89537afe
+Create Date: 2026-10-19 14:59:02.953663
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d5f7a237046'
+down_revision = '7c6d89537afe'
+branch_labels = None
+depends_on = None
+
+metode_penyusutan = sa.Enum('GARIS_LURUS', 'SALDO_MENURUN', name='metodepenyusutan')
+
+def upgrade():
+    # add_column tidak membuat tipe enum native (PostgreSQL) dengan sendirinya
+    metode_penyusutan.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table('barang') as batch_op:
+        batch_op.add_column(sa.Column('nilai_perolehan', sa.Numeric(precision=18, scale=2), nullable=True))
+        batch_op.add_column(sa.Column('umur_manfaat', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('metode_penyusutan', metode_penyusutan, server_default='GARIS_LURUS', nullable=False))
+
+def downgrade():
+    with op.batch_alter_table('barang') as batch_op:
+        batch_op.drop_column('metode_penyusutan')
+        batch_op.drop_column('umur_manfaat')
+        batch_op.drop_column('nilai_perolehan')
+    metode_penyusutan.drop(op.get_bind(), checkfirst=True)
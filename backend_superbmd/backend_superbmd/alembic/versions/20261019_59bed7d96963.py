@@ -0,0 +1,35 @@
+"""Sort indexes for list endpoints
+
+Revision ID: 59bed7d96963
+Revises: bbfce179813a
+Create Date: 2026-10-19 14:41:34.199801
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '59bed7d96963'
+down_revision = 'bbfce179813a'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_barang_id_lokasi_id', 'barang', ['id_lokasi', 'id'], unique=False)
+    op.create_index('ix_barang_kondisi_id', 'barang', ['kondisi', 'id'], unique=False)
+    op.create_index('ix_barang_nama_barang_id', 'barang', ['nama_barang', 'id'], unique=False)
+    op.create_index('ix_barang_tanggal_masuk_id', 'barang', ['tanggal_masuk', 'id'], unique=False)
+    op.create_index('ix_lokasi_nama_lokasi_id', 'lokasi', ['nama_lokasi', 'id'], unique=False)
+    op.create_index('ix_users_role_id', 'users', ['role', 'id'], unique=False)
+    # Digantikan ix_barang_tanggal_masuk_id
+    op.drop_index(op.f('ix_barang_tanggal_masuk'), table_name='barang')
+
+def downgrade():
+    op.create_index(op.f('ix_barang_tanggal_masuk'), 'barang', ['tanggal_masuk'], unique=False)
+    op.drop_index('ix_users_role_id', table_name='users')
+    op.drop_index('ix_lokasi_nama_lokasi_id', table_name='lokasi')
+    op.drop_index('ix_barang_tanggal_masuk_id', table_name='barang')
+    op.drop_index('ix_barang_nama_barang_id', table_name='barang')
+    op.drop_index('ix_barang_kondisi_id', table_name='barang')
+    op.drop_index('ix_barang_id_lokasi_id', table_name='barang')
@@ -0,0 +1,28 @@
+"""Barang penanggung jawab FK on delete set null
+
+Revision ID: 5e2b9c41d7a3
+Revises: 18bb2ab6c4f8
+Create Date: 2026-10-19 16:42:10.315204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b9c41d7a3'
+down_revision = '18bb2ab6c4f8'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('barang') as batch_op:
+        batch_op.drop_constraint(op.f('fk_barang_id_penanggung_jawab_users'), type_='foreignkey')
+        batch_op.create_foreign_key(
+            op.f('fk_barang_id_penanggung_jawab_users'), 'users', ['id_penanggung_jawab'], ['id'], ondelete='SET NULL'
+        )
+
+def downgrade():
+    with op.batch_alter_table('barang') as batch_op:
+        batch_op.drop_constraint(op.f('fk_barang_id_penanggung_jawab_users'), type_='foreignkey')
+        batch_op.create_foreign_key(op.f('fk_barang_id_penanggung_jawab_users'), 'users', ['id_penanggung_jawab'], ['id'])
@@ -0,0 +1,33 @@
+"""Barang penanggung jawab user FK
+
+Revision ID: 7c6d89537afe
+Revises: 59bed7d96963
+Create Date: 2026-10-19 14:56:28.976757
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c6d89537afe'
+down_revision = '59bed7d96963'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('barang') as batch_op:
+        batch_op.add_column(sa.Column('id_penanggung_jawab', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(op.f('fk_barang_id_penanggung_jawab_users'), 'users', ['id_penanggung_jawab'], ['id'])
+    # Nama yang tidak cocok dengan username mana pun tetap NULL
+    op.execute(
+        "UPDATE barang SET id_penanggung_jawab = "
+        "(SELECT users.id FROM users WHERE users.username = barang.penanggung_jawab)"
+    )
+    op.create_index('ix_barang_id_penanggung_jawab_id', 'barang', ['id_penanggung_jawab', 'id'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_barang_id_penanggung_jawab_id', table_name='barang')
+    with op.batch_alter_table('barang') as batch_op:
+        batch_op.drop_constraint(op.f('fk_barang_id_penanggung_jawab_users'), type_='foreignkey')
+        batch_op.drop_column('id_penanggung_jawab')
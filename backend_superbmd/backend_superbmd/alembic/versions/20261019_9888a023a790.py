@@ -0,0 +1,42 @@
+"""Lokasi hierarchy with closure table
+
+Revision ID: 9888a023a790
+Revises: ae1fac511b29
+Create Date: 2026-10-19 14:31:18.402577
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9888a023a790'
+down_revision = 'ae1fac511b29'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('lokasi') as batch_op:
+        batch_op.add_column(sa.Column('parent_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(op.f('fk_lokasi_parent_id_lokasi'), 'lokasi', ['parent_id'], ['id'])
+        batch_op.create_index(op.f('ix_lokasi_parent_id'), ['parent_id'], unique=False)
+    op.create_table('lokasi_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['lokasi.id'], name=op.f('fk_lokasi_closure_ancestor_id_lokasi')),
+    sa.ForeignKeyConstraint(['descendant_id'], ['lokasi.id'], name=op.f('fk_lokasi_closure_descendant_id_lokasi')),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id', name=op.f('pk_lokasi_closure'))
+    )
+    op.create_index(op.f('ix_lokasi_closure_descendant_id'), 'lokasi_closure', ['descendant_id'], unique=False)
+
+    # Data lama masih datar: setiap lokasi hanya leluhur bagi dirinya sendiri
+    op.execute("INSERT INTO lokasi_closure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM lokasi")
+
+def downgrade():
+    op.drop_index(op.f('ix_lokasi_closure_descendant_id'), table_name='lokasi_closure')
+    op.drop_table('lokasi_closure')
+    with op.batch_alter_table('lokasi') as batch_op:
+        batch_op.drop_index(op.f('ix_lokasi_parent_id'))
+        batch_op.drop_constraint(op.f('fk_lokasi_parent_id_lokasi'), type_='foreignkey')
+        batch_op.drop_column('parent_id')
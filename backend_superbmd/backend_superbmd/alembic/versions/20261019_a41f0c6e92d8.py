@@ -0,0 +1,23 @@
+"""Dashboard change sequence row
+
+Revision ID: a41f0c6e92d8
+Revises: 5e2b9c41d7a3
+Create Date: 2026-10-19 17:20:44.508311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f0c6e92d8'
+down_revision = '5e2b9c41d7a3'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Dinaikkan oleh setiap commit yang mengubah dashboard; dibaca worker lain untuk resync SSE
+    op.execute("INSERT INTO change_sequence (name, value) VALUES ('dashboard', 0)")
+
+def downgrade():
+    op.execute("DELETE FROM change_sequence WHERE name = 'dashboard'")
@@ -0,0 +1,48 @@
+"""Monthly barang rollup
+
+Revision ID: ae1fac511b29
+Revises: cbeb74791b33
+Create Date: 2026-10-19 13:40:02.551873
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'ae1fac511b29'
+down_revision = 'cbeb74791b33'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('barang_rollup',
+    sa.Column('field', sa.String(length=30), nullable=False),
+    sa.Column('bulan', sa.Date(), nullable=False),
+    sa.Column('id_lokasi', sa.Integer(), nullable=False),
+    # Tipe enum kondisibarang sudah dibuat bersama tabel barang
+    sa.Column('kondisi', sa.Enum('BAIK', 'RUSAK_RINGAN', 'RUSAK_BERAT', name='kondisibarang').with_variant(
+        postgresql.ENUM('BAIK', 'RUSAK_RINGAN', 'RUSAK_BERAT', name='kondisibarang', create_type=False), 'postgresql'
+    ), nullable=False),
+    sa.Column('jumlah', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('field', 'bulan', 'id_lokasi', 'kondisi', name=op.f('pk_barang_rollup'))
+    )
+    op.create_index(op.f('ix_barang_tanggal_masuk'), 'barang', ['tanggal_masuk'], unique=False)
+
+    # Isi rekap dari data barang yang sudah ada
+    if op.get_bind().dialect.name == 'sqlite':
+        month = "date({}, 'start of month')"
+    else:
+        month = "CAST(date_trunc('month', {}) AS DATE)"
+    for field in ('tanggal_masuk', 'tanggal_pembaruan'):
+        bulan = month.format(field)
+        op.execute(
+            "INSERT INTO barang_rollup (field, bulan, id_lokasi, kondisi, jumlah) "
+            f"SELECT '{field}', {bulan}, id_lokasi, kondisi, COUNT(id) FROM barang "
+            f"WHERE {field} IS NOT NULL GROUP BY {bulan}, id_lokasi, kondisi"
+        )
+
+def downgrade():
+    op.drop_index(op.f('ix_barang_tanggal_masuk'), table_name='barang')
+    op.drop_table('barang_rollup')
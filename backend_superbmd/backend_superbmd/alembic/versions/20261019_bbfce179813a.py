@@ -0,0 +1,37 @@
+"""Barang transfer history
+
+Revision ID: bbfce179813a
+Revises: bc229c672777
+Create Date: 2026-10-19 15:48:11.920364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bbfce179813a'
+down_revision = 'bc229c672777'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('barang_transfer',
+    sa.Column('id_barang', sa.Integer(), nullable=False),
+    sa.Column('kode_barang', sa.String(length=100), nullable=False),
+    sa.Column('id_lokasi_asal', sa.Integer(), nullable=False),
+    sa.Column('id_lokasi_tujuan', sa.Integer(), nullable=False),
+    sa.Column('petugas', sa.String(length=50), nullable=True),
+    sa.Column('catatan', sa.Text(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_lokasi_asal'], ['lokasi.id'], name=op.f('fk_barang_transfer_id_lokasi_asal_lokasi')),
+    sa.ForeignKeyConstraint(['id_lokasi_tujuan'], ['lokasi.id'], name=op.f('fk_barang_transfer_id_lokasi_tujuan_lokasi')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_barang_transfer'))
+    )
+    op.create_index(op.f('ix_barang_transfer_id_barang'), 'barang_transfer', ['id_barang'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_barang_transfer_id_barang'), table_name='barang_transfer')
+    op.drop_table('barang_transfer')
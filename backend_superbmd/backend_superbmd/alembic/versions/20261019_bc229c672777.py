@@ -0,0 +1,49 @@
+"""Stocktake sessions and scan staging table
+
+Revision ID: bc229c672777
+Revises: 9888a023a790
+Create Date: 2026-10-19 15:02:47.310925
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'bc229c672777'
+down_revision = '9888a023a790'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('stocktake_session',
+    sa.Column('id_lokasi', sa.Integer(), nullable=False),
+    sa.Column('petugas', sa.String(length=50), nullable=True),
+    sa.Column('catatan', sa.Text(), nullable=True),
+    sa.Column('status', sa.Enum('OPEN', 'APPLIED', name='stocktakestatus'), nullable=False),
+    sa.Column('applied_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_lokasi'], ['lokasi.id'], name=op.f('fk_stocktake_session_id_lokasi_lokasi')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_stocktake_session'))
+    )
+    op.create_table('stocktake_scan',
+    sa.Column('session_id', sa.Integer(), nullable=False),
+    sa.Column('kode_barang', sa.String(length=100), nullable=False),
+    sa.Column('id_lokasi', sa.Integer(), nullable=False),
+    # Tipe enum kondisibarang sudah dibuat bersama tabel barang
+    sa.Column('kondisi', sa.Enum('BAIK', 'RUSAK_RINGAN', 'RUSAK_BERAT', name='kondisibarang').with_variant(
+        postgresql.ENUM('BAIK', 'RUSAK_RINGAN', 'RUSAK_BERAT', name='kondisibarang', create_type=False), 'postgresql'
+    ), nullable=True),
+    sa.Column('scanned_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_lokasi'], ['lokasi.id'], name=op.f('fk_stocktake_scan_id_lokasi_lokasi')),
+    sa.ForeignKeyConstraint(['session_id'], ['stocktake_session.id'], name=op.f('fk_stocktake_scan_session_id_stocktake_session')),
+    sa.PrimaryKeyConstraint('session_id', 'kode_barang', name=op.f('pk_stocktake_scan'))
+    )
+
+def downgrade():
+    op.drop_table('stocktake_scan')
+    op.drop_table('stocktake_session')
+    sa.Enum(name='stocktakestatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,50 @@
+"""Barang change feed
+
+Revision ID: cbeb74791b33
+Revises: 640d7b1a3ca8
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cbeb74791b33'
+down_revision = '640d7b1a3ca8'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('barang', sa.Column('change_seq', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_barang_change_seq'), 'barang', ['change_seq'], unique=False)
+    op.create_table('barang_tombstone',
+    sa.Column('id_barang', sa.Integer(), nullable=False),
+    sa.Column('kode_barang', sa.String(length=100), nullable=False),
+    sa.Column('change_seq', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_barang_tombstone'))
+    )
+    op.create_index(op.f('ix_barang_tombstone_change_seq'), 'barang_tombstone', ['change_seq'], unique=False)
+    op.create_table('change_sequence',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name', name=op.f('pk_change_sequence'))
+    )
+
+    # Barang yang sudah ada mendapat urutan awal sesuai id-nya
+    op.execute("UPDATE barang SET change_seq = id")
+    op.execute(
+        "INSERT INTO change_sequence (name, value) "
+        "SELECT 'barang', COALESCE(MAX(change_seq), 0) FROM barang"
+    )
+
+def downgrade():
+    op.drop_table('change_sequence')
+    op.drop_index(op.f('ix_barang_tombstone_change_seq'), table_name='barang_tombstone')
+    op.drop_table('barang_tombstone')
+    op.drop_index(op.f('ix_barang_change_seq'), table_name='barang')
+    with op.batch_alter_table('barang') as batch_op:
+        batch_op.drop_column('change_seq')
@@ -1,18 +1,26 @@
+from pyramid.settings import asbool
 from sqlalchemy import engine_from_config
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import configure_mappers
 import zope.sqlalchemy
 from .base import Base
+from .instrumentation import install_cache_stats
+from .readonly import (
+    SAFE_METHODS,
+    ReadOnlySessionError,
+    get_read_only_session,
+    install_read_only_guards,
+)
+from .softdelete import INCLUDE_DELETED, install_soft_delete_filter
 
 # Import or define all models here to ensure they are attached to the
 # ``Base.metadata`` prior to any initialization routines.
-from .mymodel import User, Barang, Lokasi
+from .mymodel import (
+    User, Barang, Lokasi, LokasiClosure, BarangTombstone, BarangTransfer, ChangeSequence, BarangRollup,
+    StocktakeSession, StocktakeScan, BarangArsip
+)
 # flake8: noqa
 
-# Run ``configure_mappers`` after defining all of the models to ensure
-# all relationships can be setup.
-configure_mappers()
-
 
 def get_engine(settings, prefix='sqlalchemy.'):
     return engine_from_config(settings, prefix)
@@ -96,6 +104,20 @@ def includeme(config):
     settings = config.get_settings()
     settings['tm.manager_hook'] = 'pyramid_tm.explicit_manager'
 
+    # GET/HEAD run in a lightweight read-only session outside pyramid_tm,
+    # unless disabled with ``superbmd.read_only_safe_methods = false``.
+    read_only_safe_methods = asbool(settings.get('superbmd.read_only_safe_methods', True))
+
+    def is_read_only_request(request):
+        return read_only_safe_methods and request.method in SAFE_METHODS
+
+    # pyramid_tm only manages the transaction when this hook returns True
+    settings['tm.activate_hook'] = lambda request: not is_read_only_request(request)
+
+    # Run ``configure_mappers`` once at app startup rather than at import time,
+    # so scripts and tests that only need the tables don't pay for it.
+    configure_mappers()
+
     # Use ``pyramid_tm`` to hook the transaction lifecycle to the request.
     # Note: the packages ``pyramid_tm`` and ``transaction`` work together to
     # automatically close the active database session after every request.
@@ -113,13 +135,18 @@ def includeme(config):
         dbengine = get_engine(settings)
 
     session_factory = get_session_factory(dbengine)
+    install_read_only_guards(session_factory)
+    install_soft_delete_filter(session_factory)
     config.registry['dbsession_factory'] = session_factory
+    config.registry['sql_cache_stats'] = install_cache_stats(dbengine)
 
     # make request.dbsession available for use in Pyramid
     def dbsession(request):
         # hook to share the dbsession fixture in testing
         dbsession = request.environ.get('app.dbsession')
-        if dbsession is None:
+        if dbsession is None and is_read_only_request(request):
+            dbsession = get_read_only_session(session_factory, request=request)
+        elif dbsession is None:
             # request.tm is the transaction manager used by pyramid_tm
             dbsession = get_tm_session(
                 session_factory, request.tm, request=request
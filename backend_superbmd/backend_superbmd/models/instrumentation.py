@@ -0,0 +1,55 @@
+"""Engine-level instrumentation for the SQLAlchemy compiled statement cache."""
+import threading
+
+from sqlalchemy import event
+
+
+class CompiledCacheStats:
+    """Counts compiled-cache hits and misses for every statement an engine runs.
+
+    SQLAlchemy records the outcome on ``ExecutionContext.cache_hit``:
+    ``CACHE_HIT``/``CACHE_MISS`` for cacheable constructs, and
+    ``CACHING_DISABLED``/``NO_CACHE_KEY``/``NO_DIALECT_SUPPORT`` otherwise
+    (e.g. plain SQL strings). Only hits and misses count toward the ratio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        outcome = getattr(getattr(context, 'cache_hit', None), 'name', 'NO_CACHE_KEY')
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    @property
+    def hits(self):
+        return self.counts.get('CACHE_HIT', 0)
+
+    @property
+    def misses(self):
+        return self.counts.get('CACHE_MISS', 0)
+
+    @property
+    def hit_ratio(self):
+        cacheable = self.hits + self.misses
+        return self.hits / cacheable if cacheable else 0.0
+
+    def reset(self):
+        with self._lock:
+            self.counts = {}
+
+    def as_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'uncached': sum(v for k, v in self.counts.items() if k not in ('CACHE_HIT', 'CACHE_MISS')),
+            'hit_ratio': round(self.hit_ratio, 4),
+        }
+
+
+def install_cache_stats(engine):
+    """Attach a :class:`CompiledCacheStats` collector to ``engine`` and return it."""
+    stats = CompiledCacheStats()
+    event.listen(engine, 'after_cursor_execute', stats.record)
+    return stats
@@ -4,9 +4,11 @@ from sqlalchemy import (
     Integer,
     Text,
     String,
+    Date,
     DateTime,
     ForeignKey,
     Boolean,
+    Numeric,
     Enum as SQLEnum
 )
 from sqlalchemy.orm import relationship
@@ -24,6 +26,10 @@ class KondisiBarang(enum.Enum):
     RUSAK_RINGAN = "Rusak Ringan"
     RUSAK_BERAT = "Rusak Berat"
 
+class MetodePenyusutan(enum.Enum):
+    GARIS_LURUS = "garis_lurus"
+    SALDO_MENURUN = "saldo_menurun"
+
 class UserRole(enum.Enum):
     ADMIN = "admin"
     PENANGGUNG_JAWAB = "penanggung_jawab"
@@ -51,6 +57,8 @@ class Lokasi(BaseModel): # <-- Ubah dari Base menjadi BaseModel [cite: 30]
     nama_lokasi = Column(String(100), nullable=False)
     kode_lokasi = Column(String(50), unique=True, nullable=False)
     alamat_lokasi = Column(Text, nullable=False)
+    # Induk dalam hierarki (kabupaten > instansi > gedung > ruang); NULL untuk lokasi puncak
+    parent_id = Column(Integer, ForeignKey('lokasi.id'), nullable=True, index=True)
 
     # Relasi balik ke Barang (opsional, untuk akses barang dari lokasi)
     barang = relationship("Barang", back_populates="lokasi_obj")
@@ -58,6 +66,15 @@ class Lokasi(BaseModel): # <-- Ubah dari Base menjadi BaseModel [cite: 30]
     def __repr__(self):
         return f"<Lokasi(id={self.id}, nama='{self.nama_lokasi}')>" # id dari BaseModel [cite: 30]
 
+# Closure table hierarki lokasi: satu baris untuk setiap pasangan (leluhur, keturunan),
+# termasuk lokasi itu sendiri dengan depth 0. Dijaga oleh LokasiService.
+class LokasiClosure(Base):
+    """Ancestor/descendant pairs of the location hierarchy."""
+    __tablename__ = 'lokasi_closure'
+    ancestor_id = Column(Integer, ForeignKey('lokasi.id'), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey('lokasi.id'), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
+
 # Barang sekarang mewarisi dari BaseModel
 class Barang(BaseModel): # <-- Ubah dari Base menjadi BaseModel [cite: 30]
     """Model for Assets."""
@@ -67,10 +84,23 @@ class Barang(BaseModel): # <-- Ubah dari Base menjadi BaseModel [cite: 30]
     kode_barang = Column(String(100), unique=True, nullable=False)
     kondisi = Column(SQLEnum(KondisiBarang), default=KondisiBarang.BAIK, nullable=False)
     id_lokasi = Column(Integer, ForeignKey('lokasi.id'), nullable=False) # <-- Ubah FK ke 'lokasi.id' [cite: 30]
-    penanggung_jawab = Column(String(50), nullable=False)
+    penanggung_jawab = Column(String(50), nullable=False) # Username saat ditetapkan (untuk tampilan)
+    # Pengguna yang bertanggung jawab; NULL jika penanggung_jawab bukan username terdaftar
+    id_penanggung_jawab = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     tanggal_masuk = Column(DateTime, default=datetime.datetime.now, nullable=False)
     tanggal_pembaruan = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now, nullable=True)
     gambar_aset = Column(Text, nullable=True)
+    # Nilai perolehan (rupiah) dan masa manfaat (tahun); tanpa masa manfaat barang tidak disusutkan
+    nilai_perolehan = Column(Numeric(18, 2), nullable=True)
+    umur_manfaat = Column(Integer, nullable=True)
+    metode_penyusutan = Column(
+        SQLEnum(MetodePenyusutan), default=MetodePenyusutan.GARIS_LURUS,
+        server_default=MetodePenyusutan.GARIS_LURUS.name, nullable=False
+    )
+    # Nomor urut perubahan (monoton) untuk delta-sync /api/barang/changes
+    change_seq = Column(Integer, nullable=True, index=True)
+    # Waktu penghapusan (soft delete); baris terhapus disaring dari semua query ORM (models/softdelete.py)
+    deleted_at = Column(DateTime, nullable=True, index=True)
 
     # Relasi ke Lokasi
     lokasi_obj = relationship("Lokasi", back_populates="barang")
@@ -78,5 +108,108 @@ class Barang(BaseModel): # <-- Ubah dari Base menjadi BaseModel [cite: 30]
     def __repr__(self):
         return f"<Barang(id={self.id}, nama='{self.nama_barang}', kode='{self.kode_barang}')>" # id dari BaseModel [cite: 30]
 
-# Contoh indeks (opsional, untuk performa pencarian)
-# Index('my_index', Barang.nama_barang, Barang.kode_barang)
\ No newline at end of file
+# Penanda barang yang dihapus, agar klien delta-sync ikut menghapusnya
+class BarangTombstone(BaseModel):
+    """Model for deleted asset markers (delta-sync)."""
+    __tablename__ = 'barang_tombstone'
+    id_barang = Column(Integer, nullable=False)
+    kode_barang = Column(String(100), nullable=False)
+    change_seq = Column(Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<BarangTombstone(id_barang={self.id_barang}, seq={self.change_seq})>"
+
+# Arsip barang yang sudah lama dihapus, dipindahkan dari tabel barang oleh ArchiveService.
+# id sama dengan id barang semula; tanpa FK agar lokasi/pengguna tetap bisa dihapus.
+class BarangArsip(BaseModel):
+    """Model for archived (long-deleted) assets."""
+    __tablename__ = 'barang_arsip'
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    nama_barang = Column(String(200), nullable=False)
+    kode_barang = Column(String(100), nullable=False, index=True)
+    kondisi = Column(SQLEnum(KondisiBarang), nullable=False)
+    id_lokasi = Column(Integer, nullable=False)
+    penanggung_jawab = Column(String(50), nullable=False)
+    id_penanggung_jawab = Column(Integer, nullable=True)
+    tanggal_masuk = Column(DateTime, nullable=False)
+    tanggal_pembaruan = Column(DateTime, nullable=True)
+    gambar_aset = Column(Text, nullable=True)
+    nilai_perolehan = Column(Numeric(18, 2), nullable=True)
+    umur_manfaat = Column(Integer, nullable=True)
+    metode_penyusutan = Column(SQLEnum(MetodePenyusutan), nullable=False)
+    deleted_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f"<BarangArsip(id={self.id}, kode='{self.kode_barang}')>"
+
+# Penghitung urutan perubahan; satu baris per feed (mis. 'barang')
+class ChangeSequence(Base):
+    """Monotonic change counters, one row per feed."""
+    __tablename__ = 'change_sequence'
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+# Riwayat perpindahan barang antar lokasi
+class BarangTransfer(BaseModel):
+    """Model for asset transfer history."""
+    __tablename__ = 'barang_transfer'
+    id_barang = Column(Integer, nullable=False, index=True)
+    kode_barang = Column(String(100), nullable=False)
+    id_lokasi_asal = Column(Integer, ForeignKey('lokasi.id'), nullable=False)
+    id_lokasi_tujuan = Column(Integer, ForeignKey('lokasi.id'), nullable=False)
+    petugas = Column(String(50), nullable=True)
+    catatan = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<BarangTransfer(id_barang={self.id_barang}, {self.id_lokasi_asal}->{self.id_lokasi_tujuan})>"
+
+# Rekap bulanan jumlah barang per (tanggal, lokasi, kondisi), dijaga oleh BarangService
+class BarangRollup(Base):
+    """Monthly asset counts per date field, location and condition."""
+    __tablename__ = 'barang_rollup'
+    # 'tanggal_masuk' atau 'tanggal_pembaruan'
+    field = Column(String(30), primary_key=True)
+    bulan = Column(Date, primary_key=True) # Hari pertama bulan
+    id_lokasi = Column(Integer, primary_key=True)
+    kondisi = Column(SQLEnum(KondisiBarang), primary_key=True)
+    jumlah = Column(Integer, nullable=False, default=0)
+
+class StocktakeStatus(enum.Enum):
+    OPEN = "open"
+    APPLIED = "applied"
+
+# Sesi stock opname untuk satu lokasi beserta sub-lokasinya
+class StocktakeSession(BaseModel):
+    """Model for stocktake (stock opname) sessions."""
+    __tablename__ = 'stocktake_session'
+    id_lokasi = Column(Integer, ForeignKey('lokasi.id'), nullable=False)
+    petugas = Column(String(50), nullable=True)
+    catatan = Column(Text, nullable=True)
+    status = Column(SQLEnum(StocktakeStatus), default=StocktakeStatus.OPEN, nullable=False)
+    applied_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<StocktakeSession(id={self.id}, lokasi={self.id_lokasi}, status={self.status})>"
+
+# Tabel staging hasil scan; satu baris per kode per sesi (scan ulang menimpa)
+class StocktakeScan(Base):
+    """Scanned asset codes of a stocktake session."""
+    __tablename__ = 'stocktake_scan'
+    session_id = Column(Integer, ForeignKey('stocktake_session.id'), primary_key=True)
+    kode_barang = Column(String(100), primary_key=True)
+    id_lokasi = Column(Integer, ForeignKey('lokasi.id'), nullable=False) # Lokasi tempat barang ditemukan
+    kondisi = Column(SQLEnum(KondisiBarang), nullable=True) # Kondisi yang dicatat petugas, jika ada
+    scanned_at = Column(DateTime, default=datetime.datetime.now, nullable=False)
+
+# Indeks (kolom, id) untuk setiap kunci sort daftar: halaman terurut dibaca
+# langsung dari indeks, dengan id sebagai penentu urutan jika nilainya sama.
+# Indeks tanggal_masuk juga dipakai filter rentang tanggal dan laporan.
+Index('ix_barang_nama_barang_id', Barang.nama_barang, Barang.id)
+Index('ix_barang_tanggal_masuk_id', Barang.tanggal_masuk, Barang.id)
+Index('ix_barang_kondisi_id', Barang.kondisi, Barang.id)
+Index('ix_barang_id_lokasi_id', Barang.id_lokasi, Barang.id)
+# Daftar dan jumlah barang per penanggung jawab
+Index('ix_barang_id_penanggung_jawab_id', Barang.id_penanggung_jawab, Barang.id)
+Index('ix_lokasi_nama_lokasi_id', Lokasi.nama_lokasi, Lokasi.id)
+Index('ix_users_role_id', User.role, User.id)
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""Lightweight read-only sessions for safe HTTP methods.
+
+GET/HEAD requests don't need ``pyramid_tm``'s two-phase commit bookkeeping.
+They get a plain session with autoflush disabled that is closed (rolled back)
+when the request finishes. Any attempt to write through it is refused, both at
+the ORM level and, where the dialect allows, by the database connection itself.
+"""
+from sqlalchemy import event
+
+SAFE_METHODS = frozenset(['GET', 'HEAD'])
+
+
+class ReadOnlySessionError(Exception):
+    """Raised when a write is attempted through a read-only session."""
+
+
+def is_read_only(dbsession):
+    return bool(dbsession.info.get('read_only'))
+
+
+def _refuse_flush(session, flush_context, instances):
+    if is_read_only(session) and (session.new or session.dirty or session.deleted):
+        raise ReadOnlySessionError('Perubahan data tidak diizinkan pada request baca (GET/HEAD).')
+
+
+def _refuse_dml(orm_execute_state):
+    if is_read_only(orm_execute_state.session) and (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    ):
+        raise ReadOnlySessionError('Perubahan data tidak diizinkan pada request baca (GET/HEAD).')
+
+
+def _begin_read_only(session, transaction, connection):
+    """Put the connection itself into read-only mode where the dialect allows."""
+    if not is_read_only(session):
+        return
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        # pysqlite defers BEGIN until the first write, so reads never take a
+        # write lock; query_only additionally rejects any write statement.
+        connection.exec_driver_sql('PRAGMA query_only = ON')
+        session.info['restore_query_only'] = True
+    elif dialect == 'postgresql':
+        connection.exec_driver_sql('SET TRANSACTION READ ONLY')
+    elif dialect == 'mysql':
+        connection.exec_driver_sql('SET SESSION TRANSACTION READ ONLY')
+        session.info['restore_mysql_read_write'] = True
+
+
+def install_read_only_guards(session_factory):
+    """Register the read-only listeners on every session made by ``session_factory``."""
+    event.listen(session_factory, 'before_flush', _refuse_flush)
+    event.listen(session_factory, 'do_orm_execute', _refuse_dml)
+    event.listen(session_factory, 'after_begin', _begin_read_only)
+
+
+def get_read_only_session(session_factory, request=None):
+    """Get a ``sqlalchemy.orm.Session`` for reading only, not joined to ``pyramid_tm``.
+
+    When a ``request`` is given, the session is closed by a finished callback.
+    """
+    dbsession = session_factory(info={'request': request, 'read_only': True}, autoflush=False)
+    if request is not None:
+        request.add_finished_callback(lambda request: close_read_only_session(dbsession))
+    return dbsession
+
+
+def close_read_only_session(dbsession):
+    """Reset connection-level read-only state and release the connection to the pool."""
+    try:
+        if dbsession.in_transaction():
+            connection = dbsession.connection()
+            if dbsession.info.pop('restore_query_only', False):
+                connection.exec_driver_sql('PRAGMA query_only = OFF')
+            if dbsession.info.pop('restore_mysql_read_write', False):
+                connection.exec_driver_sql('SET SESSION TRANSACTION READ WRITE')
+    except Exception:
+        # Jangan kembalikan koneksi yang masih read-only ke pool
+        dbsession.invalidate()
+        raise
+    finally:
+        dbsession.close()
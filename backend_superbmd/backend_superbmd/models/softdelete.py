@@ -0,0 +1,33 @@
+"""Default filtering of soft-deleted assets.
+
+``BarangService.delete_barang`` only stamps ``Barang.deleted_at``. Every ORM
+SELECT, UPDATE and DELETE run through a session of the factory gets
+``barang.deleted_at IS NULL`` added wherever ``barang`` appears (joins,
+subqueries and relationship loads included), so services and reports never
+see deleted assets unless they ask for them::
+
+    dbsession.execute(stmt, execution_options={INCLUDE_DELETED: True})
+
+INSERT ... SELECT statements are not rewritten; they state the condition
+themselves.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import with_loader_criteria
+
+from .mymodel import Barang
+
+INCLUDE_DELETED = 'include_deleted'
+
+
+def _exclude_deleted(orm_execute_state):
+    if orm_execute_state.execution_options.get(INCLUDE_DELETED, False):
+        return
+    if orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            with_loader_criteria(Barang, Barang.deleted_at.is_(None), include_aliases=True)
+        )
+
+
+def install_soft_delete_filter(session_factory):
+    """Hide soft-deleted assets from every session made by ``session_factory``."""
+    event.listen(session_factory, 'do_orm_execute', _exclude_deleted)
@@ -7,6 +7,7 @@ def includeme(config):
 
     # Dashboard Route
     config.add_route('dashboard', '/api/dashboard')
+    config.add_route('dashboard_stream', '/api/dashboard/stream') # GET Server-Sent Events
 
     # Barang (Assets) Routes
     # Perhatikan: Nama route harus sama dengan yang digunakan di views.py
@@ -15,13 +16,25 @@ def includeme(config):
     config.add_route('barang_detail', '/api/barang/detail/{id}') # GET (detail), PUT (update), DELETE (delete)
     config.add_route('barang_update', '/api/barang/update/{id}', request_method='PUT') # Explicit PUT
     config.add_route('barang_delete', '/api/barang/delete/{id}', request_method='DELETE') # Explicit DELETE
+    config.add_route('barang_changes', '/api/barang/changes') # GET delta-sync (?since=<token>)
+    config.add_route('barang_labels', '/api/barang/labels') # GET lembar label QR (?location_id=)
+    config.add_route('barang_transfer', '/api/barang/transfer', request_method='POST') # POST pindah lokasi massal
+    config.add_route('barang_transfers', '/api/barang/transfers') # GET riwayat pemindahan (?barang_id=)
+    config.add_route('scan', '/api/scan') # GET/POST lookup kode_barang hasil scan
 
+    # Stock opname
+    config.add_route('stocktake_create', '/api/stocktake', request_method='POST')
+    config.add_route('stocktake_detail', '/api/stocktake/{id}')
+    config.add_route('stocktake_scans', '/api/stocktake/{id}/scans', request_method='POST')
+    config.add_route('stocktake_reconciliation', '/api/stocktake/{id}/reconciliation')
+    config.add_route('stocktake_apply', '/api/stocktake/{id}/apply', request_method='POST')
 
     # Lokasi (Locations) Routes
     config.add_route('lokasi_list', '/api/lokasi') # GET (all) dan POST (create)
     config.add_route('lokasi_create', '/api/lokasi/create', request_method='POST') # Explicit POST
     config.add_route('lokasi_detail', '/api/lokasi/detail/{id}') # GET (detail), PUT (update), DELETE (delete)
-    config.add_route('lokasi_update', '/api/lokasi/uptade/{id}', request_method='PUT') # Explicit PUT
+    config.add_route('lokasi_update', '/api/lokasi/update/{id}', request_method='PUT') # Explicit PUT
+    config.add_route('lokasi_update_legacy', '/api/lokasi/uptade/{id}', request_method='PUT') # Ejaan lama, untuk klien lama
     config.add_route('lokasi_delete', '/api/lokasi/delete/{id}', request_method='DELETE') # Explicit DELETE
 
     # Users Routes
@@ -31,11 +44,23 @@ def includeme(config):
     config.add_route('users_update', '/api/users/update/{id}', request_method='PUT') # Explicit PUT
     config.add_route('users_delete', '/api/users/delete/{id}', request_method='DELETE') # Explicit DELETE
     config.add_route('users_login', '/api/users/login', request_method='POST')
+    config.add_route('users_barang', '/api/users/{id}/barang') # GET barang milik penanggung jawab
 
     # Report Routes
     config.add_route('report_assets_by_location', '/api/report/assets-by-location')
     config.add_route('report_assets_by_condition', '/api/report/assets-by-condition')
     config.add_route('report_assets_in_out', '/api/report/assets-in-out')
+    config.add_route('report_assets_timeseries', '/api/report/assets-timeseries')
+    config.add_route('report_pivot', '/api/report/pivot') # GET ?rows=&cols=&measure=count
+    config.add_route('report_valuation', '/api/report/valuation') # GET ?as_of=YYYY-MM-DD
+
+    # Background Job Routes
+    config.add_route('jobs_submit', '/api/jobs', request_method='POST') # POST antrekan job laporan/ekspor
+    config.add_route('jobs_detail', '/api/jobs/{id}') # GET status dan progres job
+    config.add_route('jobs_result', '/api/jobs/{id}/result') # GET unduh hasil job
+
+    # Monitoring Route
+    config.add_route('metrics', '/api/metrics')
 
     # Catch-all for CORS OPTIONS requests (This route should be configured in __init__.py)
     # config.add_route('options_fallback', '/{catchall:.*}', request_method='OPTIONS')
@@ -2,13 +2,18 @@
 
 from marshmallow import Schema, fields, validate
 
+from ..models.mymodel import MetodePenyusutan
+
 # --- Shared Schemas ---
 
 class PaginationSchema(Schema):
-    total_items = fields.Integer(required=True)
-    total_pages = fields.Integer(required=True)
+    # null jika count=none
+    total_items = fields.Integer(required=True, allow_none=True)
+    total_pages = fields.Integer(required=True, allow_none=True)
     current_page = fields.Integer(required=True)
     items_per_page = fields.Integer(required=True)
+    has_more = fields.Boolean()
+    count = fields.String()
 
 # --- User Schemas ---
 
@@ -43,6 +48,7 @@ class LokasiSchema(Schema):
     nama_lokasi = fields.String(required=True, validate=validate.Length(min=3, max=100))
     kode_lokasi = fields.String(required=True, validate=validate.Length(min=3, max=50))
     alamat_lokasi = fields.String(required=True, validate=validate.Length(min=5))
+    parent_id = fields.Integer(allow_none=True)
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
 
@@ -53,6 +59,7 @@ class LokasiUpdateSchema(Schema):
     nama_lokasi = fields.String(validate=validate.Length(min=3, max=100))
     kode_lokasi = fields.String(validate=validate.Length(min=3, max=50))
     alamat_lokasi = fields.String(validate=validate.Length(min=5))
+    parent_id = fields.Integer(allow_none=True)
 
 # --- Barang Schemas ---
 
@@ -66,9 +73,14 @@ class BarangSchema(Schema):
     # id_lokasi tetap karena ini adalah Foreign Key (bukan primary key objek itu sendiri)
     id_lokasi = fields.Integer(required=True) 
     penanggung_jawab = fields.String(required=True, validate=validate.Length(min=3, max=50))
+    # Jika diisi, penanggung_jawab diambil dari username pengguna ini
+    id_penanggung_jawab = fields.Integer(allow_none=True)
     tanggal_masuk = fields.DateTime(format="%Y-%m-%d", required=True)
     tanggal_pembaruan = fields.DateTime(format="%Y-%m-%d", allow_none=True)
     gambar_aset = fields.String(allow_none=True)
+    nilai_perolehan = fields.Decimal(places=2, as_string=True, allow_none=True, validate=validate.Range(min=0))
+    umur_manfaat = fields.Integer(allow_none=True, validate=validate.Range(min=0, max=100)) # Tahun
+    metode_penyusutan = fields.Enum(MetodePenyusutan, by_value=True)
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
 
@@ -84,9 +96,13 @@ class BarangUpdateSchema(Schema):
     kondisi = fields.String(validate=validate.OneOf(["Baik", "Rusak Ringan", "Rusak Berat"]))
     id_lokasi = fields.Integer()
     penanggung_jawab = fields.String(validate=validate.Length(min=3, max=50))
+    id_penanggung_jawab = fields.Integer(allow_none=True)
     tanggal_masuk = fields.DateTime(format="%Y-%m-%d")
     tanggal_pembaruan = fields.DateTime(format="%Y-%m-%d", allow_none=True)
     gambar_aset = fields.String(allow_none=True)
+    nilai_perolehan = fields.Decimal(places=2, as_string=True, allow_none=True, validate=validate.Range(min=0))
+    umur_manfaat = fields.Integer(allow_none=True, validate=validate.Range(min=0, max=100))
+    metode_penyusutan = fields.Enum(MetodePenyusutan, by_value=True)
 
 # --- Response List Schemas (tetap sama, hanya memastikan nested schema terbaru) ---
 
@@ -105,9 +121,71 @@ class BarangListSchema(Schema):
     items = fields.List(fields.Nested(BarangSchema)) 
     pagination = fields.Nested(PaginationSchema)
 
+class BarangTransferFilterSchema(Schema):
+    search_term = fields.String()
+    location_id = fields.Integer()
+    condition = fields.String(validate=validate.OneOf(["Baik", "Rusak Ringan", "Rusak Berat"]))
+    penanggung_jawab = fields.String()
+    id_penanggung_jawab = fields.Integer()
+    start_date = fields.String()
+    end_date = fields.String()
+
+class BarangTransferSchema(Schema):
+    """Schema for bulk asset transfers: either ``ids`` or ``filter`` selects the assets."""
+    id_lokasi_tujuan = fields.Integer(required=True)
+    ids = fields.List(fields.Integer(), validate=validate.Length(min=1, max=50000))
+    filter = fields.Nested(BarangTransferFilterSchema)
+    petugas = fields.String(allow_none=True, validate=validate.Length(max=50))
+    catatan = fields.String(allow_none=True)
+
+class BarangTransferHistorySchema(Schema):
+    id = fields.Integer()
+    id_barang = fields.Integer()
+    kode_barang = fields.String()
+    id_lokasi_asal = fields.Integer()
+    id_lokasi_tujuan = fields.Integer()
+    petugas = fields.String(allow_none=True)
+    catatan = fields.String(allow_none=True)
+    created_at = fields.DateTime()
+
+# --- Stock Opname Schemas ---
+
+class StocktakeSessionSchema(Schema):
+    """Schema for stocktake session creation and serialization."""
+    id = fields.Integer(dump_only=True)
+    id_lokasi = fields.Integer(required=True)
+    petugas = fields.String(allow_none=True, validate=validate.Length(max=50))
+    catatan = fields.String(allow_none=True)
+    status = fields.Function(lambda s: s.status.value, dump_only=True)
+    applied_at = fields.DateTime(dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
+
+class StocktakeScanItemSchema(Schema):
+    kode_barang = fields.String(required=True, validate=validate.Length(min=1, max=100))
+    kondisi = fields.String(allow_none=True, validate=validate.OneOf(["Baik", "Rusak Ringan", "Rusak Berat"]))
+
+class StocktakeScanBatchSchema(Schema):
+    # Lokasi tempat batch ini di-scan; default lokasi sesi
+    id_lokasi = fields.Integer(allow_none=True)
+    items = fields.List(fields.Nested(StocktakeScanItemSchema), required=True,
+                        validate=validate.Length(min=1, max=5000))
+
+class StocktakeApplySchema(Schema):
+    locations = fields.Boolean(load_default=True)
+    conditions = fields.Boolean(load_default=True)
+
+# --- Job Schemas ---
+
+class JobSubmitSchema(Schema):
+    """Schema for queueing a background job; ``params`` are the report's query params."""
+    kind = fields.String(required=True, validate=validate.Length(min=1, max=50))
+    params = fields.Dict(keys=fields.String(), values=fields.Raw(allow_none=True), load_default=dict)
+
 # --- Laporan Schemas (tetap sama) ---
 
 class ReportAssetByLocationSchema(Schema):
+    location_id = fields.Integer()
+    parent_id = fields.Integer(allow_none=True)
     location_name = fields.String()
     total_assets = fields.Integer()
     baik = fields.Integer()
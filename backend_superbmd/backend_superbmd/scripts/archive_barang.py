@@ -0,0 +1,65 @@
+import argparse
+import datetime
+import logging
+import sys
+import time
+
+from pyramid.paster import get_appsettings, setup_logging
+from sqlalchemy import engine_from_config
+from sqlalchemy.orm import sessionmaker
+
+from ..services.archive_service import ArchiveService
+
+log = logging.getLogger(__name__)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Move long-deleted SUPER BMD assets to the archive table.')
+    parser.add_argument('config_uri', nargs='?', default='development.ini',
+                        help='Configuration file, e.g., development.ini')
+    parser.add_argument('--older-than-days', type=int, default=None,
+                        help='Archive assets deleted at least this many days ago '
+                             '(default: superbmd.archive_after_days, or 365).')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Assets moved per transaction.')
+    parser.add_argument('--max-batches', type=int, default=None,
+                        help='Stop after this many batches (default: until none are left).')
+    parser.add_argument('--pause', type=float, default=0.0,
+                        help='Seconds to sleep between batches to leave room for other writers.')
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+
+    setup_logging(args.config_uri)
+    settings = get_appsettings(args.config_uri)
+    older_than_days = args.older_than_days
+    if older_than_days is None:
+        older_than_days = int(settings.get('superbmd.archive_after_days', 365))
+
+    engine = engine_from_config(settings, 'sqlalchemy.')
+    session_factory = sessionmaker(bind=engine)
+    before = datetime.datetime.now() - datetime.timedelta(days=older_than_days)
+
+    log.info(f"Archiving assets deleted before {before:%Y-%m-%d %H:%M}...")
+    started = time.perf_counter()
+    total = batches = 0
+    while args.max_batches is None or batches < args.max_batches:
+        # Satu transaksi per batch agar kunci tabel barang tidak ditahan lama
+        with session_factory.begin() as dbsession:
+            moved = ArchiveService.archive_deleted(dbsession, before, limit=args.batch_size)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+        log.info(f"Batch {batches}: archived {moved} assets ({total} so far).")
+        if args.pause:
+            time.sleep(args.pause)
+
+    with session_factory() as dbsession:
+        pending = ArchiveService.count_pending(dbsession, before)
+    log.info(f"Archived {total} assets in {time.perf_counter() - started:.1f}s; {pending} still pending.")
+
+if __name__ == '__main__':
+    main()
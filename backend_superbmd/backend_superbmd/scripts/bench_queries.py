@@ -0,0 +1,133 @@
+# superbmd_backend/scripts/bench_queries.py
+"""Micro-benchmark for per-request statement construction and compilation.
+
+Compares the legacy ``Query`` API used before the services moved to
+``select()`` statements against the current service methods, on a
+self-contained in-memory SQLite database. Each variant runs on its own engine
+so the compiled-cache hit ratio can be reported per variant. Both variants
+run through the same session setup as the app (soft-delete filter included),
+so they execute the same SQL.
+
+Usage::
+
+    python -m backend_superbmd.scripts.bench_queries --iterations 5000
+"""
+import argparse
+import datetime
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from ..models.instrumentation import install_cache_stats
+from ..models.meta import Base
+from ..models.softdelete import install_soft_delete_filter
+from ..models.mymodel import Barang, KondisiBarang, Lokasi, User, UserRole
+from ..services.barang_service import BarangService
+from ..services.user_service import UserService
+
+
+def make_session_factory(rows, query_cache_size=500):
+    engine = create_engine(
+        'sqlite://',
+        poolclass=StaticPool,
+        connect_args={'check_same_thread': False},
+        query_cache_size=query_cache_size,
+    )
+    Base.metadata.create_all(engine)
+    now = datetime.datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(Lokasi.__table__.insert(), [
+            {'id': 1, 'nama_lokasi': 'Kantor Pusat', 'kode_lokasi': 'KP001', 'alamat_lokasi': 'Jl. Merdeka 1'},
+        ])
+        conn.execute(User.__table__.insert(), [
+            {'id': i, 'username': f'user{i}', 'password': 'x', 'role': UserRole.VIEWER}
+            for i in range(1, 101)
+        ])
+        conn.execute(Barang.__table__.insert(), [
+            {
+                'id': i, 'nama_barang': f'Barang {i}', 'kode_barang': f'BRG{i:06d}',
+                'kondisi': KondisiBarang.BAIK, 'id_lokasi': 1, 'penanggung_jawab': 'user1',
+                'tanggal_masuk': now,
+            }
+            for i in range(1, rows + 1)
+        ])
+    stats = install_cache_stats(engine)
+    session_factory = sessionmaker(bind=engine)
+    install_soft_delete_filter(session_factory)
+    return session_factory, stats
+
+
+# --- Varian yang dibandingkan ---
+
+def legacy_lookups(dbsession, i, rows):
+    dbsession.query(Barang).filter(Barang.kode_barang == f'BRG{i % rows + 1:06d}').first()
+    dbsession.query(User).filter(User.username == f'user{i % 100 + 1}').first()
+    dbsession.query(Barang).filter(Barang.id == i % rows + 1).first()
+
+
+def service_lookups(dbsession, i, rows):
+    BarangService.get_barang_by_kode(dbsession, f'BRG{i % rows + 1:06d}')
+    UserService.get_user_by_username(dbsession, f'user{i % 100 + 1}')
+    BarangService.get_barang_by_id(dbsession, i % rows + 1)
+
+
+def legacy_filtered_list(dbsession, i, rows):
+    query = dbsession.query(Barang).join(Lokasi)
+    query = query.filter(
+        (Barang.nama_barang.ilike(f'%{i % 10}%')) | (Barang.kode_barang.ilike(f'%{i % 10}%'))
+    )
+    query = query.filter(Barang.kondisi == KondisiBarang.BAIK)
+    query.all()
+
+
+def service_filtered_list(dbsession, i, rows):
+    BarangService.get_all_barang(dbsession, search_term=str(i % 10), condition='Baik')
+
+
+VARIANTS = [
+    ('legacy Query lookups', legacy_lookups),
+    ('service lookups (select/get)', service_lookups),
+    ('legacy Query filtered list', legacy_filtered_list),
+    ('service filtered list (select)', service_filtered_list),
+]
+
+
+def run_variant(func, iterations, rows, query_cache_size):
+    session_factory, stats = make_session_factory(rows, query_cache_size)
+    # Pemanasan agar cache terisi, lalu ukur steady state
+    dbsession = session_factory()
+    func(dbsession, 0, rows)
+    dbsession.close()
+    stats.reset()
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        # Sesi baru per iterasi, seperti satu sesi per request
+        dbsession = session_factory()
+        func(dbsession, i, rows)
+        dbsession.close()
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations, stats.as_dict()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=1000)
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    print(f"{'variant':<34}{'cache':>8}{'us/request':>12}{'hit ratio':>11}")
+    for name, func in VARIANTS:
+        for label, cache_size in (('on', 500), ('off', 0)):
+            per_call, stats = run_variant(func, args.iterations, args.rows, cache_size)
+            print(f"{name:<34}{label:>8}{per_call * 1e6:>12.1f}{stats['hit_ratio']:>11.2%}")
+
+
+if __name__ == '__main__':
+    main()
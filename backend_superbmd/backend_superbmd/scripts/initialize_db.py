@@ -1,140 +1,326 @@
-import transaction
+import argparse
 import datetime
 import logging
+import random
+import sys
+import time
 
 # Impor fungsi yang diperlukan dari package aplikasi Anda
 from pyramid.paster import get_appsettings, setup_logging
-from sqlalchemy import engine_from_config
+from sqlalchemy import engine_from_config, func, select
 
-# Impor model dan fungsi sesi dari superbmd_backend.models
-from ..models import get_session_factory, get_tm_session
+# Impor model dari superbmd_backend.models
 from ..models.mymodel import User, Lokasi, Barang, KondisiBarang, UserRole
+from ..services.barang_service import BarangService
+from ..services.lokasi_service import LokasiService
+from ..services.rollup_service import RollupService
 # Hapus import hash_password karena autentikasi dipindahkan ke frontend
-# from ..security.auth import hash_password 
+# from ..security.auth import hash_password
 
 log = logging.getLogger(__name__)
 
-def main(argv=None):
-    if argv is None:
-        argv = []
-    
+# Jumlah baris per satuan --scale
+LOKASI_PER_SCALE = 10
+USERS_PER_SCALE = 5
+BARANG_PER_SCALE = 1000
+
+NAMA_BARANG = [
+    'Laptop', 'Meja', 'Kursi', 'Proyektor', 'Printer', 'Lemari Arsip',
+    'AC Split', 'Komputer PC', 'Scanner', 'Televisi', 'Kendaraan Dinas', 'Genset',
+]
+# (nilai perolehan, masa manfaat dalam tahun) sejajar dengan NAMA_BARANG
+NILAI_BARANG = [
+    (15000000, 4), (2500000, 5), (1200000, 5), (8000000, 5), (3500000, 4), (4000000, 5),
+    (6000000, 5), (12000000, 4), (5000000, 4), (7000000, 5), (350000000, 7), (90000000, 10),
+]
+KOTA = ['Jakarta', 'Bekasi', 'Bandung', 'Bogor', 'Depok', 'Tangerang', 'Serang', 'Cirebon']
+
+# --- Data Awal ---
+USERS_DATA = [
+    {'username': 'admin', 'password': 'admin123', 'role': UserRole.ADMIN},
+    {'username': 'penanggungjawab', 'password': 'pj123', 'role': UserRole.PENANGGUNG_JAWAB},
+    {'username': 'viewer', 'password': 'viewer123', 'role': UserRole.VIEWER},
+]
+
+LOKASI_DATA = [
+    {'nama_lokasi': 'Kantor Pusat', 'kode_lokasi': 'KP001', 'alamat_lokasi': 'Jl. Merdeka No. 1, Jakarta'},
+    {'nama_lokasi': 'Gudang Utama', 'kode_lokasi': 'GDG001', 'alamat_lokasi': 'Jl. Industri No. 10, Bekasi'},
+    {'nama_lokasi': 'Cabang Bandung', 'kode_lokasi': 'CBD001', 'alamat_lokasi': 'Jl. Asia Afrika No. 5, Bandung'},
+]
+
+BARANG_DATA = [
+    {
+        'nama_barang': 'Laptop Premium',
+        'kode_barang': 'LT001',
+        'kondisi': KondisiBarang.BAIK,
+        'kode_lokasi': 'KP001', # Menggunakan kode lokasi untuk mendapatkan ID
+        'penanggung_jawab': 'admin',
+        'tanggal_masuk': datetime.datetime(2023, 1, 15),
+        'gambar_aset': None
+    },
+    {
+        'nama_barang': 'Meja Ergonomis',
+        'kode_barang': 'MJ001',
+        'kondisi': KondisiBarang.RUSAK_RINGAN,
+        'kode_lokasi': 'KP001',
+        'penanggung_jawab': 'penanggungjawab',
+        'tanggal_masuk': datetime.datetime(2023, 3, 20),
+        'gambar_aset': None
+    },
+    {
+        'nama_barang': 'Proyektor Ultra HD',
+        'kode_barang': 'PJ001',
+        'kondisi': KondisiBarang.BAIK,
+        'kode_lokasi': 'GDG001',
+        'penanggung_jawab': 'admin',
+        'tanggal_masuk': datetime.datetime(2024, 2, 10),
+        'gambar_aset': 'https://example.com/projector.jpg'
+    },
+]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Initialize the SUPER BMD database.')
+    parser.add_argument('config_uri', nargs='?', default='development.ini',
+                        help='Configuration file, e.g., development.ini')
+    parser.add_argument('--scale', type=int, default=0,
+                        help=f'Generate synthetic data: {LOKASI_PER_SCALE} lokasi, '
+                             f'{USERS_PER_SCALE} users and {BARANG_PER_SCALE} barang per unit.')
+    parser.add_argument('--batch-size', type=int, default=50000,
+                        help='Rows per bulk INSERT statement.')
+    parser.add_argument('--drop-indexes', action='store_true',
+                        help='Drop secondary indexes during the load and rebuild them afterwards.')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed for reproducible synthetic data.')
+    return parser.parse_args(argv[1:])
+
+
+def _insert_batches(connection, table, rows, batch_size):
+    """Execute ``rows`` (an iterator of dicts) as executemany INSERTs of ``batch_size``."""
+    insert = table.insert()
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            connection.execute(insert, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        connection.execute(insert, batch)
+        total += len(batch)
+    return total
+
+
+def _next_id(connection, model):
+    return (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _sequence_sync_statements(*models):
+    """``setval`` of each model's ``id`` sequence to its current ``MAX(id)`` (PostgreSQL)."""
+    return [
+        select(func.setval(func.pg_get_serial_sequence(model.__tablename__, 'id'), func.max(model.id)))
+        for model in models
+    ]
+
+
+def _sync_id_sequences(connection, *models):
+    # ID eksplisit tidak memajukan serial PostgreSQL; tanpa ini insert ORM berikutnya bentrok
+    if connection.dialect.name != 'postgresql':
+        return
+    for stmt in _sequence_sync_statements(*models):
+        connection.execute(stmt)
+
+
+def seed_initial_data(connection):
+    """Insert the default users, locations and assets that do not exist yet."""
+    now = datetime.datetime.utcnow()
+
+    # --- Tambah Data Awal User ---
+    log.info("Adding initial users...")
+    existing = set(connection.execute(
+        select(User.username).where(User.username.in_([u['username'] for u in USERS_DATA]))
+    ).scalars())
+    new_users = [dict(u, created_at=now, updated_at=now) for u in USERS_DATA if u['username'] not in existing]
+    if new_users:
+        connection.execute(User.__table__.insert(), new_users)
+    log.info(f"Added {len(new_users)} users, {len(existing)} already existed.")
+
+    # --- Tambah Data Awal Lokasi ---
+    log.info("Adding initial locations...")
+    kode_list = [loc['kode_lokasi'] for loc in LOKASI_DATA]
+    existing = set(connection.execute(
+        select(Lokasi.kode_lokasi).where(Lokasi.kode_lokasi.in_(kode_list))
+    ).scalars())
+    new_lokasi = [dict(loc, created_at=now, updated_at=now) for loc in LOKASI_DATA if loc['kode_lokasi'] not in existing]
+    if new_lokasi:
+        connection.execute(Lokasi.__table__.insert(), new_lokasi)
+    log.info(f"Added {len(new_lokasi)} locations, {len(existing)} already existed.")
+
+    # Ambil ID lokasi untuk referensi FK dalam satu query
+    lokasi_ids = dict(connection.execute(
+        select(Lokasi.kode_lokasi, Lokasi.id).where(Lokasi.kode_lokasi.in_(kode_list))
+    ).all())
+
+    user_ids = dict(connection.execute(
+        select(User.username, User.id).where(User.username.in_([b['penanggung_jawab'] for b in BARANG_DATA]))
+    ).all())
+
+    # --- Tambah Data Awal Barang ---
+    log.info("Adding initial assets...")
+    existing = set(connection.execute(
+        select(Barang.kode_barang).where(Barang.kode_barang.in_([b['kode_barang'] for b in BARANG_DATA]))
+    ).scalars())
+    new_barang = []
+    for item_info in BARANG_DATA:
+        if item_info['kode_barang'] in existing:
+            continue
+        barang_fields = {k: v for k, v in item_info.items() if k != 'kode_lokasi'}
+        barang_fields['id_lokasi'] = lokasi_ids[item_info['kode_lokasi']]
+        barang_fields['id_penanggung_jawab'] = user_ids.get(item_info['penanggung_jawab'])
+        barang_fields.update(tanggal_pembaruan=None, created_at=now, updated_at=now)
+        new_barang.append(barang_fields)
+    if new_barang:
+        connection.execute(Barang.__table__.insert(), new_barang)
+    log.info(f"Added {len(new_barang)} assets, {len(existing)} already existed.")
+
+
+def seed_scaled_data(connection, scale, batch_size=50000, rng=None):
+    """Bulk-generate ``scale`` units of synthetic lokasi, users and barang.
+
+    Primary keys are assigned up front from the current ``MAX(id)`` so that
+    foreign keys can be filled in without reading generated IDs back; on
+    PostgreSQL the ``id`` sequences are moved past them afterwards.
+    """
+    rng = rng or random.Random()
+    now = datetime.datetime.utcnow()
+    conditions = list(KondisiBarang)
+    condition_weights = [80, 15, 5]
+
+    lokasi_start = _next_id(connection, Lokasi)
+    lokasi_count = scale * LOKASI_PER_SCALE
+    lokasi_rows = (
+        {
+            'id': lokasi_start + i,
+            'nama_lokasi': f'Lokasi {lokasi_start + i}',
+            'kode_lokasi': f'SLK{lokasi_start + i:07d}',
+            'alamat_lokasi': f'Jl. Seed No. {i + 1}, {KOTA[i % len(KOTA)]}',
+            'created_at': now,
+            'updated_at': now,
+        }
+        for i in range(lokasi_count)
+    )
+    inserted = _insert_batches(connection, Lokasi.__table__, lokasi_rows, batch_size)
+    log.info(f"Inserted {inserted} locations.")
+
+    user_start = _next_id(connection, User)
+    user_count = scale * USERS_PER_SCALE
+    usernames = [f'pj{user_start + i:07d}' for i in range(user_count)]
+    user_rows = (
+        {
+            'id': user_start + i,
+            'username': usernames[i],
+            'password': 'seed123',
+            'role': UserRole.PENANGGUNG_JAWAB,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for i in range(user_count)
+    )
+    inserted = _insert_batches(connection, User.__table__, user_rows, batch_size)
+    log.info(f"Inserted {inserted} users.")
+
+    barang_start = _next_id(connection, Barang)
+    barang_count = scale * BARANG_PER_SCALE
+    epoch = datetime.datetime(2015, 1, 1)
+    span_days = (now - epoch).days
+
+    def barang_rows():
+        # Pilihan acak diambil per batch agar overhead per baris tetap kecil
+        for offset in range(0, barang_count, batch_size):
+            n = min(batch_size, barang_count - offset)
+            kondisi = rng.choices(conditions, weights=condition_weights, k=n)
+            days = rng.choices(range(span_days), k=n)
+            for j in range(n):
+                i = offset + j
+                masuk = epoch + datetime.timedelta(days=days[j])
+                yield {
+                    'id': barang_start + i,
+                    'nama_barang': f'{NAMA_BARANG[i % len(NAMA_BARANG)]} {barang_start + i}',
+                    'kode_barang': f'SBR{barang_start + i:09d}',
+                    'kondisi': kondisi[j],
+                    'id_lokasi': lokasi_start + (i % lokasi_count),
+                    'penanggung_jawab': usernames[i % user_count],
+                    'id_penanggung_jawab': user_start + i % user_count,
+                    'tanggal_masuk': masuk,
+                    'tanggal_pembaruan': None,
+                    'gambar_aset': None,
+                    'nilai_perolehan': NILAI_BARANG[i % len(NILAI_BARANG)][0],
+                    'umur_manfaat': NILAI_BARANG[i % len(NILAI_BARANG)][1],
+                    'created_at': now,
+                    'updated_at': now,
+                }
+
+    inserted = _insert_batches(connection, Barang.__table__, barang_rows(), batch_size)
+    log.info(f"Inserted {inserted} assets.")
+    _sync_id_sequences(connection, Lokasi, User, Barang)
+
+
+def _secondary_indexes(*models):
+    """Non-unique-constraint indexes declared on the models (safe to drop and rebuild)."""
+    return [index for model in models for index in model.__table__.indexes]
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+
     # Konfigurasi logging agar output terlihat di konsol
-    setup_logging('development.ini') # Menggunakan development.ini untuk logging
+    setup_logging(args.config_uri)
+    settings = get_appsettings(args.config_uri)
 
-    # Dapatkan pengaturan aplikasi dari development.ini
-    config_uri = 'development.ini'
-    settings = get_appsettings(config_uri)
-    
     # Dapatkan engine database
     engine = engine_from_config(settings, 'sqlalchemy.')
-    
-    # Dapatkan session factory
-    session_factory = get_session_factory(engine)
-    
+    is_sqlite = engine.dialect.name == 'sqlite'
+
     log.info("Starting database initialization...")
+    started = time.perf_counter()
+
+    indexes = _secondary_indexes(Lokasi, User, Barang) if args.drop_indexes and args.scale else []
+
+    # Semua data dimuat dalam satu transaksi
+    with engine.begin() as connection:
+        if is_sqlite and args.scale:
+            # Aman untuk pemuatan awal: jika gagal, jalankan ulang dari awal
+            connection.exec_driver_sql('PRAGMA synchronous = OFF')
+            connection.exec_driver_sql('PRAGMA cache_size = -200000')
+            connection.exec_driver_sql('PRAGMA temp_store = MEMORY')
+
+        for index in indexes:
+            log.info(f"Dropping index {index.name} for the load...")
+            index.drop(connection, checkfirst=True)
+
+        seed_initial_data(connection)
+
+        if args.scale:
+            log.info(f"Generating synthetic data with scale {args.scale}...")
+            seed_scaled_data(connection, args.scale, batch_size=args.batch_size,
+                             rng=random.Random(args.seed))
+
+        for index in indexes:
+            log.info(f"Rebuilding index {index.name}...")
+            index.create(connection, checkfirst=True)
+
+        # Barang baru dari bulk insert perlu nomor urut untuk delta-sync
+        BarangService.backfill_change_seq(connection)
+        # Closure table dan rekap bulanan dihitung ulang sekali, bukan per baris
+        LokasiService.rebuild_closure(connection)
+        RollupService.rebuild(connection)
+
+    if is_sqlite and args.scale:
+        with engine.connect() as connection:
+            connection.exec_driver_sql('ANALYZE')
 
-    with transaction.manager:
-        dbsession = get_tm_session(session_factory, transaction.manager)
-        
-        # --- Tambah Data Awal User ---
-        log.info("Adding initial users...")
-        users_data = [
-            {'username': 'admin', 'password': 'admin123', 'role': UserRole.ADMIN},
-            {'username': 'penanggungjawab', 'password': 'pj123', 'role': UserRole.PENANGGUNG_JAWAB},
-            {'username': 'viewer', 'password': 'viewer123', 'role': UserRole.VIEWER},
-        ]
-        
-        for user_info in users_data:
-            existing_user = dbsession.query(User).filter_by(username=user_info['username']).first()
-            if not existing_user:
-                # Hapus hashing password
-                # hashed_password = hash_password(user_info['password'])
-                new_user = User(
-                    username=user_info['username'],
-                    password=user_info['password'], # Password disimpan plain text
-                    role=user_info['role']
-                )
-                dbsession.add(new_user)
-                log.info(f"Added user: {user_info['username']}")
-            else:
-                log.info(f"User {user_info['username']} already exists, skipping.")
-        dbsession.flush() # Flush untuk mendapatkan ID user jika diperlukan untuk Barang/Lokasi
-
-        # --- Tambah Data Awal Lokasi ---
-        log.info("Adding initial locations...")
-        lokasi_data = [
-            {'nama_lokasi': 'Kantor Pusat', 'kode_lokasi': 'KP001', 'alamat_lokasi': 'Jl. Merdeka No. 1, Jakarta'},
-            {'nama_lokasi': 'Gudang Utama', 'kode_lokasi': 'GDG001', 'alamat_lokasi': 'Jl. Industri No. 10, Bekasi'},
-            {'nama_lokasi': 'Cabang Bandung', 'kode_lokasi': 'CBD001', 'alamat_lokasi': 'Jl. Asia Afrika No. 5, Bandung'},
-        ]
-
-        # Simpan objek lokasi yang ditambahkan untuk referensi FK
-        added_lokasi_map = {}
-        for loc_info in lokasi_data:
-            existing_lokasi = dbsession.query(Lokasi).filter_by(kode_lokasi=loc_info['kode_lokasi']).first()
-            if not existing_lokasi:
-                new_lokasi = Lokasi(**loc_info)
-                dbsession.add(new_lokasi)
-                dbsession.flush() # Flush untuk mendapatkan ID lokasi
-                added_lokasi_map[new_lokasi.kode_lokasi] = new_lokasi
-                log.info(f"Added location: {loc_info['nama_lokasi']}")
-            else:
-                added_lokasi_map[existing_lokasi.kode_lokasi] = existing_lokasi
-                log.info(f"Location {loc_info['nama_lokasi']} already exists, skipping.")
-        dbsession.flush()
-
-        # --- Tambah Data Awal Barang ---
-        log.info("Adding initial assets...")
-        barang_data = [
-            {
-                'nama_barang': 'Laptop Premium',
-                'kode_barang': 'LT001',
-                'kondisi': KondisiBarang.BAIK,
-                'kode_lokasi': 'KP001', # Menggunakan kode lokasi untuk mendapatkan ID
-                'penanggung_jawab': 'admin',
-                'tanggal_masuk': datetime.datetime(2023, 1, 15),
-                'gambar_aset': None
-            },
-            {
-                'nama_barang': 'Meja Ergonomis',
-                'kode_barang': 'MJ001',
-                'kondisi': KondisiBarang.RUSAK_RINGAN,
-                'kode_lokasi': 'KP001',
-                'penanggung_jawab': 'penanggungjawab',
-                'tanggal_masuk': datetime.datetime(2023, 3, 20),
-                'gambar_aset': None
-            },
-            {
-                'nama_barang': 'Proyektor Ultra HD',
-                'kode_barang': 'PJ001',
-                'kondisi': KondisiBarang.BAIK,
-                'kode_lokasi': 'GDG001',
-                'penanggung_jawab': 'admin',
-                'tanggal_masuk': datetime.datetime(2024, 2, 10),
-                'gambar_aset': 'https://example.com/projector.jpg'
-            },
-        ]
-
-        for item_info in barang_data:
-            existing_barang = dbsession.query(Barang).filter_by(kode_barang=item_info['kode_barang']).first()
-            if not existing_barang:
-                # Dapatkan objek Lokasi dari kode_lokasi
-                lokasi_obj = added_lokasi_map.get(item_info['kode_lokasi'])
-                if lokasi_obj:
-                    # Hapus 'kode_lokasi' dan tambahkan 'id_lokasi'
-                    barang_fields = {k: v for k, v in item_info.items() if k != 'kode_lokasi'}
-                    barang_fields['id_lokasi'] = lokasi_obj.id # FK ke id dari BaseModel
-
-                    new_barang = Barang(**barang_fields)
-                    dbsession.add(new_barang)
-                    log.info(f"Added asset: {item_info['nama_barang']}")
-                else:
-                    log.warning(f"Location with code {item_info['kode_lokasi']} not found for asset {item_info['nama_barang']}, skipping.")
-            else:
-                log.info(f"Asset {item_info['nama_barang']} already exists, skipping.")
-        dbsession.flush() # Commit semua perubahan sekaligus
-    
-    log.info("Database initialization complete.")
+    log.info(f"Database initialization complete in {time.perf_counter() - started:.1f}s.")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import logging
+import signal
+import sys
+
+from pyramid.paster import get_appsettings, setup_logging
+
+from .. import main as make_app
+
+log = logging.getLogger(__name__)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Run SUPER BMD background jobs outside the web server.')
+    parser.add_argument('config_uri', nargs='?', default='development.ini',
+                        help='Configuration file, e.g., development.ini')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='Jobs run concurrently by this process.')
+    parser.add_argument('--once', action='store_true',
+                        help='Run the jobs queued now, then exit.')
+    return parser.parse_args(argv[1:])
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+
+    setup_logging(args.config_uri)
+    settings = get_appsettings(args.config_uri)
+    # Aplikasi lengkap dimuat agar semua handler job terdaftar; worker thread-nya sendiri tidak dijalankan
+    settings['superbmd.jobs_workers'] = '0'
+    app = make_app({}, **settings)
+    job_queue = app.registry['job_queue']
+
+    if args.once:
+        log.info(f"Ran {job_queue.run_pending()} queued jobs.")
+        return
+
+    def stop(signum, frame):
+        log.info("Stopping job workers...")
+        job_queue.stop(timeout=0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    log.info(f"Job worker started with {args.threads} threads on {job_queue.jobs_dir}.")
+    threads = job_queue.start(threads=args.threads)
+    # Thread utama hanya menunggu sinyal; job yang sedang berjalan diselesaikan lebih dulu
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(1.0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+# superbmd_backend/scripts/loadtest.py
+"""HTTP load-test harness for SUPER BMD.
+
+Replays a traffic mix modeled on the React hooks (``useBarangList`` paging and
+searching, ``useBarangById``, ``useDashboardData``, ``useReports`` and the
+create/update hooks) against a running server.
+
+Usage::
+
+    loadtest_backend_superbmd development.ini --clients 20 --duration 30
+    loadtest_backend_superbmd --url http://localhost:6543 --write-ratio 0.05
+
+When a config URI is given, the app is loaded from it and served by
+``waitress`` on an ephemeral local port for the duration of the run, so the
+numbers include waitress's thread pool just like production.
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+
+log = logging.getLogger(__name__)
+
+SEARCH_TERMS = ['laptop', 'meja', 'proyektor', 'kursi', 'printer', 'LT', 'MJ', 'PJ']
+CONDITIONS = ['Baik', 'Rusak Ringan', 'Rusak Berat']
+# Batas limit bawaan server (superbmd.max_page_limit)
+PRIME_LIMIT = 100
+REPORT_ENDPOINTS = {
+    'report_assets_by_location': '/api/report/assets-by-location',
+    'report_assets_by_condition': '/api/report/assets-by-condition',
+    'report_assets_in_out': '/api/report/assets-in-out',
+}
+
+# Bobot aksi baca, kira-kira mengikuti pola pemakaian halaman frontend;
+# nama aksi sekaligus label statistiknya
+READ_MIX = [
+    ('barang_list', 40),
+    ('barang_search', 15),
+    ('barang_detail', 20),
+    ('dashboard', 10),
+    ('lokasi_list', 5),
+    ('report_assets_by_location', 4),
+    ('report_assets_by_condition', 3),
+    ('report_assets_in_out', 3),
+]
+WRITE_MIX = [
+    ('barang_create', 40),
+    ('barang_update', 60),
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list (``pct`` in 0-100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class RouteStats:
+    """Latency and error bookkeeping for one route label."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.db_locked = 0
+        self.status_counts = {}
+
+    def record(self, latency, status, body=b''):
+        self.latencies.append(latency)
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if status == 0 or status >= 400:
+            self.errors += 1
+            if b'database is locked' in body:
+                self.db_locked += 1
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            'requests': count,
+            'throughput': count / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'errors': self.errors,
+            'error_rate': self.errors / count if count else 0.0,
+            'db_locked': self.db_locked,
+            'status_counts': self.status_counts,
+        }
+
+
+class LoadTest:
+    """Drives ``clients`` concurrent simulated users against ``base_url``."""
+
+    def __init__(self, base_url, clients=10, duration=30.0, think_time=0.5,
+                 write_ratio=0.1, items_per_page=10, timeout=30.0, seed=None):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 80
+        self.clients = clients
+        self.duration = duration
+        self.think_time = think_time
+        self.write_ratio = write_ratio
+        self.items_per_page = items_per_page
+        self.timeout = timeout
+        self.seed = seed
+
+        self.stats = {}
+        self._lock = threading.Lock()
+        self.lokasi_ids = []
+        self.barang_ids = []
+        self.total_pages = 1
+
+    # --- HTTP helpers ---
+
+    def _connection(self):
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _request(self, conn, label, method, path, params=None, payload=None):
+        if params:
+            path = f'{path}?{urllib.parse.urlencode(params)}'
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            log.debug(f"{label} failed: {e}")
+            conn.close()
+            data, status = str(e).encode('utf-8'), 0
+        latency = time.perf_counter() - start
+
+        with self._lock:
+            self.stats.setdefault(label, RouteStats()).record(latency, status, data)
+        return status, data
+
+    def _json(self, data):
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    # --- Setup ---
+
+    def prime(self):
+        """Fetch location and asset IDs so the scenario can pick realistic targets."""
+        conn = self._connection()
+        try:
+            status, data = self._request(conn, 'prime', 'GET', '/api/lokasi', {'limit': PRIME_LIMIT})
+            body = self._json(data) if status == 200 else None
+            if body:
+                self.lokasi_ids = [item['id'] for item in body.get('items', [])]
+
+            status, data = self._request(
+                conn, 'prime', 'GET', '/api/barang', {'page': 1, 'limit': PRIME_LIMIT})
+            body = self._json(data) if status == 200 else None
+            if body:
+                self.barang_ids = [item['id'] for item in body.get('items', [])]
+                total_items = body.get('pagination', {}).get('total_items', 0)
+                self.total_pages = max((total_items + self.items_per_page - 1) // self.items_per_page, 1)
+        finally:
+            conn.close()
+        self.stats.pop('prime', None)
+
+    # --- Actions ---
+
+    def client_random(self, index):
+        """Random source of client ``index``; with a seed each client replays the same choices."""
+        return random.Random(None if self.seed is None else self.seed + index)
+
+    def _pick(self, rng, mix):
+        total = sum(weight for _, weight in mix)
+        roll = rng.uniform(0, total)
+        for name, weight in mix:
+            roll -= weight
+            if roll <= 0:
+                return name
+        return mix[-1][0]
+
+    def _barang_payload(self, rng):
+        suffix = uuid.uuid4().hex[:10]
+        return {
+            'nama_barang': f'Loadtest Barang {suffix}',
+            'kode_barang': f'LTX-{suffix}',
+            'kondisi': rng.choice(CONDITIONS),
+            'id_lokasi': rng.choice(self.lokasi_ids),
+            'penanggung_jawab': 'loadtest',
+            'tanggal_masuk': time.strftime('%Y-%m-%d'),
+        }
+
+    def run_action(self, conn, action, rng):
+        params = {'page': 1, 'limit': self.items_per_page}
+        if action == 'barang_list':
+            params['page'] = rng.randint(1, self.total_pages)
+            if self.lokasi_ids and rng.random() < 0.3:
+                params['location_id'] = rng.choice(self.lokasi_ids)
+            self._request(conn, action, 'GET', '/api/barang', params)
+        elif action == 'barang_search':
+            params['search'] = rng.choice(SEARCH_TERMS)
+            self._request(conn, action, 'GET', '/api/barang', params)
+        elif action == 'barang_detail' and self.barang_ids:
+            barang_id = rng.choice(self.barang_ids)
+            self._request(conn, action, 'GET', f'/api/barang/detail/{barang_id}')
+        elif action == 'dashboard':
+            self._request(conn, action, 'GET', '/api/dashboard')
+        elif action == 'lokasi_list':
+            self._request(conn, action, 'GET', '/api/lokasi', params)
+        elif action in REPORT_ENDPOINTS:
+            self._request(conn, action, 'GET', REPORT_ENDPOINTS[action])
+        elif action == 'barang_create' and self.lokasi_ids:
+            status, data = self._request(
+                conn, action, 'POST', '/api/barang/create', payload=self._barang_payload(rng))
+            body = self._json(data) if status < 300 else None
+            # barang_create merender (data, 201) sebagai list JSON
+            if isinstance(body, list) and body:
+                body = body[0]
+            if isinstance(body, dict) and body.get('id'):
+                with self._lock:
+                    self.barang_ids.append(body['id'])
+        elif action == 'barang_update' and self.barang_ids:
+            barang_id = rng.choice(self.barang_ids)
+            self._request(conn, action, 'PUT', f'/api/barang/update/{barang_id}',
+                          payload={'kondisi': rng.choice(CONDITIONS)})
+
+    def _client(self, deadline, index):
+        # Satu Random per klien: thread tidak berbagi urutan acak, sehingga --seed bisa diulang
+        rng = self.client_random(index)
+        conn = self._connection()
+        try:
+            while time.perf_counter() < deadline:
+                mix = WRITE_MIX if rng.random() < self.write_ratio else READ_MIX
+                self.run_action(conn, self._pick(rng, mix), rng)
+                if self.think_time:
+                    time.sleep(rng.expovariate(1.0 / self.think_time))
+        finally:
+            conn.close()
+
+    def run(self):
+        """Run the scenario and return ``(elapsed_seconds, per-route summary)``."""
+        self.prime()
+        start = time.perf_counter()
+        deadline = start + self.duration
+        threads = [
+            threading.Thread(target=self._client, args=(deadline, i), name=f'loadtest-{i}', daemon=True)
+            for i in range(self.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        return elapsed, self.summaries(elapsed)
+
+    def summaries(self, elapsed):
+        return {label: stats.summary(elapsed) for label, stats in sorted(self.stats.items())}
+
+
+def start_local_server(config_uri, threads=4):
+    """Load the app from ``config_uri`` and serve it with waitress on a free port."""
+    from pyramid.paster import get_app
+    from waitress import create_server
+
+    app = get_app(config_uri, 'main')
+    server = create_server(app, host='127.0.0.1', port=0, threads=threads)
+    thread = threading.Thread(target=server.run, name='loadtest-waitress', daemon=True)
+    thread.start()
+    return server, thread, f'http://127.0.0.1:{server.effective_port}'
+
+
+def stop_local_server(server, thread=None, timeout=5.0):
+    """Stop a server from :func:`start_local_server` once in-flight tasks finish."""
+    from waitress import wasyncore
+
+    # Tunggu task waitress yang masih berjalan sebelum socket trigger ditutup
+    server.task_dispatcher.shutdown()
+    # Tutup semua socket dari dalam thread loop, sehingga select() tidak
+    # pernah melihat file descriptor yang sudah ditutup dan loop berhenti
+    server.trigger.pull_trigger(lambda: wasyncore.close_all(server._map))
+    if thread is not None:
+        thread.join(timeout)
+
+
+def format_report(elapsed, summaries):
+    lines = [
+        f"Duration: {elapsed:.1f}s",
+        f"{'route':<28}{'reqs':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'err %':>8}{'locked':>8}",
+    ]
+    total = 0
+    for label, s in summaries.items():
+        total += s['requests']
+        lines.append(
+            f"{label:<28}{s['requests']:>8}{s['throughput']:>9.1f}{s['p50_ms']:>9.1f}"
+            f"{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['error_rate'] * 100:>8.2f}{s['db_locked']:>8}"
+        )
+    lines.append(f"Total: {total} requests, {total / elapsed if elapsed else 0:.1f} req/s")
+    return '\n'.join(lines)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('config_uri', nargs='?',
+                        help='Serve the app from this config file with a local waitress server.')
+    parser.add_argument('--url', help='Base URL of an already running server.')
+    parser.add_argument('--clients', type=int, default=10, help='Concurrent simulated users.')
+    parser.add_argument('--duration', type=float, default=30.0, help='Run time in seconds.')
+    parser.add_argument('--think-time', type=float, default=0.5,
+                        help='Mean pause between requests per user, in seconds.')
+    parser.add_argument('--write-ratio', type=float, default=0.1,
+                        help='Fraction of actions that are create/update (0-1).')
+    parser.add_argument('--threads', type=int, default=4,
+                        help='waitress worker threads for the local server.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON.')
+    args = parser.parse_args(argv[1:])
+    if not args.config_uri and not args.url:
+        parser.error('either a config_uri or --url is required')
+    return args
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARN)
+
+    server = thread = None
+    base_url = args.url
+    if not base_url:
+        server, thread, base_url = start_local_server(args.config_uri, threads=args.threads)
+
+    try:
+        loadtest = LoadTest(
+            base_url,
+            clients=args.clients,
+            duration=args.duration,
+            think_time=args.think_time,
+            write_ratio=args.write_ratio,
+            seed=args.seed,
+        )
+        elapsed, summaries = loadtest.run()
+    finally:
+        if server is not None:
+            stop_local_server(server, thread)
+
+    if args.json:
+        print(json.dumps({'elapsed': elapsed, 'routes': summaries}, indent=4))
+    else:
+        print(format_report(elapsed, summaries))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""Pre-forking production server: one loaded application, several waitress processes.
+
+The master process loads the application once (imports, ``configure_mappers``,
+route and view configuration, in-memory indexes), binds the listening
+sockets and then forks ``--workers`` processes that share all of it
+copy-on-write. Each worker runs waitress with ``threads`` from
+``[server:main]`` on the inherited sockets, so the kernel spreads
+connections across processes and the JSON/marshmallow work is no longer
+bound to a single core.
+
+After the fork every worker drops the database connections inherited from
+the master and starts its own background job threads
+(``superbmd.jobs_workers`` per process). A worker that has served
+``--max-requests`` requests stops accepting, finishes the requests it has
+and exits; the master replaces it with a fresh fork of the loaded app. This
+bounds memory growth without a cold start.
+
+In-process state is per worker. With more than one worker:
+
+- Live dashboard streams (SSE) learn about writes made by other workers
+  through the shared ``dashboard`` change sequence, polled every
+  ``superbmd.sse_sync_interval`` seconds, and answer them with ``resync``
+  (see ``services/dashboard_events.py``).
+- Admission limits, their queues, the per-client token buckets and
+  ``superbmd.sse_max_clients`` are counted per worker, so the whole server
+  admits up to ``--workers`` times as much. Size them per worker.
+
+SIGTERM or SIGINT on the master stops all workers gracefully.
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+
+from plaster import get_settings
+from pyramid.paster import get_appsettings, setup_logging
+from waitress import wasyncore
+from waitress.adjustments import Adjustments
+from waitress.channel import HTTPChannel
+from waitress.server import BaseWSGIServer, create_server
+
+from .. import main as make_app
+
+log = logging.getLogger(__name__)
+
+STOP_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Serve SUPER BMD with several pre-forked waitress processes.')
+    parser.add_argument('config_uri', nargs='?', default='production.ini',
+                        help='Configuration file, e.g., production.ini')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: superbmd.serve_workers, or the CPU count).')
+    parser.add_argument('--max-requests', type=int, default=None,
+                        help='Recycle a worker after this many requests; 0 never recycles '
+                             '(default: superbmd.serve_max_requests, or 0).')
+    parser.add_argument('--max-requests-jitter', type=int, default=None,
+                        help='Random extra requests per worker so they do not all recycle at once '
+                             '(default: superbmd.serve_max_requests_jitter, or 0).')
+    parser.add_argument('--graceful-timeout', type=float, default=None,
+                        help='Seconds a stopping worker may spend on its open requests '
+                             '(default: superbmd.serve_graceful_timeout, or 30).')
+    parser.add_argument('--listen', default=None,
+                        help='Addresses to listen on, e.g. "*:6543" (default: listen from [server:main]).')
+    return parser.parse_args(argv[1:])
+
+
+def bind_sockets(listen, backlog=1024):
+    """Bind and listen on every address of ``listen`` (waitress syntax) in this process."""
+    sockets = []
+    for family, socktype, proto, sockaddr in Adjustments(listen=listen).listen:
+        sock = socket.socket(family, socktype, proto)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if family == socket.AF_INET6:
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+        sock.bind(sockaddr)
+        sock.listen(backlog)
+        sockets.append(sock)
+    return sockets
+
+
+class RequestCounter:
+    """WSGI middleware that sets ``recycle`` once ``max_requests`` requests have started."""
+
+    def __init__(self, app, max_requests, recycle):
+        self.app = app
+        self.max_requests = max_requests
+        self.recycle = recycle
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.requests += 1
+            if self.max_requests and self.requests >= self.max_requests:
+                self.recycle.set()
+        return self.app(environ, start_response)
+
+
+def after_fork(registry):
+    """Drop state inherited from the master that must not be shared between processes."""
+    # Koneksi pool milik master tidak boleh dipakai bersama; close=False agar master tidak ikut terputus
+    registry['dbsession_factory'].kw['bind'].dispose(close=False)
+    registry['job_queue'].dispose()
+
+
+def _serve_until(server_map, server, stop, graceful_timeout):
+    """Run the waitress loop until ``stop`` is set, then drain open requests."""
+    while not stop.is_set():
+        wasyncore.loop(timeout=server.adj.asyncore_loop_timeout, map=server_map,
+                       use_poll=server.adj.asyncore_use_poll, count=1)
+
+    # Berhenti menerima koneksi baru; worker lain tetap melayani socket yang sama
+    for dispatcher in list(server_map.values()):
+        if isinstance(dispatcher, BaseWSGIServer):
+            dispatcher.accepting = False
+    deadline = time.monotonic() + graceful_timeout
+    while time.monotonic() < deadline:
+        channels = [d for d in server_map.values() if isinstance(d, HTTPChannel)]
+        if not channels:
+            break
+        now = time.time()
+        for channel in channels:
+            # Hanya koneksi keep-alive yang menganggur; koneksi yang baru diterima masih menunggu permintaannya
+            if not channel.requests and channel.request is None and now - channel.last_activity > 1.0:
+                channel.will_close = True
+        wasyncore.loop(timeout=0.1, map=server_map, use_poll=server.adj.asyncore_use_poll, count=1)
+    server.task_dispatcher.shutdown(timeout=max(deadline - time.monotonic(), 0))
+
+
+def run_worker(app, sockets, server_options, max_requests, graceful_timeout, job_threads):
+    """Body of a forked worker process; returns when the worker should exit."""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    # Sinyal yang tiba selama fork ditahan master; baru diterima setelah handler worker terpasang
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+
+    after_fork(app.registry)
+    job_queue = app.registry['job_queue']
+    if job_threads:
+        job_queue.start(threads=job_threads)
+    publisher = app.registry['dashboard_publisher']
+    if publisher.shared:
+        publisher.watch(app.registry['dbsession_factory'])
+
+    server_map = {}
+    server = create_server(RequestCounter(app, max_requests, stop), map=server_map,
+                           sockets=sockets, **server_options)
+    log.info(f"Worker {os.getpid()} serving (max requests: {max_requests or 'unlimited'}).")
+    _serve_until(server_map, server, stop, graceful_timeout)
+    publisher.stop_watching(timeout=graceful_timeout)
+    job_queue.stop(timeout=graceful_timeout)
+    log.info(f"Worker {os.getpid()} stopped.")
+
+
+def main(argv=sys.argv):
+    args = parse_args(argv)
+
+    setup_logging(args.config_uri)
+    settings = get_appsettings(args.config_uri)
+    # Opsi waitress dari [server:main], tanpa use/here/__file__ dan alamat yang di-bind master
+    server_options = {
+        key: value for key, value in get_settings(args.config_uri, 'server:main').items()
+        if key not in ('use', 'here', '__file__')
+    }
+    listen = args.listen or server_options.get('listen') or '0.0.0.0:6543'
+    for option in ('listen', 'host', 'port'):
+        server_options.pop(option, None)
+
+    workers = args.workers or int(settings.get('superbmd.serve_workers', 0)) or os.cpu_count() or 1
+    max_requests = args.max_requests
+    if max_requests is None:
+        max_requests = int(settings.get('superbmd.serve_max_requests', 0))
+    jitter = args.max_requests_jitter
+    if jitter is None:
+        jitter = int(settings.get('superbmd.serve_max_requests_jitter', 0))
+    graceful_timeout = args.graceful_timeout
+    if graceful_timeout is None:
+        graceful_timeout = float(settings.get('superbmd.serve_graceful_timeout', 30))
+
+    # Thread job baru dijalankan di worker: thread tidak ikut ter-fork
+    job_threads = int(settings.get('superbmd.jobs_workers', 0))
+    settings['superbmd.jobs_workers'] = '0'
+    app = make_app({}, **settings)
+    if workers > 1:
+        # Delta dashboard dari worker lain hanya terlihat lewat urutan bersama di database
+        app.registry['dashboard_publisher'].shared = True
+        log.info(f"Admission limits, client rate limits and superbmd.sse_max_clients apply per worker "
+                 f"({workers} workers).")
+    # Koneksi yang dibuka saat startup (snapshot, indeks) ditutup sebelum fork
+    app.registry['dbsession_factory'].kw['bind'].dispose()
+    app.registry['job_queue'].dispose()
+    sockets = bind_sockets(listen, int(server_options.get('backlog', 1024)))
+    # Objek hasil startup tidak disentuh GC lagi, sehingga halaman memorinya tetap dibagi copy-on-write
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        limit = max_requests + random.randint(0, jitter) if max_requests else 0
+        # Tahan sinyal stop sampai worker baru tercatat, agar ikut dihentikan
+        signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+        try:
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    run_worker(app, sockets, server_options, limit, graceful_timeout, job_threads)
+                except BaseException:
+                    log.exception("Worker crashed.")
+                    code = 1
+                finally:
+                    logging.shutdown()
+                    os._exit(code)
+            children[pid] = time.monotonic()
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    log.info(f"Serving on {listen} with {workers} workers (master {os.getpid()}).")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        log.info(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; starting a new one.")
+        # Jangan fork terus-menerus bila worker langsung mati (mis. database tidak tersedia)
+        if time.monotonic() - started < 1.0:
+            time.sleep(1.0)
+        if not stopping:
+            spawn()
+
+    for sock in sockets:
+        sock.close()
+    log.info("All workers stopped.")
+
+if __name__ == '__main__':
+    main()
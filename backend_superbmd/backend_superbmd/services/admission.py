@@ -0,0 +1,268 @@
+"""Admission control and load shedding for incoming requests.
+
+A tween placed right under the CORS tween decides, before a transaction or
+database session is opened, whether a request may run now:
+
+- Each client (by ``remote_addr``) has a token bucket refilled at
+  ``superbmd.admission_rate`` requests per second up to
+  ``superbmd.admission_burst``; an empty bucket answers ``429``.
+- Each route class has its own concurrency limit and a short wait queue.
+  ``report`` covers reports, the dashboard aggregates, label sheets and job
+  downloads; ``crud`` every POST/PUT/DELETE; ``lookup`` the remaining GETs
+  (lists, details, scans). Slow reports fill only their own slots, so cheap
+  lookups keep flowing. A request that finds the queue of its class full, or
+  waits longer than ``superbmd.admission_queue_timeout``, answers ``503``.
+
+A GET that would only wait for an identical coalesced request already in
+flight (see ``singleflight``) skips the class limit: the computing request
+holds the slot, and the waiters cost a thread but no database work. Thirty
+dashboards opened at once thus take one ``report`` slot, not thirty.
+
+Both answers carry ``Retry-After`` and are shed without touching the
+database. Limits are ``superbmd.admission_<class>_limit`` and
+``superbmd.admission_<class>_queue`` (0 disables the limit or the rate);
+``superbmd.admission = false`` turns the tween into a pass-through. Active
+and waiting requests per class are exposed through ``as_dict()``.
+
+Waiting requests hold a server thread, so the sum of the queues should stay
+well below the WSGI server's thread count.
+
+All counters live in the process. Under ``serve_backend_superbmd --workers N``
+each worker admits its own limits and keeps its own buckets, so the server as
+a whole allows up to N times the configured concurrency and client rate.
+
+Activate with ``config.include('backend_superbmd.services.admission')``.
+"""
+import math
+import threading
+import time
+
+from pyramid.interfaces import IRoutesMapper
+from pyramid.response import Response
+from pyramid.settings import asbool
+
+from ..models.readonly import SAFE_METHODS
+from .singleflight import request_key
+
+REPORT = 'report'
+CRUD = 'crud'
+LOOKUP = 'lookup'
+
+# Route baca yang mahal; sisanya yang aman (GET/HEAD) dianggap lookup
+REPORT_ROUTES = frozenset({
+    'dashboard',
+    'barang_labels',
+    'jobs_result',
+    'stocktake_reconciliation',
+})
+REPORT_ROUTE_PREFIXES = ('report_',)
+# Tidak pernah dibatasi: monitoring harus tetap bisa membaca angka antrean saat beban puncak
+EXEMPT_ROUTES = frozenset({'metrics'})
+
+DEFAULT_LIMITS = {
+    REPORT: (2, 4),
+    CRUD: (4, 8),
+    LOOKUP: (8, 16),
+}
+
+
+def route_class(route_name, method):
+    """Route class (``report``, ``crud`` or ``lookup``) of a route and method, None if exempt."""
+    if route_name in EXEMPT_ROUTES or method == 'OPTIONS':
+        return None
+    if method not in SAFE_METHODS:
+        return CRUD
+    if route_name in REPORT_ROUTES or (route_name or '').startswith(REPORT_ROUTE_PREFIXES):
+        return REPORT
+    return LOOKUP
+
+
+class Overloaded(Exception):
+    """Raised when a route class has no free slot and no room left in its queue."""
+
+
+class ConcurrencyLimiter:
+    """Up to ``limit`` concurrent holders; up to ``queue`` more wait for a slot."""
+
+    def __init__(self, limit, queue=0, timeout=5.0):
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.joined = 0
+        self.shed = 0
+
+    def acquire(self):
+        with self._cond:
+            if self.limit and self.active >= self.limit:
+                if self.waiting >= self.queue:
+                    self.shed += 1
+                    raise Overloaded()
+                self.waiting += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self.active < self.limit, self.timeout)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    self.shed += 1
+                    raise Overloaded()
+            self.active += 1
+            self.admitted += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def join(self):
+        """Count a request let through without a slot to share an in-flight result."""
+        with self._cond:
+            self.joined += 1
+
+    def as_dict(self):
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'queue': self.queue,
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'joined': self.joined,
+                'shed': self.shed,
+            }
+
+
+class TokenBuckets:
+    """Per-client token buckets: ``rate`` tokens per second, at most ``burst`` saved up."""
+
+    def __init__(self, rate=0.0, burst=0, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.limited = 0
+
+    def take(self, client, now=None):
+        """Take one token for ``client``; return 0 if allowed, else seconds until a token is available."""
+        if not self.rate:
+            return 0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            self._buckets[client] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._prune(now)
+            if allowed:
+                return 0
+            self.limited += 1
+            return (1 - tokens) / self.rate
+
+    def _prune(self, now):
+        # Bucket yang sudah terisi penuh kembali sama dengan klien baru, aman dibuang
+        full_after = self.burst / self.rate
+        self._buckets = {
+            client: (tokens, last) for client, (tokens, last) in self._buckets.items()
+            if now - last < full_after
+        }
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'clients': len(self._buckets),
+                'limited': self.limited,
+            }
+
+
+class AdmissionController:
+    def __init__(self, enabled=True, limits=None, queue_timeout=5.0, rate=0.0, burst=0):
+        self.enabled = enabled
+        self.queue_timeout = queue_timeout
+        self.classes = {
+            name: ConcurrencyLimiter(limit, queue, queue_timeout)
+            for name, (limit, queue) in (limits or DEFAULT_LIMITS).items()
+        }
+        self.buckets = TokenBuckets(rate, burst)
+
+    def as_dict(self):
+        return {
+            'enabled': self.enabled,
+            'queue_timeout': self.queue_timeout,
+            'classes': {name: limiter.as_dict() for name, limiter in self.classes.items()},
+            'rate_limit': self.buckets.as_dict(),
+        }
+
+
+def _shed(status, message, retry_after):
+    response = Response(status=status, json_body={'message': message})
+    response.headers['Retry-After'] = str(max(math.ceil(retry_after), 1))
+    return response
+
+
+def admission_tween_factory(handler, registry):
+    admission = registry['admission']
+    singleflight = registry.get('singleflight')
+    mapper = registry.queryUtility(IRoutesMapper)
+
+    def joins_in_flight(request, route, matchdict):
+        if singleflight is None or not singleflight.enabled or request.method not in SAFE_METHODS:
+            return False
+        return singleflight.in_flight(request_key(request, route, matchdict))
+
+    def admission_tween(request):
+        if not admission.enabled:
+            return handler(request)
+        info = mapper(request) if mapper is not None else {'route': None, 'match': None}
+        route = info['route']
+        name = route_class(route.name if route is not None else None, request.method)
+        if name is None:
+            return handler(request)
+
+        wait = admission.buckets.take(request.remote_addr)
+        if wait:
+            return _shed(429, 'Terlalu banyak permintaan. Coba lagi sebentar lagi.', wait)
+
+        limiter = admission.classes[name]
+        # Hanya menunggu hasil yang sedang dihitung: slot sudah dipegang pemimpinnya.
+        # Bila pemimpin selesai tepat sebelum view, permintaan ini menghitung sendiri tanpa slot.
+        if joins_in_flight(request, route, info['match']):
+            limiter.join()
+            return handler(request)
+        try:
+            limiter.acquire()
+        except Overloaded:
+            return _shed(503, 'Server sedang sibuk. Coba lagi sebentar lagi.', admission.queue_timeout)
+        try:
+            return handler(request)
+        finally:
+            limiter.release()
+
+    return admission_tween
+
+
+# Satu pengendali per proses, dibagi oleh semua thread server
+admission = AdmissionController()
+
+
+def includeme(config):
+    settings = config.get_settings()
+    timeout = float(settings.get('superbmd.admission_queue_timeout', admission.queue_timeout))
+    admission.enabled = asbool(settings.get('superbmd.admission', admission.enabled))
+    admission.queue_timeout = timeout
+    for name, limiter in admission.classes.items():
+        limiter.limit = int(settings.get(f'superbmd.admission_{name}_limit', DEFAULT_LIMITS[name][0]))
+        limiter.queue = int(settings.get(f'superbmd.admission_{name}_queue', DEFAULT_LIMITS[name][1]))
+        limiter.timeout = timeout
+    rate = float(settings.get('superbmd.admission_rate', admission.buckets.rate))
+    admission.buckets.rate = rate
+    # Tanpa burst eksplisit klien boleh menabung satu detik permintaan
+    admission.buckets.burst = int(settings.get('superbmd.admission_burst', 0)) or max(math.ceil(rate), 1)
+    config.registry['admission'] = admission
+    config.add_tween('backend_superbmd.services.admission.admission_tween_factory', under='.cors_tween_factory')
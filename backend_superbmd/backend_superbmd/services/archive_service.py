@@ -0,0 +1,75 @@
+"""Moves long-deleted assets from the hot ``barang`` table to ``barang_arsip``.
+
+``BarangService.delete_barang`` only stamps ``deleted_at``; the row stays in
+``barang`` (hidden from every ORM query, see ``models/softdelete.py``) and
+keeps its ``kode_barang`` reserved. ``archive_deleted`` copies rows deleted
+before a cut-off into the archive and removes them from ``barang`` in chunks
+of ``limit`` ids, so each transaction stays short. Rollup, dashboard,
+columnar snapshot and scan index already dropped the asset at deletion time,
+so nothing else needs updating here.
+
+Run it with the ``archive_backend_superbmd_barang`` console script.
+"""
+import datetime
+
+from sqlalchemy import delete, func, insert, literal, select
+
+from ..models.mymodel import Barang, BarangArsip
+from ..models.softdelete import INCLUDE_DELETED
+
+# Kolom yang disalin apa adanya dari barang ke barang_arsip
+ARCHIVED_COLUMNS = [column.name for column in BarangArsip.__table__.columns if column.name != 'archived_at']
+
+
+class ArchiveService:
+    """Service for archiving deleted assets."""
+
+    @staticmethod
+    def archive_deleted(dbsession, before: datetime.datetime, limit: int = 1000) -> int:
+        """Archive up to ``limit`` assets deleted before ``before``; returns how many moved.
+
+        The caller commits; call again until it returns 0 to drain the backlog.
+        """
+        ids = dbsession.execute(
+            select(Barang.id).where(Barang.deleted_at < before).order_by(Barang.id).limit(limit),
+            execution_options={INCLUDE_DELETED: True}
+        ).scalars().all()
+        return ArchiveService._archive(dbsession, ids)
+
+    @staticmethod
+    def archive_lokasi(dbsession, lokasi_id: int) -> int:
+        """Archive every deleted asset of ``lokasi_id`` now, whatever its age; returns how many moved.
+
+        Used before deleting the location, which those rows still reference.
+        """
+        ids = dbsession.execute(
+            select(Barang.id).where(Barang.id_lokasi == lokasi_id, Barang.deleted_at.is_not(None)),
+            execution_options={INCLUDE_DELETED: True}
+        ).scalars().all()
+        return ArchiveService._archive(dbsession, ids)
+
+    @staticmethod
+    def _archive(dbsession, ids: list) -> int:
+        if not ids:
+            return 0
+
+        archived_at = datetime.datetime.now()
+        # INSERT ... SELECT tidak disaring otomatis; kondisi deleted_at ditulis sendiri
+        dbsession.execute(insert(BarangArsip).from_select(
+            ARCHIVED_COLUMNS + ['archived_at'],
+            select(*[getattr(Barang, name) for name in ARCHIVED_COLUMNS], literal(archived_at))
+            .where(Barang.id.in_(ids), Barang.deleted_at.is_not(None))
+        ))
+        dbsession.execute(
+            delete(Barang).where(Barang.id.in_(ids)),
+            execution_options={INCLUDE_DELETED: True, 'synchronize_session': False}
+        )
+        return len(ids)
+
+    @staticmethod
+    def count_pending(dbsession, before: datetime.datetime) -> int:
+        """Number of assets deleted before ``before`` still waiting in ``barang``."""
+        return dbsession.execute(
+            select(func.count(Barang.id)).where(Barang.deleted_at < before),
+            execution_options={INCLUDE_DELETED: True}
+        ).scalar_one()
@@ -1,92 +1,582 @@
-from typing import List, Optional
-from ..models.mymodel import Barang, Lokasi, KondisiBarang
+from typing import List, Optional, Tuple
+from sqlalchemy import func, insert, literal, or_, select, tuple_, update
+from ..models.mymodel import (
+    Barang, BarangTombstone, BarangTransfer, ChangeSequence, Lokasi, LokasiClosure, KondisiBarang, User
+)
+from ..models.softdelete import INCLUDE_DELETED
+from .columnar_snapshot import record_snapshot_change, record_snapshot_delete, record_snapshot_reload
+from .dashboard_events import record_barang_delta, record_barang_moved
+from .rollup_service import RollupService, month_start
+from .pagination import order_by_columns, paginate
+from .scan_index import record_scan_invalidation, record_scan_invalidate_all
+from types import SimpleNamespace
 import datetime
 
+# Nama baris di tabel change_sequence untuk feed barang
+CHANGE_FEED = 'barang'
+# Jumlah nilai teratas per facet (kondisi selalu lengkap karena hanya tiga nilai)
+FACET_LIMIT = 100
+
+
+class InvalidFacetError(ValueError):
+    """Raised for a facet name outside ``BarangService.FACETS``."""
+
+
 class BarangService:
     """Service for asset operations."""
 
+    # Kunci sort yang diizinkan; masing-masing didukung indeks (kolom, id)
+    SORT_KEYS = {
+        'kode_barang': (Barang.kode_barang,),
+        'nama_barang': (Barang.nama_barang,),
+        'tanggal_masuk': (Barang.tanggal_masuk,),
+        'kondisi': (Barang.kondisi,),
+        # Urut per lokasi (indeks lokasi nama_lokasi, id), lalu barang per lokasi (indeks id_lokasi, id)
+        'nama_lokasi': (Lokasi.nama_lokasi, Lokasi.id),
+    }
+    # Kolom yang bisa dihitung sebagai facet pada daftar barang
+    FACETS = {
+        'kondisi': Barang.kondisi,
+        'id_lokasi': Barang.id_lokasi,
+        'penanggung_jawab': Barang.penanggung_jawab,
+    }
+
     @staticmethod
-    def get_all_barang(
-        dbsession,
+    def apply_filters(
+        stmt,
         search_term: Optional[str] = None,
         location_id: Optional[int] = None,
         condition: Optional[str] = None,
         penanggung_jawab: Optional[str] = None,
         start_date: Optional[str] = None,
-        end_date: Optional[str] = None
-    ) -> List[Barang]:
-        """Get all assets with various filters."""
-        query = dbsession.query(Barang).join(Lokasi) # Join dengan Lokasi untuk filter/display
-
+        end_date: Optional[str] = None,
+        id_penanggung_jawab: Optional[int] = None
+    ):
+        """Add the asset list filters to a statement selecting from ``barang``."""
         if search_term:
-            query = query.filter(
-                (Barang.nama_barang.ilike(f'%{search_term}%')) |
-                (Barang.kode_barang.ilike(f'%{search_term}%'))
-            )
+            stmt = stmt.where(or_(
+                Barang.nama_barang.ilike(f'%{search_term}%'),
+                Barang.kode_barang.ilike(f'%{search_term}%')
+            ))
         if location_id:
-            query = query.filter(Barang.id_lokasi == location_id)
+            # Termasuk semua sub-lokasi: satu join ke closure table (range pada PK ancestor_id)
+            stmt = stmt.join(LokasiClosure, LokasiClosure.descendant_id == Barang.id_lokasi).where(
+                LokasiClosure.ancestor_id == location_id
+            )
         if condition:
             try:
                 condition_enum = KondisiBarang(condition)
-                query = query.filter(Barang.kondisi == condition_enum)
+                stmt = stmt.where(Barang.kondisi == condition_enum)
             except ValueError:
                 # Handle invalid condition string, e.g., raise an error or log
                 pass
         if penanggung_jawab:
-            query = query.filter(Barang.penanggung_jawab.ilike(f'%{penanggung_jawab}%'))
+            stmt = stmt.where(Barang.penanggung_jawab.ilike(f'%{penanggung_jawab}%'))
+        if id_penanggung_jawab:
+            # Lookup pada indeks (id_penanggung_jawab, id)
+            stmt = stmt.where(Barang.id_penanggung_jawab == id_penanggung_jawab)
 
         if start_date:
             try:
                 start_dt = datetime.datetime.strptime(start_date, '%Y-%m-%d')
-                query = query.filter(Barang.tanggal_masuk >= start_dt)
+                stmt = stmt.where(Barang.tanggal_masuk >= start_dt)
             except ValueError:
                 pass
         if end_date:
             try:
                 end_dt = datetime.datetime.strptime(end_date, '%Y-%m-%d') + datetime.timedelta(days=1)
-                query = query.filter(Barang.tanggal_masuk < end_dt)
+                stmt = stmt.where(Barang.tanggal_masuk < end_dt)
             except ValueError:
                 pass
+        return stmt
 
-        return query.all()
+    @staticmethod
+    def get_all_barang(
+        dbsession,
+        search_term: Optional[str] = None,
+        location_id: Optional[int] = None,
+        condition: Optional[str] = None,
+        penanggung_jawab: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> List[Barang]:
+        """Get all assets with various filters."""
+        # Statement 2.0-style: bentuk yang sama (kombinasi filter yang sama)
+        # memakai ulang hasil kompilasi dari compiled cache SQLAlchemy
+        stmt = select(Barang).join(Lokasi) # Join dengan Lokasi untuk filter/display
+        stmt = BarangService.apply_filters(
+            stmt, search_term, location_id, condition, penanggung_jawab, start_date, end_date
+        )
+        return dbsession.execute(stmt).scalars().all()
+
+    @staticmethod
+    def get_barang_page(
+        dbsession,
+        page: int,
+        limit: int,
+        count: str = 'exact',
+        sort: Optional[str] = None,
+        **filters
+    ) -> Tuple[list, dict]:
+        """One page of the filtered asset list as ``(Barang, nama_lokasi)`` rows, plus pagination.
+
+        Raises ``InvalidSortError`` for a ``sort`` key outside ``SORT_KEYS``.
+        """
+        order_by = order_by_columns(sort, BarangService.SORT_KEYS, Barang.id)
+        stmt = select(Barang, Lokasi.nama_lokasi).join(Lokasi)
+        stmt = BarangService.apply_filters(stmt, **filters).order_by(*order_by)
+        return paginate(dbsession, stmt, page, limit, count, table='barang', filters=filters)
+
+    @staticmethod
+    def get_facets(dbsession, facets: List[str], **filters) -> dict:
+        """Counts per value of each requested facet over the filtered asset list.
+
+        One grouped pass over the filtered rows: ``GROUPING SETS`` on
+        PostgreSQL, elsewhere a single ``GROUP BY`` over all requested columns
+        folded per facet here. Facet columns are NOT NULL, so a NULL in a
+        grouping-sets row marks a column outside that row's set.
+        """
+        unknown = [name for name in facets if name not in BarangService.FACETS]
+        if unknown:
+            raise InvalidFacetError(f"facets harus salah satu dari: {', '.join(BarangService.FACETS)}.")
+        facets = list(dict.fromkeys(facets))
+        columns = [BarangService.FACETS[name] for name in facets]
+        stmt = BarangService.apply_filters(select(*columns, func.count().label('jumlah')), **filters)
+        if len(columns) > 1 and dbsession.get_bind().dialect.name == 'postgresql':
+            stmt = stmt.group_by(func.grouping_sets(*[tuple_(column) for column in columns]))
+        else:
+            stmt = stmt.group_by(*columns)
+
+        counts = {name: {} for name in facets}
+        for row in dbsession.execute(stmt):
+            for name, value in zip(facets, row):
+                if value is not None:
+                    counts[name][value] = counts[name].get(value, 0) + row.jumlah
+
+        result = {}
+        for name, values in counts.items():
+            top = sorted(values.items(), key=lambda item: (-item[1], str(item[0])))[:FACET_LIMIT]
+            result[name] = [
+                {'value': value.value if isinstance(value, KondisiBarang) else value, 'count': jumlah}
+                for value, jumlah in top
+            ]
+        if 'id_lokasi' in result:
+            nama_lokasi = dict(dbsession.execute(
+                select(Lokasi.id, Lokasi.nama_lokasi).where(Lokasi.id.in_([f['value'] for f in result['id_lokasi']]))
+            ).all())
+            for facet in result['id_lokasi']:
+                facet['label'] = nama_lokasi.get(facet['value'], '')
+        return result
+
+    @staticmethod
+    def get_label_rows(dbsession, location_id: int, limit: int) -> list:
+        """``(id, kode_barang, nama_barang, nama_lokasi)`` of assets under a location, for label sheets."""
+        stmt = (
+            select(Barang.id, Barang.kode_barang, Barang.nama_barang, Lokasi.nama_lokasi)
+            .join(Lokasi, Lokasi.id == Barang.id_lokasi)
+            .join(LokasiClosure, LokasiClosure.descendant_id == Barang.id_lokasi)
+            .where(LokasiClosure.ancestor_id == location_id)
+            .order_by(Lokasi.nama_lokasi, Barang.kode_barang)
+            .limit(limit)
+        )
+        return [tuple(row) for row in dbsession.execute(stmt)]
 
     @staticmethod
     def get_barang_by_id(dbsession, barang_id: int) -> Optional[Barang]:
         """Get asset by ID."""
-        return dbsession.query(Barang).get(barang_id) # Menggunakan .get() untuk PK
+        return dbsession.get(Barang, barang_id) # Identity map dulu, lalu load PK yang sudah di-cache
+
+    @staticmethod
+    def get_barang_by_kode(dbsession, kode_barang: str, include_deleted: bool = False) -> Optional[Barang]:
+        """Get asset by code; ``include_deleted`` also finds deleted, not yet archived assets."""
+        stmt = select(Barang).where(Barang.kode_barang == kode_barang).limit(1)
+        return dbsession.execute(stmt, execution_options={INCLUDE_DELETED: include_deleted}).scalars().first()
+
+    @staticmethod
+    def next_change_seq(dbsession, count: int = 1) -> int:
+        """Reserve ``count`` consecutive change sequence numbers and return the first.
+
+        The counter row stays locked until the transaction ends, so sequence
+        numbers become visible to readers in the order they were handed out.
+        """
+        result = dbsession.execute(
+            update(ChangeSequence)
+            .where(ChangeSequence.name == CHANGE_FEED)
+            .values(value=ChangeSequence.value + count)
+        )
+        if result.rowcount == 0:
+            # Database belum punya baris penghitung: mulai setelah urutan yang ada
+            last = BarangService._max_change_seq(dbsession)
+            dbsession.add(ChangeSequence(name=CHANGE_FEED, value=last + count))
+            dbsession.flush()
+            return last + 1
+        last = dbsession.execute(
+            select(ChangeSequence.value).where(ChangeSequence.name == CHANGE_FEED)
+        ).scalar_one()
+        return last - count + 1
+
+    @staticmethod
+    def _max_change_seq(dbsession) -> int:
+        return max(
+            dbsession.execute(select(func.max(Barang.change_seq))).scalar() or 0,
+            dbsession.execute(select(func.max(BarangTombstone.change_seq))).scalar() or 0,
+            dbsession.execute(
+                select(ChangeSequence.value).where(ChangeSequence.name == CHANGE_FEED)
+            ).scalar() or 0,
+        )
+
+    @staticmethod
+    def backfill_change_seq(dbsession) -> None:
+        """Give rows loaded outside the service (bulk seeding) a change sequence.
+
+        Works with a ``Session`` or a ``Connection``.
+        """
+        start = BarangService._max_change_seq(dbsession)
+        # Bukan perubahan data: jangan sampai onupdate mengisi tanggal_pembaruan/updated_at
+        dbsession.execute(
+            update(Barang).where(Barang.change_seq.is_(None)).values(
+                change_seq=Barang.id + start,
+                tanggal_pembaruan=Barang.tanggal_pembaruan,
+                updated_at=Barang.updated_at,
+            )
+        )
+        last = BarangService._max_change_seq(dbsession)
+        result = dbsession.execute(
+            update(ChangeSequence).where(ChangeSequence.name == CHANGE_FEED).values(value=last)
+        )
+        if result.rowcount == 0:
+            dbsession.execute(ChangeSequence.__table__.insert().values(name=CHANGE_FEED, value=last))
+
+    @staticmethod
+    def get_changes_since(dbsession, since: int, limit: int = 500) -> Tuple[list, bool]:
+        """Get assets changed and deleted after ``since``, in change order.
+
+        Returns ``(changes, has_more)`` where ``changes`` is a list of
+        ``(change_seq, Barang or BarangTombstone)`` tuples. Both sides are read
+        with an index range scan on ``change_seq``.
+        """
+        rows = dbsession.execute(
+            select(Barang).where(Barang.change_seq > since)
+            .order_by(Barang.change_seq).limit(limit + 1)
+        ).scalars().all()
+        tombstones = dbsession.execute(
+            select(BarangTombstone).where(BarangTombstone.change_seq > since)
+            .order_by(BarangTombstone.change_seq).limit(limit + 1)
+        ).scalars().all()
+
+        changes = sorted(
+            [(b.change_seq, b) for b in rows] + [(t.change_seq, t) for t in tombstones],
+            key=lambda change: change[0]
+        )
+        return changes[:limit], len(changes) > limit
+
+    @staticmethod
+    def _nama_lokasi(dbsession, lokasi_id: int) -> str:
+        # Biasanya sudah ada di identity map karena view memvalidasi lokasi lebih dulu
+        lokasi = dbsession.get(Lokasi, lokasi_id)
+        return lokasi.nama_lokasi if lokasi else ''
+
+    @staticmethod
+    def _record_snapshot(dbsession, barang: Barang) -> None:
+        record_snapshot_change(
+            dbsession, barang.id,
+            id_lokasi=barang.id_lokasi, kondisi=barang.kondisi,
+            penanggung_jawab=barang.penanggung_jawab, tanggal_masuk=barang.tanggal_masuk,
+        )
 
     @staticmethod
-    def get_barang_by_kode(dbsession, kode_barang: str) -> Optional[Barang]:
-        """Get asset by code."""
-        return dbsession.query(Barang).filter(Barang.kode_barang == kode_barang).first()
+    def _resolve_penanggung_jawab(dbsession, data: dict) -> None:
+        """Keep ``id_penanggung_jawab`` and the ``penanggung_jawab`` username in ``data`` in step.
+
+        A given user id wins and supplies the name; otherwise a given name is
+        looked up as a username (no match leaves the id ``NULL``).
+        """
+        if data.get('id_penanggung_jawab') is not None:
+            data['penanggung_jawab'] = dbsession.get(User, data['id_penanggung_jawab']).username
+        elif 'penanggung_jawab' in data:
+            data['id_penanggung_jawab'] = dbsession.execute(
+                select(User.id).where(User.username == data['penanggung_jawab'])
+            ).scalar()
 
     @staticmethod
     def create_barang(dbsession, barang_data: dict) -> Barang:
         """Create a new asset."""
         # Konversi string kondisi ke Enum
         barang_data['kondisi'] = KondisiBarang(barang_data['kondisi'])
+        BarangService._resolve_penanggung_jawab(dbsession, barang_data)
+        barang_data['change_seq'] = BarangService.next_change_seq(dbsession)
         new_barang = Barang(**barang_data)
         dbsession.add(new_barang)
         dbsession.flush()
+        RollupService.apply_delta(dbsession, [], RollupService.rollup_keys(new_barang))
+        BarangService._record_snapshot(dbsession, new_barang)
+        record_barang_delta(
+            dbsession, new_barang.kondisi, BarangService._nama_lokasi(dbsession, new_barang.id_lokasi), 1
+        )
         return new_barang
 
     @staticmethod
     def update_barang(dbsession, barang: Barang, update_data: dict) -> Barang:
         """Update existing asset."""
+        old_kondisi, old_lokasi_id = barang.kondisi, barang.id_lokasi
+        old_rollup_keys = RollupService.rollup_keys(barang)
+        old_kode = barang.kode_barang
         if 'kondisi' in update_data:
             barang.kondisi = KondisiBarang(update_data['kondisi'])
             del update_data['kondisi'] # Hapus dari update_data agar tidak diulang setattr
+        BarangService._resolve_penanggung_jawab(dbsession, update_data)
 
         for field, value in update_data.items():
             setattr(barang, field, value)
+        barang.change_seq = BarangService.next_change_seq(dbsession)
         
         # Update tanggal_pembaruan secara otomatis di model
         dbsession.add(barang)
         dbsession.flush()
+        RollupService.apply_delta(dbsession, old_rollup_keys, RollupService.rollup_keys(barang))
+        record_scan_invalidation(dbsession, old_kode, barang.kode_barang)
+        BarangService._record_snapshot(dbsession, barang)
+        if (barang.kondisi, barang.id_lokasi) != (old_kondisi, old_lokasi_id):
+            record_barang_moved(
+                dbsession,
+                old_kondisi, BarangService._nama_lokasi(dbsession, old_lokasi_id),
+                barang.kondisi, BarangService._nama_lokasi(dbsession, barang.id_lokasi)
+            )
         return barang
 
+    @staticmethod
+    def bulk_update_barang(dbsession, changes: List[dict]) -> int:
+        """Apply ``{'id': ..., 'id_lokasi'/'kondisi': ...}`` changes to many assets at once.
+
+        The current state is read with one query and written back with one
+        executemany UPDATE by primary key. Change sequence numbers, rollups,
+        dashboard deltas and the scan index are kept in step as for
+        ``update_barang``.
+        """
+        if not changes:
+            return 0
+        by_id = {change['id']: change for change in changes}
+        current = dbsession.execute(
+            select(
+                Barang.id, Barang.kode_barang, Barang.kondisi, Barang.id_lokasi,
+                Barang.tanggal_masuk, Barang.tanggal_pembaruan,
+            ).where(Barang.id.in_(by_id))
+        ).all()
+        if not current:
+            return 0
+
+        now = datetime.datetime.now()
+        first_seq = BarangService.next_change_seq(dbsession, len(current))
+        params = []
+        old_keys, new_keys = [], []
+        moves = []
+        for offset, row in enumerate(current):
+            change = by_id[row.id]
+            new_state = SimpleNamespace(
+                id_lokasi=change.get('id_lokasi', row.id_lokasi),
+                kondisi=change.get('kondisi', row.kondisi),
+                tanggal_masuk=row.tanggal_masuk,
+                tanggal_pembaruan=now,
+            )
+            params.append({
+                'id': row.id,
+                'id_lokasi': new_state.id_lokasi,
+                'kondisi': new_state.kondisi,
+                'change_seq': first_seq + offset,
+                'tanggal_pembaruan': now,
+                'updated_at': datetime.datetime.utcnow(),
+            })
+            old_keys.extend(RollupService.rollup_keys(row))
+            new_keys.extend(RollupService.rollup_keys(new_state))
+            moves.append((row.kondisi, row.id_lokasi, new_state.kondisi, new_state.id_lokasi))
+            record_snapshot_change(dbsession, row.id, id_lokasi=new_state.id_lokasi, kondisi=new_state.kondisi)
+
+        dbsession.execute(update(Barang), params)
+        RollupService.apply_delta(dbsession, old_keys, new_keys)
+        record_scan_invalidation(dbsession, *(row.kode_barang for row in current))
+
+        lokasi_ids = {m[1] for m in moves} | {m[3] for m in moves}
+        nama_lokasi = dict(dbsession.execute(
+            select(Lokasi.id, Lokasi.nama_lokasi).where(Lokasi.id.in_(lokasi_ids))
+        ).all())
+        for old_kondisi, old_lokasi_id, new_kondisi, new_lokasi_id in moves:
+            if (old_kondisi, old_lokasi_id) != (new_kondisi, new_lokasi_id):
+                record_barang_moved(
+                    dbsession,
+                    old_kondisi, nama_lokasi.get(old_lokasi_id, ''),
+                    new_kondisi, nama_lokasi.get(new_lokasi_id, '')
+                )
+        return len(current)
+
+    @staticmethod
+    def transfer_barang(
+        dbsession,
+        destination_id: int,
+        ids: Optional[List[int]] = None,
+        filters: Optional[dict] = None,
+        petugas: Optional[str] = None,
+        catatan: Optional[str] = None
+    ) -> int:
+        """Move the assets selected by ``ids`` or ``filters`` to ``destination_id``.
+
+        Set-based from start to end: one grouped read for the aggregates, one
+        INSERT ... SELECT for the transfer history and one UPDATE ... FROM that
+        moves every asset and hands out consecutive change sequence numbers.
+        Rollups and dashboard deltas are adjusted per (month, location,
+        condition) group rather than per asset. Returns the number moved.
+        """
+        if ids is not None:
+            selected = Barang.id.in_(ids)
+        else:
+            # correlate(None): subquery tetap membaca barang sendiri, tidak dikorelasikan ke query luar
+            selected = Barang.id.in_(
+                BarangService.apply_filters(select(Barang.id), **(filters or {})).correlate(None)
+            )
+        # Ditulis eksplisit karena INSERT ... SELECT riwayat di bawah tidak melewati filter soft delete
+        criteria = selected & (Barang.id_lokasi != destination_id) & Barang.deleted_at.is_(None)
+
+        old_counts = RollupService.counts_for(dbsession, criteria)
+        # tanggal_masuk selalu terisi: kelompoknya mencakup setiap barang yang dipindah
+        groups = {}
+        for (field, bulan, id_lokasi, kondisi), count in old_counts.items():
+            if field == 'tanggal_masuk':
+                groups[(id_lokasi, kondisi)] = groups.get((id_lokasi, kondisi), 0) + count
+        total = sum(groups.values())
+        if not total:
+            return 0
+
+        now = datetime.datetime.now()
+        first_seq = BarangService.next_change_seq(dbsession, total)
+        dbsession.execute(insert(BarangTransfer).from_select(
+            ['id_barang', 'kode_barang', 'id_lokasi_asal', 'id_lokasi_tujuan', 'petugas', 'catatan',
+             'created_at', 'updated_at'],
+            select(Barang.id, Barang.kode_barang, Barang.id_lokasi, literal(destination_id),
+                   literal(petugas), literal(catatan), literal(now), literal(now)).where(criteria)
+        ))
+        ranked = (
+            select(Barang.id, func.row_number().over(order_by=Barang.id).label('rn'))
+            .where(criteria)
+            .subquery()
+        )
+        dbsession.execute(
+            update(Barang)
+            .where(Barang.id == ranked.c.id)
+            .values(
+                id_lokasi=destination_id,
+                change_seq=first_seq - 1 + ranked.c.rn,
+                tanggal_pembaruan=now,
+                updated_at=datetime.datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Objek Barang yang sudah dimuat di sesi ini tidak lagi sesuai isi database
+        dbsession.expire_all()
+
+        changes = {}
+        for (field, bulan, id_lokasi, kondisi), count in old_counts.items():
+            changes[(field, bulan, id_lokasi, kondisi)] = changes.get((field, bulan, id_lokasi, kondisi), 0) - count
+            if field == 'tanggal_masuk':
+                key = (field, bulan, destination_id, kondisi)
+                changes[key] = changes.get(key, 0) + count
+        for (id_lokasi, kondisi), count in groups.items():
+            key = ('tanggal_pembaruan', month_start(now), destination_id, kondisi)
+            changes[key] = changes.get(key, 0) + count
+        RollupService.apply_counts(dbsession, changes)
+
+        nama_lokasi = dict(dbsession.execute(
+            select(Lokasi.id, Lokasi.nama_lokasi).where(Lokasi.id.in_({g[0] for g in groups} | {destination_id}))
+        ).all())
+        for (id_lokasi, kondisi), count in groups.items():
+            record_barang_moved(
+                dbsession, kondisi, nama_lokasi.get(id_lokasi, ''),
+                kondisi, nama_lokasi.get(destination_id, ''), count
+            )
+        record_scan_invalidate_all(dbsession)
+        # Barang yang dipindah tidak diketahui satu per satu di sini
+        record_snapshot_reload(dbsession)
+        return total
+
+    @staticmethod
+    def rename_penanggung_jawab(dbsession, user_id: int, username: str) -> int:
+        """Write a renamed user's new ``username`` into every asset they are responsible for.
+
+        One UPDATE over the ``id_penanggung_jawab`` index; each asset gets a
+        new change sequence number so delta-sync clients pick up the name.
+        ``tanggal_pembaruan`` is left alone: the asset itself did not change.
+        Returns the number of assets rewritten.
+        """
+        return BarangService._rewrite_penanggung_jawab(dbsession, user_id, {'penanggung_jawab': username})
+
+    @staticmethod
+    def unlink_penanggung_jawab(dbsession, user_id: int) -> int:
+        """Detach every asset from a user about to be deleted; the ``penanggung_jawab`` name stays as text.
+
+        Deleted assets not yet archived are detached too, so the foreign key
+        never blocks the user delete. Returns the number of live assets detached.
+        """
+        total = BarangService._rewrite_penanggung_jawab(dbsession, user_id, {'id_penanggung_jawab': None})
+        dbsession.execute(
+            update(Barang)
+            .where(Barang.id_penanggung_jawab == user_id)
+            .values(id_penanggung_jawab=None)
+            .execution_options(synchronize_session=False),
+            execution_options={INCLUDE_DELETED: True},
+        )
+        return total
+
+    @staticmethod
+    def _rewrite_penanggung_jawab(dbsession, user_id: int, values: dict) -> int:
+        criteria = Barang.id_penanggung_jawab == user_id
+        total = dbsession.execute(select(func.count()).select_from(Barang).where(criteria)).scalar()
+        if not total:
+            return 0
+        first_seq = BarangService.next_change_seq(dbsession, total)
+        ranked = (
+            select(Barang.id, func.row_number().over(order_by=Barang.id).label('rn'))
+            .where(criteria)
+            .subquery()
+        )
+        dbsession.execute(
+            update(Barang)
+            .where(Barang.id == ranked.c.id)
+            .values(
+                **values,
+                change_seq=first_seq - 1 + ranked.c.rn,
+                tanggal_pembaruan=Barang.tanggal_pembaruan,
+                updated_at=datetime.datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        dbsession.expire_all()
+        record_snapshot_reload(dbsession)
+        return total
+
+    @staticmethod
+    def get_transfers(dbsession, barang_id: int) -> List[BarangTransfer]:
+        return dbsession.execute(
+            select(BarangTransfer)
+            .where(BarangTransfer.id_barang == barang_id)
+            .order_by(BarangTransfer.id.desc())
+        ).scalars().all()
+
     @staticmethod
     def delete_barang(dbsession, barang: Barang) -> None:
-        """Delete an asset."""
-        dbsession.delete(barang)
+        """Soft-delete an asset, leaving a tombstone for delta-sync clients.
+
+        The row stays in ``barang`` with ``deleted_at`` set (hidden from every
+        ORM query, see ``models.softdelete``) until ``ArchiveService`` moves it
+        to ``barang_arsip``. Its code stays reserved until then.
+        """
+        dbsession.add(BarangTombstone(
+            id_barang=barang.id,
+            kode_barang=barang.kode_barang,
+            change_seq=BarangService.next_change_seq(dbsession)
+        ))
+        RollupService.apply_delta(dbsession, RollupService.rollup_keys(barang), [])
+        record_scan_invalidation(dbsession, barang.kode_barang)
+        record_snapshot_delete(dbsession, barang.id)
+        record_barang_delta(
+            dbsession, barang.kondisi, BarangService._nama_lokasi(dbsession, barang.id_lokasi), -1
+        )
+        barang.deleted_at = datetime.datetime.now()
         dbsession.flush()
\ No newline at end of file
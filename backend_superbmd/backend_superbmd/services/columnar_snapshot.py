@@ -0,0 +1,332 @@
+"""Process-local columnar snapshot of the asset columns used by reports.
+
+Keeps ``id_lokasi``, ``kondisi``, ``penanggung_jawab`` and ``tanggal_masuk``
+of every asset in NumPy arrays, with ``kondisi`` and ``penanggung_jawab``
+dictionary-encoded to small integers. Filtered, grouped counts then run as
+vectorized passes over those arrays instead of a grouped SQL query.
+
+``BarangService`` records the values each write leaves behind in
+``dbsession.info``; once the session commits they are patched into the
+arrays, a rollback discards them. Set-based writes (bulk transfers) mark the
+snapshot stale instead. While stale, not yet loaded, or older than
+``superbmd.columnar_snapshot_max_age`` seconds (which bounds how long writes
+made by other worker processes go unseen), ``group_count()`` returns
+``None`` so callers run their SQL, and a reload starts in the background.
+
+The snapshot is optional: it needs NumPy (``pip install
+backend_superbmd[analytics]``) and ``superbmd.columnar_snapshot = true``.
+
+Activate with ``config.include('backend_superbmd.services.columnar_snapshot')``.
+"""
+import datetime
+import logging
+import threading
+import time
+
+from pyramid.settings import asbool
+from sqlalchemy import event, select
+
+from ..models.mymodel import Barang, KondisiBarang
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - tergantung lingkungan
+    numpy = None
+
+log = logging.getLogger(__name__)
+
+PENDING_KEY = 'columnar_snapshot_changes'
+# Penanda "muat ulang seluruh snapshot", mis. setelah pemindahan massal
+RELOAD = 'reload'
+
+DIMENSIONS = ('id_lokasi', 'kondisi', 'penanggung_jawab', 'bulan_masuk', 'tahun_masuk')
+_KONDISI = list(KondisiBarang)
+_KONDISI_CODE = {kondisi: code for code, kondisi in enumerate(_KONDISI)}
+
+
+class ColumnarSnapshot:
+    """Growable NumPy column arrays of the asset table, patched on commit."""
+
+    def __init__(self, enabled=False, max_age=300.0):
+        self.enabled = enabled
+        self.max_age = max_age
+        self.session_factory = None
+        self._lock = threading.Lock()
+        self._stale = True
+        self._loaded_at = 0.0
+        self._reloading = False
+        self._replay = None
+        self._size = 0
+        self._positions = {}
+        self._columns = {}
+        self._penanggung_jawab = []
+        self._penanggung_jawab_code = {}
+        self.hits = 0
+        self.fallbacks = 0
+
+    @property
+    def available(self):
+        return self.enabled and numpy is not None
+
+    # --- Memuat ---
+
+    def load(self, dbsession):
+        """Read the columns of every asset in one query and swap them in."""
+        with self._lock:
+            self._replay = []
+        try:
+            rows = dbsession.execute(select(
+                Barang.id, Barang.id_lokasi, Barang.kondisi, Barang.penanggung_jawab, Barang.tanggal_masuk,
+            )).all()
+            columns, positions, names, codes = self._build(rows)
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        with self._lock:
+            self._columns = columns
+            self._positions = positions
+            self._size = len(rows)
+            self._penanggung_jawab = names
+            self._penanggung_jawab_code = codes
+            self._loaded_at = time.monotonic()
+            replay, self._replay = self._replay, None
+            self._stale = False
+            # Perubahan yang di-commit selama query berjalan
+            for change in replay:
+                self._apply(change)
+
+    @staticmethod
+    def _build(rows):
+        names, codes = [], {}
+        size = len(rows)
+        capacity = max(size, 16)
+        columns = {
+            'id': numpy.zeros(capacity, dtype=numpy.int64),
+            'alive': numpy.zeros(capacity, dtype=bool),
+            'id_lokasi': numpy.zeros(capacity, dtype=numpy.int64),
+            'kondisi': numpy.zeros(capacity, dtype=numpy.int8),
+            'penanggung_jawab': numpy.zeros(capacity, dtype=numpy.int32),
+            'tanggal_masuk': numpy.zeros(capacity, dtype='datetime64[D]'),
+        }
+        if size:
+            ids, id_lokasi, kondisi, penanggung_jawab, tanggal_masuk = zip(*rows)
+            columns['id'][:size] = ids
+            columns['alive'][:size] = True
+            columns['id_lokasi'][:size] = id_lokasi
+            columns['kondisi'][:size] = [_KONDISI_CODE[k] for k in kondisi]
+            columns['penanggung_jawab'][:size] = [
+                codes.setdefault(name, len(codes)) for name in penanggung_jawab
+            ]
+            columns['tanggal_masuk'][:size] = numpy.array(tanggal_masuk, dtype='datetime64[D]')
+            names = list(codes)
+        positions = {barang_id: position for position, barang_id in enumerate(columns['id'][:size].tolist())}
+        return columns, positions, names, codes
+
+    def _schedule_reload(self):
+        with self._lock:
+            if self._reloading or self.session_factory is None:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload, name='columnar-snapshot-reload', daemon=True).start()
+
+    def _reload(self):
+        dbsession = self.session_factory()
+        try:
+            started = time.perf_counter()
+            self.load(dbsession)
+            log.info(f"Columnar snapshot loaded {self._size} assets in {time.perf_counter() - started:.2f}s.")
+        except Exception as e:
+            log.error(f"Columnar snapshot reload failed: {e}")
+        finally:
+            dbsession.close()
+            with self._lock:
+                self._reloading = False
+
+    # --- Perubahan dari commit ---
+
+    def apply(self, changes):
+        with self._lock:
+            for change in changes:
+                if self._replay is not None:
+                    self._replay.append(change)
+                if not self._stale:
+                    self._apply(change)
+
+    def _apply(self, change):
+        if change == RELOAD:
+            self._stale = True
+            return
+        barang_id, values = change
+        position = self._positions.get(barang_id)
+        if values is None:
+            if position is not None:
+                self._columns['alive'][position] = False
+                del self._positions[barang_id]
+            return
+        if position is None:
+            if set(values) != {'id_lokasi', 'kondisi', 'penanggung_jawab', 'tanggal_masuk'}:
+                # Barang tidak dikenal dan nilainya tidak lengkap
+                self._stale = True
+                return
+            position = self._append(barang_id)
+        columns = self._columns
+        for name, value in values.items():
+            if name == 'kondisi':
+                value = _KONDISI_CODE[value]
+            elif name == 'penanggung_jawab':
+                value = self._encode(value)
+            elif name == 'tanggal_masuk':
+                value = numpy.datetime64(value, 'D')
+            columns[name][position] = value
+
+    def _append(self, barang_id):
+        if self._size == len(self._columns['id']):
+            for name, column in self._columns.items():
+                grown = numpy.zeros(len(column) * 2, dtype=column.dtype)
+                grown[:self._size] = column[:self._size]
+                self._columns[name] = grown
+        position = self._size
+        self._size += 1
+        self._columns['id'][position] = barang_id
+        self._columns['alive'][position] = True
+        self._positions[barang_id] = position
+        return position
+
+    def _encode(self, name):
+        code = self._penanggung_jawab_code.get(name)
+        if code is None:
+            code = self._penanggung_jawab_code[name] = len(self._penanggung_jawab)
+            self._penanggung_jawab.append(name)
+        return code
+
+    # --- Agregasi ---
+
+    def group_count(self, dimensions, kondisi=None, lokasi_ids=None, start=None, end=None):
+        """Count assets per combination of ``dimensions`` values, or ``None`` to fall back to SQL.
+
+        Returns ``{(value, ...): count}`` with the same Python values the SQL
+        path yields. ``lokasi_ids`` restricts to those locations, ``start``
+        (inclusive) and ``end`` (exclusive) to a ``tanggal_masuk`` range.
+        """
+        if not self.available:
+            return None
+        with self._lock:
+            if self._stale or time.monotonic() - self._loaded_at > self.max_age:
+                self.fallbacks += 1
+                fresh = False
+            else:
+                self.hits += 1
+                fresh = True
+                size = self._size
+                columns = {name: column[:size] for name, column in self._columns.items()}
+                mask = columns['alive'].copy()
+                if kondisi is not None:
+                    mask &= columns['kondisi'] == _KONDISI_CODE[kondisi]
+                if lokasi_ids is not None:
+                    mask &= numpy.isin(columns['id_lokasi'], numpy.fromiter(lokasi_ids, dtype=numpy.int64))
+                if start is not None:
+                    mask &= columns['tanggal_masuk'] >= numpy.datetime64(start, 'D')
+                if end is not None:
+                    mask &= columns['tanggal_masuk'] < numpy.datetime64(end, 'D')
+                codes = [self._codes(columns, name)[mask] for name in dimensions]
+                names = list(self._penanggung_jawab)
+        if not fresh:
+            self._schedule_reload()
+            return None
+
+        if not dimensions:
+            return {(): int(mask.sum())}
+        if not len(codes[0]):
+            return {}
+        # Gabungkan kode semua dimensi menjadi satu kunci int64 (mixed radix)
+        # agar cukup satu numpy.unique satu dimensi
+        combined = numpy.zeros(len(codes[0]), dtype=numpy.int64)
+        radices = []
+        for column in codes:
+            low, high = int(column.min()), int(column.max())
+            combined *= high - low + 1
+            combined += column - low
+            radices.append((low, high - low + 1))
+        keys, counts = numpy.unique(combined, return_counts=True)
+        result = {}
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            values = []
+            for low, span in reversed(radices):
+                key, code = divmod(key, span)
+                values.append(code + low)
+            result[tuple(
+                _decode(name, code, names) for name, code in zip(dimensions, reversed(values))
+            )] = count
+        return result
+
+    @staticmethod
+    def _codes(columns, name):
+        if name == 'bulan_masuk':
+            return columns['tanggal_masuk'].astype('datetime64[M]').astype(numpy.int64)
+        if name == 'tahun_masuk':
+            return columns['tanggal_masuk'].astype('datetime64[Y]').astype(numpy.int64)
+        return columns[name].astype(numpy.int64)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'enabled': self.available,
+                'stale': self._stale,
+                'assets': len(self._positions),
+                'hits': self.hits,
+                'fallbacks': self.fallbacks,
+            }
+
+
+def _decode(name, code, names):
+    if name == 'kondisi':
+        return _KONDISI[code]
+    if name == 'penanggung_jawab':
+        return names[code]
+    if name == 'bulan_masuk':
+        return datetime.date(1970 + code // 12, code % 12 + 1, 1)
+    if name == 'tahun_masuk':
+        return 1970 + code
+    return code
+
+
+# Satu snapshot bersama per proses
+columnar_snapshot = ColumnarSnapshot()
+
+
+def record_snapshot_change(dbsession, barang_id, **values):
+    """Patch ``values`` of ``barang_id`` into the snapshot once ``dbsession`` commits."""
+    dbsession.info.setdefault(PENDING_KEY, []).append((barang_id, values))
+
+
+def record_snapshot_delete(dbsession, barang_id):
+    dbsession.info.setdefault(PENDING_KEY, []).append((barang_id, None))
+
+
+def record_snapshot_reload(dbsession):
+    dbsession.info.setdefault(PENDING_KEY, []).append(RELOAD)
+
+
+def install_snapshot_updates(session_factory, snapshot):
+    def after_commit(session):
+        changes = session.info.pop(PENDING_KEY, None)
+        if changes and snapshot.available:
+            snapshot.apply(changes)
+
+    def after_rollback(session):
+        session.info.pop(PENDING_KEY, None)
+
+    event.listen(session_factory, 'after_commit', after_commit)
+    event.listen(session_factory, 'after_rollback', after_rollback)
+
+
+def includeme(config):
+    settings = config.get_settings()
+    columnar_snapshot.enabled = asbool(settings.get('superbmd.columnar_snapshot', False))
+    columnar_snapshot.max_age = float(settings.get('superbmd.columnar_snapshot_max_age', columnar_snapshot.max_age))
+    if columnar_snapshot.enabled and numpy is None:
+        log.warning("superbmd.columnar_snapshot is on but NumPy is not installed; reports use SQL.")
+    columnar_snapshot.session_factory = config.registry['dbsession_factory']
+    config.registry['columnar_snapshot'] = columnar_snapshot
+    install_snapshot_updates(config.registry['dbsession_factory'], columnar_snapshot)
@@ -0,0 +1,252 @@
+"""In-process publisher for live dashboard deltas (Server-Sent Events).
+
+``BarangService`` and ``LokasiService`` record how each write changes the
+dashboard counters in ``dbsession.info``. When the session commits, the
+accumulated delta is published once to every subscribed stream; on rollback
+it is discarded. Subscribers get a bounded queue each, so a slow client can
+never block writers: when its queue overflows it is told to resync instead.
+
+Deltas only reach streams of the process that committed the write. When
+several worker processes serve the app (``serve_backend_superbmd --workers``),
+``shared`` is set: every commit with a visible delta also bumps the
+``dashboard`` row of ``change_sequence``, and each worker polls that row every
+``superbmd.sse_sync_interval`` seconds. A bump it did not commit itself means
+another process wrote, so its streams get ``resync`` and reload the snapshot.
+
+Activate with ``config.include('backend_superbmd.services.dashboard_events')``.
+"""
+import logging
+import queue
+import threading
+
+from sqlalchemy import event, select, update
+
+from ..models.mymodel import ChangeSequence
+
+log = logging.getLogger(__name__)
+
+PENDING_KEY = 'dashboard_delta'
+# Baris change_sequence yang dinaikkan setiap commit yang mengubah dashboard
+SEQUENCE_NAME = 'dashboard'
+
+
+class DashboardPublisher:
+    """Fan-out of dashboard events to bounded per-client queues."""
+
+    def __init__(self, queue_size=100, sync_interval=2.0):
+        self.queue_size = queue_size
+        self.sync_interval = sync_interval
+        # True bila beberapa proses worker melayani aplikasi yang sama
+        self.shared = False
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._seen = None
+        self._local = 0
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event_name, data):
+        # Kunci dipegang selama fan-out: put/drain tidak pernah memblok, dan publish
+        # bersamaan tidak boleh mengisi antrean di antara drain dan put resync
+        with self._lock:
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait((event_name, data))
+                except queue.Full:
+                    # Klien terlalu lambat: buang antrean, minta ambil snapshot ulang
+                    _drain(subscriber)
+                    subscriber.put_nowait(('resync', {}))
+
+    def committed_locally(self):
+        """Count a commit of this process that bumped the shared sequence."""
+        with self._lock:
+            self._local += 1
+
+    def sync(self, sequence):
+        """Compare the shared ``sequence`` with local commits; resync subscribers if another process wrote.
+
+        Returns True when a resync was published.
+        """
+        with self._lock:
+            if self._seen is None:
+                self._seen, self._local = sequence, 0
+                return False
+            expected = self._seen + self._local
+            # Commit lokal yang belum terlihat saat sequence dibaca dihitung di putaran berikutnya
+            self._seen, self._local = sequence, max(expected - sequence, 0)
+        if sequence <= expected:
+            return False
+        self.publish('resync', {})
+        return True
+
+    def watch(self, session_factory):
+        """Poll the shared sequence every ``sync_interval`` seconds in a daemon thread."""
+        self._stop.clear()
+        with self._lock:
+            self._seen, self._local = None, 0
+
+        def run():
+            while True:
+                try:
+                    with session_factory() as session:
+                        self.sync(read_sequence(session))
+                except Exception:
+                    log.exception("Reading the dashboard sequence failed.")
+                if self._stop.wait(self.sync_interval):
+                    return
+
+        self._watcher = threading.Thread(target=run, name='dashboard-sync', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self, timeout=None):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+            self._watcher = None
+
+
+def read_sequence(dbsession):
+    """Current value of the shared dashboard sequence (0 before the first write)."""
+    return dbsession.execute(
+        select(ChangeSequence.value).where(ChangeSequence.name == SEQUENCE_NAME)
+    ).scalar() or 0
+
+
+def bump_sequence(dbsession):
+    """Advance the shared dashboard sequence inside the current transaction."""
+    result = dbsession.execute(
+        update(ChangeSequence)
+        .where(ChangeSequence.name == SEQUENCE_NAME)
+        .values(value=ChangeSequence.value + 1)
+    )
+    if result.rowcount == 0:
+        # Barisnya dibuat oleh migrasi; ini hanya untuk database dari create_all
+        dbsession.add(ChangeSequence(name=SEQUENCE_NAME, value=1))
+
+
+def _drain(subscriber):
+    try:
+        while True:
+            subscriber.get_nowait()
+    except queue.Empty:
+        pass
+
+
+# Satu publisher bersama per proses
+dashboard_publisher = DashboardPublisher()
+
+
+# --- Pencatatan delta per sesi ---
+
+def _pending(dbsession):
+    delta = dbsession.info.get(PENDING_KEY)
+    if delta is None:
+        delta = dbsession.info[PENDING_KEY] = {
+            'total_assets': 0,
+            'total_locations': 0,
+            'assets_by_condition': {},
+            'assets_by_location': {},
+            'renamed_locations': [],
+        }
+    return delta
+
+
+def _bump(counts, key, amount):
+    counts[key] = counts.get(key, 0) + amount
+
+
+def record_barang_delta(dbsession, kondisi, nama_lokasi, sign):
+    """Record one asset appearing (``sign=1``) or disappearing (``sign=-1``)."""
+    delta = _pending(dbsession)
+    delta['total_assets'] += sign
+    _bump(delta['assets_by_condition'], kondisi.value, sign)
+    _bump(delta['assets_by_location'], nama_lokasi, sign)
+
+
+def record_barang_moved(dbsession, old_kondisi, old_lokasi, new_kondisi, new_lokasi, count=1):
+    """Record ``count`` assets changing condition and/or location."""
+    delta = _pending(dbsession)
+    _bump(delta['assets_by_condition'], old_kondisi.value, -count)
+    _bump(delta['assets_by_condition'], new_kondisi.value, count)
+    _bump(delta['assets_by_location'], old_lokasi, -count)
+    _bump(delta['assets_by_location'], new_lokasi, count)
+
+
+def record_lokasi_delta(dbsession, nama_lokasi, sign):
+    """Record a location being created (``sign=1``) or deleted (``sign=-1``)."""
+    delta = _pending(dbsession)
+    delta['total_locations'] += sign
+    _bump(delta['assets_by_location'], nama_lokasi, 0)
+
+
+def record_lokasi_renamed(dbsession, old_name, new_name):
+    if old_name != new_name:
+        _pending(dbsession)['renamed_locations'].append({'old': old_name, 'new': new_name})
+
+
+def _compact(delta):
+    """Drop zero entries; return ``None`` when nothing visible changed."""
+    compact = {
+        'total_assets': delta['total_assets'],
+        'total_locations': delta['total_locations'],
+        'assets_by_condition': {k: v for k, v in delta['assets_by_condition'].items() if v},
+        # Lokasi baru tetap dikirim walau jumlahnya 0 agar muncul di grafik
+        'assets_by_location': {
+            k: v for k, v in delta['assets_by_location'].items()
+            if v or delta['total_locations']
+        },
+        'renamed_locations': delta['renamed_locations'],
+    }
+    if not any(compact.values()):
+        return None
+    return compact
+
+
+def install_dashboard_events(session_factory, publisher):
+    """Publish pending deltas after commit, discard them after rollback."""
+
+    def before_commit(session):
+        delta = session.info.get(PENDING_KEY)
+        if publisher.shared and delta and _compact(delta):
+            # Ditandai agar after_commit menghitungnya sebagai commit lokal
+            bump_sequence(session)
+            delta['shared'] = True
+
+    def after_commit(session):
+        delta = session.info.pop(PENDING_KEY, None)
+        if delta:
+            if delta.pop('shared', False):
+                publisher.committed_locally()
+            compact = _compact(delta)
+            if compact:
+                publisher.publish('delta', compact)
+
+    def after_rollback(session):
+        session.info.pop(PENDING_KEY, None)
+
+    event.listen(session_factory, 'before_commit', before_commit)
+    event.listen(session_factory, 'after_commit', after_commit)
+    event.listen(session_factory, 'after_rollback', after_rollback)
+
+
+def includeme(config):
+    settings = config.get_settings()
+    dashboard_publisher.queue_size = int(settings.get('superbmd.sse_queue_size', 100))
+    dashboard_publisher.sync_interval = float(settings.get('superbmd.sse_sync_interval', 2))
+    config.registry['dashboard_publisher'] = dashboard_publisher
+    install_dashboard_events(config.registry['dbsession_factory'], dashboard_publisher)
@@ -0,0 +1,403 @@
+"""Background jobs for heavy exports and reports.
+
+Jobs live in a small SQLite database of their own (``jobs.sqlite`` in
+``superbmd.jobs_dir``, or ``superbmd.jobs_url``), so queue bookkeeping and
+progress updates never write to the asset database and can be submitted
+from read-only GET requests. Results are written as files next to it and
+removed, together with their job, ``superbmd.jobs_result_ttl`` seconds after
+the job finished.
+
+Each job ``kind`` has a handler registered with ``@job_handler(kind)``. A
+handler receives a ``JobContext`` (parameters, a read-only session on the
+asset database, the registry and a ``progress()`` callback) and returns
+``(content_type, body)``. Identical jobs that are still queued or running
+are shared instead of submitted twice.
+
+Workers claim queued jobs with a conditional ``UPDATE``, so any number of
+threads and processes can serve one queue: ``superbmd.jobs_workers``
+threads start with the app (0 leaves the work to the
+``worker_backend_superbmd_jobs`` console script). A job whose worker stops
+sending progress for ``superbmd.jobs_stale_after`` seconds is requeued.
+
+Activate with ``config.include('backend_superbmd.services.job_queue')``.
+"""
+import datetime
+import enum
+import json
+import logging
+import mimetypes
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+from pyramid.events import ApplicationCreated
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, MetaData, String, Table, Text,
+    create_engine, delete, event, func, select, update,
+)
+
+from ..models.readonly import close_read_only_session, get_read_only_session
+
+log = logging.getLogger(__name__)
+
+# Handler per jenis job, diisi oleh @job_handler
+JOB_HANDLERS = {}
+
+# Progres ditulis paling sering sekali per interval ini (detik)
+PROGRESS_INTERVAL = 0.5
+# Pembersihan hasil kedaluwarsa dan job macet paling sering sekali per interval ini (detik)
+MAINTENANCE_INTERVAL = 60.0
+
+
+class JobStatus(enum.Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class UnknownJobKindError(ValueError):
+    """Raised when submitting a job kind without a registered handler."""
+
+
+metadata = MetaData()
+
+jobs = Table(
+    'jobs', metadata,
+    Column('id', String(32), primary_key=True),
+    Column('kind', String(50), nullable=False),
+    Column('params', Text, nullable=False),
+    Column('status', String(10), nullable=False),
+    Column('progress', Float, nullable=False, default=0.0),
+    Column('error', Text, nullable=True),
+    Column('result_path', Text, nullable=True),
+    Column('content_type', String(100), nullable=True),
+    Column('result_size', Integer, nullable=True),
+    Column('worker', String(100), nullable=True),
+    Column('submitted_at', DateTime, nullable=False),
+    Column('started_at', DateTime, nullable=True),
+    Column('heartbeat_at', DateTime, nullable=True),
+    Column('finished_at', DateTime, nullable=True),
+    Column('expires_at', DateTime, nullable=True),
+    Index('ix_jobs_status_submitted_at', 'status', 'submitted_at'),
+    Index('ix_jobs_expires_at', 'expires_at'),
+)
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler of job ``kind``."""
+    def register(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL: pembaca (polling status) tidak terblokir saat worker menulis progres
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode = WAL')
+    cursor.execute('PRAGMA busy_timeout = 10000')
+    cursor.close()
+
+
+class JobContext:
+    """What a job handler gets to work with."""
+
+    def __init__(self, queue, job, dbsession, registry):
+        self.queue = queue
+        self.job_id = job['id']
+        self.kind = job['kind']
+        self.params = json.loads(job['params'])
+        self.dbsession = dbsession
+        self.registry = registry
+        self._reported_at = 0.0
+
+    def progress(self, fraction):
+        """Report progress (0.0 - 1.0); also tells the queue this worker is alive."""
+        now = time.monotonic()
+        if now - self._reported_at < PROGRESS_INTERVAL and fraction < 1.0:
+            return
+        self._reported_at = now
+        self.queue._update(self.job_id, progress=max(0.0, min(float(fraction), 1.0)), heartbeat_at=_now())
+
+
+def _now():
+    return datetime.datetime.now()
+
+
+class JobQueue:
+    """SQLite-backed job queue with result files and in-process worker threads."""
+
+    def __init__(self, jobs_dir=None, url=None, result_ttl=86400.0, poll_interval=2.0, stale_after=1800.0,
+                 workers=1, offload_rows=50000, offload_labels=2000):
+        self.jobs_dir = jobs_dir or os.path.join(tempfile.gettempdir(), 'superbmd-jobs')
+        self.url = url
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.workers = workers
+        # Ambang laporan/label yang otomatis dijalankan sebagai job
+        self.offload_rows = offload_rows
+        self.offload_labels = offload_labels
+        self.registry = None
+        self.session_factory = None
+        self._engine = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._maintained_at = 0.0
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def engine(self):
+        with self._lock:
+            if self._engine is None:
+                os.makedirs(self.jobs_dir, exist_ok=True)
+                engine = create_engine(self.url or f"sqlite:///{os.path.join(self.jobs_dir, 'jobs.sqlite')}")
+                if engine.dialect.name == 'sqlite':
+                    event.listen(engine, 'connect', _sqlite_pragmas)
+                metadata.create_all(engine)
+                self._engine = engine
+            return self._engine
+
+    def dispose(self):
+        """Drop pooled connections, e.g. in a freshly forked worker process."""
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose(close=False)
+
+    # --- Antrean ---
+
+    def submit(self, kind, params=None):
+        """Queue a ``kind`` job and return it; an identical unfinished job is returned instead."""
+        if kind not in JOB_HANDLERS:
+            raise UnknownJobKindError(kind)
+        encoded = json.dumps(params or {}, sort_keys=True)
+        with self.engine.begin() as connection:
+            existing = connection.execute(
+                select(jobs).where(
+                    jobs.c.kind == kind, jobs.c.params == encoded,
+                    jobs.c.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value]),
+                ).limit(1)
+            ).mappings().first()
+            if existing is not None:
+                return dict(existing)
+            job_id = uuid.uuid4().hex
+            connection.execute(jobs.insert().values(
+                id=job_id, kind=kind, params=encoded, status=JobStatus.QUEUED.value,
+                progress=0.0, submitted_at=_now(),
+            ))
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self.engine.connect() as connection:
+            job = connection.execute(select(jobs).where(jobs.c.id == job_id)).mappings().first()
+        return dict(job) if job is not None else None
+
+    def claim(self, worker):
+        """Mark the oldest queued job as running for ``worker`` and return it, or ``None``."""
+        for _ in range(5):
+            with self.engine.begin() as connection:
+                job_id = connection.execute(
+                    select(jobs.c.id).where(jobs.c.status == JobStatus.QUEUED.value)
+                    .order_by(jobs.c.submitted_at).limit(1)
+                ).scalar()
+                if job_id is None:
+                    return None
+                now = _now()
+                # Bersyarat status: proses/thread lain yang lebih dulu mengambilnya menang
+                claimed = connection.execute(
+                    update(jobs).where(jobs.c.id == job_id, jobs.c.status == JobStatus.QUEUED.value)
+                    .values(status=JobStatus.RUNNING.value, worker=worker, started_at=now, heartbeat_at=now)
+                ).rowcount
+            if claimed:
+                return self.get(job_id)
+        return None
+
+    def run(self, job, dbsession=None):
+        """Run a claimed ``job`` and store its result (or error); returns the finished job.
+
+        Without ``dbsession`` the handler gets its own read-only session.
+        """
+        own_session = dbsession is None
+        if own_session:
+            dbsession = get_read_only_session(self.session_factory)
+        started = time.perf_counter()
+        try:
+            handler = JOB_HANDLERS.get(job['kind'])
+            if handler is None:
+                raise UnknownJobKindError(job['kind'])
+            content_type, body = handler(JobContext(self, job, dbsession, self.registry))
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            path = self._write_result(job['id'], content_type, body)
+        except Exception as e:
+            log.error(f"Job {job['id']} ({job['kind']}) failed: {e}")
+            self.failed += 1
+            self._finish(job['id'], JobStatus.FAILED, error=_error_message(e))
+        else:
+            log.info(f"Job {job['id']} ({job['kind']}) done in {time.perf_counter() - started:.2f}s, {len(body)} bytes.")
+            self.completed += 1
+            self._finish(job['id'], JobStatus.DONE, progress=1.0, result_path=path,
+                         content_type=content_type, result_size=len(body))
+        finally:
+            if own_session:
+                close_read_only_session(dbsession)
+        return self.get(job['id'])
+
+    def run_pending(self, worker='inline', dbsession=None):
+        """Run queued jobs until none are left; returns how many ran."""
+        count = 0
+        while True:
+            job = self.claim(worker)
+            if job is None:
+                return count
+            self.run(job, dbsession=dbsession)
+            count += 1
+
+    def _write_result(self, job_id, content_type, body):
+        extension = mimetypes.guess_extension(content_type.split(';')[0].strip()) or '.bin'
+        path = os.path.join(self.jobs_dir, f'{job_id}{extension}')
+        # Tulis ke berkas sementara dulu agar pembaca tidak melihat hasil setengah jadi
+        partial = f'{path}.partial'
+        with open(partial, 'wb') as result_file:
+            result_file.write(body)
+        os.replace(partial, path)
+        return path
+
+    def _finish(self, job_id, status, **values):
+        now = _now()
+        self._update(
+            job_id, status=status.value, finished_at=now, heartbeat_at=now,
+            expires_at=now + datetime.timedelta(seconds=self.result_ttl), **values
+        )
+
+    def _update(self, job_id, **values):
+        with self.engine.begin() as connection:
+            connection.execute(update(jobs).where(jobs.c.id == job_id).values(**values))
+
+    # --- Perawatan ---
+
+    def purge_expired(self):
+        """Delete finished jobs past their expiry and their result files; returns how many."""
+        with self.engine.begin() as connection:
+            expired = connection.execute(
+                select(jobs.c.id, jobs.c.result_path).where(jobs.c.expires_at < _now())
+            ).all()
+            if expired:
+                connection.execute(delete(jobs).where(jobs.c.id.in_([job_id for job_id, _ in expired])))
+        for _, path in expired:
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return len(expired)
+
+    def requeue_stale(self):
+        """Put running jobs whose worker went silent back in the queue; returns how many."""
+        cutoff = _now() - datetime.timedelta(seconds=self.stale_after)
+        with self.engine.begin() as connection:
+            return connection.execute(
+                update(jobs).where(jobs.c.status == JobStatus.RUNNING.value, jobs.c.heartbeat_at < cutoff)
+                .values(status=JobStatus.QUEUED.value, worker=None, progress=0.0)
+            ).rowcount
+
+    def _maintain(self):
+        now = time.monotonic()
+        if now - self._maintained_at < MAINTENANCE_INTERVAL:
+            return
+        self._maintained_at = now
+        purged = self.purge_expired()
+        requeued = self.requeue_stale()
+        if purged or requeued:
+            log.info(f"Job queue maintenance: {purged} expired, {requeued} requeued.")
+
+    # --- Worker ---
+
+    def work(self, worker):
+        """Claim and run jobs until ``stop()`` is called."""
+        while not self._stopping.is_set():
+            try:
+                self._maintain()
+                job = self.claim(worker)
+            except Exception as e:
+                log.error(f"Job worker {worker} could not claim a job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self.run(job)
+
+    def start(self, threads=None):
+        """Start ``threads`` (default ``workers``) daemon worker threads in this process and return them."""
+        self._stopping.clear()
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        started = []
+        for _ in range(self.workers if threads is None else threads):
+            name = f'{prefix}:{len(self._threads) + 1}'
+            thread = threading.Thread(target=self.work, args=(name,), name=f'job-worker-{name}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            started.append(thread)
+        return started
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def as_dict(self):
+        with self.engine.connect() as connection:
+            counts = dict(connection.execute(
+                select(jobs.c.status, func.count()).group_by(jobs.c.status)
+            ).all())
+        return {
+            'workers': sum(thread.is_alive() for thread in self._threads),
+            'queued': counts.get(JobStatus.QUEUED.value, 0),
+            'running': counts.get(JobStatus.RUNNING.value, 0),
+            'completed': self.completed,
+            'failed': self.failed,
+        }
+
+
+def _error_message(error):
+    # HTTPBadRequest dari validasi parameter membawa pesan untuk pengguna
+    json_body = getattr(error, 'json_body', None)
+    if isinstance(json_body, dict) and json_body.get('message'):
+        return json_body['message']
+    return str(error) or error.__class__.__name__
+
+
+# Satu antrean bersama per proses
+job_queue = JobQueue()
+
+
+def includeme(config):
+    settings = config.get_settings()
+    job_queue.jobs_dir = settings.get('superbmd.jobs_dir', job_queue.jobs_dir)
+    job_queue.url = settings.get('superbmd.jobs_url', job_queue.url)
+    job_queue.result_ttl = float(settings.get('superbmd.jobs_result_ttl', job_queue.result_ttl))
+    job_queue.poll_interval = float(settings.get('superbmd.jobs_poll_interval', job_queue.poll_interval))
+    job_queue.stale_after = float(settings.get('superbmd.jobs_stale_after', job_queue.stale_after))
+    job_queue.workers = int(settings.get('superbmd.jobs_workers', job_queue.workers))
+    job_queue.offload_rows = int(settings.get('superbmd.jobs_offload_rows', job_queue.offload_rows))
+    job_queue.offload_labels = int(settings.get('superbmd.jobs_offload_labels', job_queue.offload_labels))
+    job_queue.registry = config.registry
+    job_queue.session_factory = config.registry['dbsession_factory']
+    config.registry['job_queue'] = job_queue
+    # Buat tabel sekarang, sebelum worker (thread atau proses) mulai
+    job_queue.engine
+    if job_queue.workers:
+        # Setelah aplikasi jadi: semua handler dari package views sudah terdaftar
+        config.add_subscriber(lambda event: job_queue.start(), ApplicationCreated)
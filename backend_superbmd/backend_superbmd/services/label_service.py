@@ -0,0 +1,206 @@
+"""Printable QR label sheets for assets.
+
+Each label carries a QR code linking to the asset's detail page in the
+frontend (with ``kode_barang`` in the query string), plus the asset name,
+code and location. QR matrices are rendered to compact SVG paths and cached
+per ``(id, kode_barang)``, so reprinting a location only renders assets that
+are new or were recoded. Large batches of cache misses are rendered on a
+process pool, which keeps QR encoding off the request threads' GIL.
+
+QR encoding needs the optional ``segno`` package
+(``pip install backend_superbmd[labels]``).
+
+Activate with ``config.include('backend_superbmd.services.label_service')``.
+"""
+import atexit
+import collections
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+try:
+    import segno
+except ImportError:  # pragma: no cover - tergantung lingkungan
+    segno = None
+
+# Lembar A4 (mm) dengan 3 x 8 label
+PAGE_WIDTH = 210
+PAGE_HEIGHT = 297
+COLUMNS = 3
+ROWS = 8
+MARGIN_X = 7
+MARGIN_Y = 10
+LABEL_WIDTH = (PAGE_WIDTH - 2 * MARGIN_X) / COLUMNS
+LABEL_HEIGHT = (PAGE_HEIGHT - 2 * MARGIN_Y) / ROWS
+QR_SIZE = LABEL_HEIGHT - 6
+
+# Di bawah jumlah ini, ongkos kirim ke proses lain lebih mahal dari render-nya
+POOL_THRESHOLD = 64
+POOL_CHUNK_SIZE = 100
+
+
+class LabelRenderingUnavailable(RuntimeError):
+    """Raised when the optional QR dependency is not installed."""
+
+
+def qr_payload(frontend_url, barang_id, kode_barang):
+    return f"{frontend_url.rstrip('/')}/assets/detail/{barang_id}?kode_barang={quote(kode_barang)}"
+
+
+def render_qr_path(payload):
+    """Encode ``payload`` and return ``(svg_path_d, size_in_modules)``.
+
+    Dark modules are merged into horizontal runs, one subpath per run.
+    """
+    qr = segno.make(payload, error='m')
+    commands = []
+    size = 0
+    for y, row in enumerate(qr.matrix):
+        size = len(row)
+        x = 0
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                commands.append(f'M{start} {y}h{x - start}v1h-{x - start}z')
+            else:
+                x += 1
+    return ''.join(commands), size
+
+
+def _render_chunk(items):
+    # Dijalankan di proses pekerja
+    return [(key, render_qr_path(payload)) for key, payload in items]
+
+
+class LabelRenderer:
+    """Renders label sheets, caching QR paths and using a process pool for misses."""
+
+    def __init__(self, frontend_url='http://localhost:5173', cache_size=20000, workers=None):
+        self.frontend_url = frontend_url
+        self.cache_size = cache_size
+        self.workers = workers
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def available():
+        return segno is not None
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: fork dari server multi-thread bisa mewarisi lock yang sedang dipegang
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                atexit.register(self._pool.shutdown)
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def qr_paths(self, assets):
+        """Map ``(id, kode_barang)`` to a QR path for every asset, rendering misses."""
+        paths = {}
+        missing = []
+        with self._lock:
+            for barang_id, kode_barang in assets:
+                key = (barang_id, kode_barang)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    paths[key] = self._cache[key]
+                else:
+                    missing.append((key, qr_payload(self.frontend_url, barang_id, kode_barang)))
+            self.hits += len(paths)
+            self.misses += len(missing)
+
+        if len(missing) >= POOL_THRESHOLD:
+            chunks = [missing[i:i + POOL_CHUNK_SIZE] for i in range(0, len(missing), POOL_CHUNK_SIZE)]
+            rendered = [item for chunk in self._executor().map(_render_chunk, chunks) for item in chunk]
+        else:
+            rendered = _render_chunk(missing)
+
+        with self._lock:
+            for key, path in rendered:
+                paths[key] = path
+                self._cache[key] = path
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return paths
+
+    def render_pages(self, assets):
+        """Return one SVG document per A4 page.
+
+        ``assets`` is a list of ``(id, kode_barang, nama_barang, nama_lokasi)``.
+        """
+        if not self.available():
+            raise LabelRenderingUnavailable('Paket segno belum terpasang; label QR tidak bisa dibuat.')
+        paths = self.qr_paths([(a[0], a[1]) for a in assets])
+        per_page = COLUMNS * ROWS
+        return [
+            self._render_page(assets[start:start + per_page], paths)
+            for start in range(0, max(len(assets), 1), per_page)  # Minimal satu lembar kosong
+        ]
+
+    def render_html(self, assets):
+        """All pages inline in one HTML document, one printed page per sheet."""
+        pages = ''.join(f'<div class="sheet">{page}</div>' for page in self.render_pages(assets))
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Label QR Barang</title>'
+            f'<style>@page{{size:A4;margin:0}}body{{margin:0}}'
+            f'.sheet{{width:{PAGE_WIDTH}mm;height:{PAGE_HEIGHT}mm;page-break-after:always}}'
+            '.sheet svg{width:100%;height:100%}</style></head>'
+            f'<body>{pages}</body></html>'
+        )
+
+    def _render_page(self, assets, paths):
+        labels = []
+        for index, (barang_id, kode_barang, nama_barang, nama_lokasi) in enumerate(assets):
+            row, column = divmod(index, COLUMNS)
+            x = MARGIN_X + column * LABEL_WIDTH
+            y = MARGIN_Y + row * LABEL_HEIGHT
+            path, modules = paths[(barang_id, kode_barang)]
+            # Tambah 4 modul zona tenang di setiap sisi
+            scale = QR_SIZE / (modules + 8)
+            text_x = x + QR_SIZE + 5
+            labels.append(
+                f'<g><rect x="{x:.2f}" y="{y:.2f}" width="{LABEL_WIDTH:.2f}" height="{LABEL_HEIGHT:.2f}" '
+                'fill="none" stroke="#ccc" stroke-width="0.2"/>'
+                f'<path transform="translate({x + 3 + 4 * scale:.3f} {y + 3 + 4 * scale:.3f}) scale({scale:.4f})" d="{path}"/>'
+                f'<text x="{text_x:.2f}" y="{y + 10:.2f}" font-size="3.2" font-weight="bold">{escape(kode_barang)}</text>'
+                f'<text x="{text_x:.2f}" y="{y + 16:.2f}" font-size="2.6">{escape(nama_barang[:20])}</text>'
+                f'<text x="{text_x:.2f}" y="{y + 21:.2f}" font-size="2.4" fill="#555">{escape(nama_lokasi[:22])}</text>'
+                '</g>'
+            )
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{PAGE_WIDTH}mm" height="{PAGE_HEIGHT}mm" '
+            f'viewBox="0 0 {PAGE_WIDTH} {PAGE_HEIGHT}" font-family="sans-serif">'
+            f'{"".join(labels)}</svg>'
+        )
+
+    def as_dict(self):
+        with self._lock:
+            return {'cached': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+# Satu renderer (dan cache) bersama per proses
+label_renderer = LabelRenderer()
+
+
+def includeme(config):
+    settings = config.get_settings()
+    label_renderer.frontend_url = settings.get('superbmd.frontend_url', label_renderer.frontend_url)
+    label_renderer.cache_size = int(settings.get('superbmd.label_cache_size', label_renderer.cache_size))
+    workers = settings.get('superbmd.label_workers')
+    label_renderer.workers = int(workers) if workers else None
+    config.registry['label_renderer'] = label_renderer
@@ -1,29 +1,116 @@
-from typing import List, Optional
-from ..models.mymodel import Lokasi
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, insert, literal, or_, select, true
+from sqlalchemy.orm import aliased
+from ..models.mymodel import Barang, BarangTransfer, Lokasi, LokasiClosure, StocktakeScan, StocktakeSession
+from .dashboard_events import record_lokasi_delta, record_lokasi_renamed
+from .pagination import order_by_columns, paginate
+from .scan_index import record_scan_invalidate_all
+
+class LokasiMoveError(ValueError):
+    """Raised when a location would be moved under itself or its descendant."""
+
 
 class LokasiService:
     """Service for location operations."""
 
+    # Kunci sort yang diizinkan; masing-masing didukung indeks (kolom, id)
+    SORT_KEYS = {
+        'kode_lokasi': (Lokasi.kode_lokasi,),
+        'nama_lokasi': (Lokasi.nama_lokasi,),
+    }
+
+    @staticmethod
+    def _search(stmt, search_term: Optional[str]):
+        if search_term:
+            stmt = stmt.where(or_(
+                Lokasi.nama_lokasi.ilike(f'%{search_term}%'),
+                Lokasi.kode_lokasi.ilike(f'%{search_term}%')
+            ))
+        return stmt
+
     @staticmethod
     def get_all_lokasi(dbsession, search_term: Optional[str] = None) -> List[Lokasi]:
         """Get all locations, with optional search."""
-        query = dbsession.query(Lokasi)
-        if search_term:
-            query = query.filter(
-                (Lokasi.nama_lokasi.ilike(f'%{search_term}%')) |
-                (Lokasi.kode_lokasi.ilike(f'%{search_term}%'))
-            )
-        return query.all()
+        stmt = LokasiService._search(select(Lokasi), search_term)
+        return dbsession.execute(stmt).scalars().all()
+
+    @staticmethod
+    def get_lokasi_page(
+        dbsession, page: int, limit: int, count: str = 'exact', search_term: Optional[str] = None,
+        sort: Optional[str] = None
+    ) -> Tuple[List[Lokasi], dict]:
+        """One page of locations plus pagination."""
+        order_by = order_by_columns(sort, LokasiService.SORT_KEYS, Lokasi.id)
+        stmt = LokasiService._search(select(Lokasi), search_term).order_by(*order_by)
+        rows, pagination = paginate(dbsession, stmt, page, limit, count, table='lokasi', filters={'search': search_term})
+        return [row.Lokasi for row in rows], pagination
 
     @staticmethod
     def get_lokasi_by_id(dbsession, lokasi_id: int) -> Optional[Lokasi]:
         """Get location by ID."""
-        return dbsession.query(Lokasi).get(lokasi_id) # Menggunakan .get() untuk PK
+        return dbsession.get(Lokasi, lokasi_id) # Identity map dulu, lalu load PK yang sudah di-cache
 
     @staticmethod
     def get_lokasi_by_kode(dbsession, kode_lokasi: str) -> Optional[Lokasi]:
         """Get location by code."""
-        return dbsession.query(Lokasi).filter(Lokasi.kode_lokasi == kode_lokasi).first()
+        stmt = select(Lokasi).where(Lokasi.kode_lokasi == kode_lokasi).limit(1)
+        return dbsession.execute(stmt).scalars().first()
+
+    @staticmethod
+    def subtree_ids(lokasi_id: int):
+        """Select of ``lokasi_id`` and all its descendants (one index range on the closure PK)."""
+        return select(LokasiClosure.descendant_id).where(LokasiClosure.ancestor_id == lokasi_id)
+
+    @staticmethod
+    def has_children(dbsession, lokasi_id: int) -> bool:
+        return dbsession.execute(
+            select(Lokasi.id).where(Lokasi.parent_id == lokasi_id).limit(1)
+        ).first() is not None
+
+    @staticmethod
+    def has_barang(dbsession, lokasi_id: int) -> bool:
+        """True if any live asset is at ``lokasi_id``; deleted ones are left to ``ArchiveService.archive_lokasi``."""
+        return dbsession.execute(
+            select(Barang.id).where(Barang.id_lokasi == lokasi_id).limit(1)
+        ).first() is not None
+
+    @staticmethod
+    def has_transfers(dbsession, lokasi_id: int) -> bool:
+        """True if the transfer history names ``lokasi_id`` as origin or destination."""
+        return dbsession.execute(
+            select(BarangTransfer.id).where(or_(
+                BarangTransfer.id_lokasi_asal == lokasi_id, BarangTransfer.id_lokasi_tujuan == lokasi_id
+            )).limit(1)
+        ).first() is not None
+
+    @staticmethod
+    def has_stocktakes(dbsession, lokasi_id: int) -> bool:
+        """True if a stocktake session or scan references ``lokasi_id``."""
+        return dbsession.execute(
+            select(StocktakeSession.id).where(StocktakeSession.id_lokasi == lokasi_id)
+            .union_all(select(StocktakeScan.session_id).where(StocktakeScan.id_lokasi == lokasi_id))
+            .limit(1)
+        ).first() is not None
+
+    @staticmethod
+    def is_descendant(dbsession, lokasi_id: int, ancestor_id: int) -> bool:
+        """True if ``lokasi_id`` is ``ancestor_id`` or lies below it."""
+        return dbsession.get(LokasiClosure, (ancestor_id, lokasi_id)) is not None
+
+    @staticmethod
+    def _link_to_parent(dbsession, lokasi_id: int, parent_id: Optional[int]) -> None:
+        """Connect the subtree rooted at ``lokasi_id`` to every ancestor of ``parent_id``."""
+        if parent_id is None:
+            return
+        above = aliased(LokasiClosure)
+        below = aliased(LokasiClosure)
+        dbsession.execute(insert(LokasiClosure).from_select(
+            ['ancestor_id', 'descendant_id', 'depth'],
+            # Perkalian silang yang disengaja: setiap leluhur induk dengan setiap isi subtree
+            select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+            .select_from(above).join(below, true())
+            .where(above.descendant_id == parent_id, below.ancestor_id == lokasi_id)
+        ))
 
     @staticmethod
     def create_lokasi(dbsession, lokasi_data: dict) -> Lokasi:
@@ -31,19 +118,75 @@ class LokasiService:
         new_lokasi = Lokasi(**lokasi_data)
         dbsession.add(new_lokasi)
         dbsession.flush()
+        dbsession.execute(insert(LokasiClosure).values(
+            ancestor_id=new_lokasi.id, descendant_id=new_lokasi.id, depth=0
+        ))
+        LokasiService._link_to_parent(dbsession, new_lokasi.id, new_lokasi.parent_id)
+        record_lokasi_delta(dbsession, new_lokasi.nama_lokasi, 1)
         return new_lokasi
 
+    @staticmethod
+    def move_lokasi(dbsession, lokasi: Lokasi, parent_id: Optional[int]) -> None:
+        """Re-parent ``lokasi`` with its whole subtree.
+
+        Only the closure rows crossing the subtree boundary are touched: the
+        links to the old ancestors are deleted and links to the new ancestors
+        inserted, both as single set-based statements.
+        """
+        if parent_id is not None and LokasiService.is_descendant(dbsession, parent_id, lokasi.id):
+            raise LokasiMoveError('Lokasi tidak bisa dipindah ke dalam sub-lokasinya sendiri.')
+        subtree = LokasiService.subtree_ids(lokasi.id)
+        old_ancestors = select(LokasiClosure.ancestor_id).where(
+            LokasiClosure.descendant_id == lokasi.id, LokasiClosure.ancestor_id != lokasi.id
+        )
+        dbsession.execute(delete(LokasiClosure).where(
+            LokasiClosure.descendant_id.in_(subtree),
+            LokasiClosure.ancestor_id.in_(old_ancestors)
+        ))
+        LokasiService._link_to_parent(dbsession, lokasi.id, parent_id)
+        lokasi.parent_id = parent_id
+
     @staticmethod
     def update_lokasi(dbsession, lokasi: Lokasi, update_data: dict) -> Lokasi:
         """Update existing location."""
+        old_name = lokasi.nama_lokasi
+        if 'parent_id' in update_data:
+            parent_id = update_data.pop('parent_id')
+            if parent_id != lokasi.parent_id:
+                LokasiService.move_lokasi(dbsession, lokasi, parent_id)
         for field, value in update_data.items():
             setattr(lokasi, field, value)
         dbsession.add(lokasi)
         dbsession.flush()
+        record_lokasi_renamed(dbsession, old_name, lokasi.nama_lokasi)
+        if lokasi.nama_lokasi != old_name:
+            # Nama lokasi ikut tersimpan di setiap entri indeks scan
+            record_scan_invalidate_all(dbsession)
         return lokasi
 
     @staticmethod
     def delete_lokasi(dbsession, lokasi: Lokasi) -> None:
-        """Delete a location."""
+        """Delete a location (must not have sub-locations)."""
+        record_lokasi_delta(dbsession, lokasi.nama_lokasi, -1)
+        dbsession.execute(delete(LokasiClosure).where(LokasiClosure.descendant_id == lokasi.id))
         dbsession.delete(lokasi)
-        dbsession.flush()
\ No newline at end of file
+        dbsession.flush()
+
+    @staticmethod
+    def rebuild_closure(dbsession) -> None:
+        """Recompute the closure table from ``parent_id`` (after bulk loads).
+
+        Works with a ``Session`` or a ``Connection``.
+        """
+        paths = select(
+            Lokasi.id.label('ancestor_id'), Lokasi.id.label('descendant_id'), literal(0).label('depth')
+        ).cte('paths', recursive=True)
+        paths = paths.union_all(
+            select(paths.c.ancestor_id, Lokasi.id, paths.c.depth + 1)
+            .where(Lokasi.parent_id == paths.c.descendant_id)
+        )
+        dbsession.execute(delete(LokasiClosure))
+        dbsession.execute(insert(LokasiClosure).from_select(
+            ['ancestor_id', 'descendant_id', 'depth'],
+            select(paths.c.ancestor_id, paths.c.descendant_id, paths.c.depth)
+        ))
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""SQL-side pagination for the list endpoints.
+
+Every page is fetched with ``LIMIT limit + 1``: the extra row tells whether a
+next page exists, so ``has_more`` is always exact. ``count`` decides how
+``total_items`` is obtained:
+
+* ``exact``: a ``COUNT(*)`` over the filtered statement (the default).
+* ``estimate``: PostgreSQL's table statistics (``pg_class.reltuples``) when
+  the list is unfiltered; otherwise an exact count that is cached per filter
+  fingerprint for ``superbmd.count_cache_ttl`` seconds, so paging through a
+  result only counts it once.
+* ``none``: no count at all; ``total_items`` and ``total_pages`` are null.
+
+``page`` must be at least 1 and ``limit`` between 1 and
+``superbmd.max_page_limit`` (default 100); ``page_params`` checks both before
+any SQL is built.
+
+``sort`` picks one of a whitelist of keys per list (``-key`` for descending),
+always followed by ``id`` as tiebreaker so pages never overlap. Each key is
+backed by a ``(key, id)`` index, letting the database walk the index instead
+of sorting the whole filtered result for every page.
+
+Activate with ``config.include('backend_superbmd.services.pagination')``.
+"""
+import collections
+import threading
+import time
+
+from sqlalchemy import func, select, text
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+
+class InvalidSortError(ValueError):
+    """Raised for a ``sort`` key outside the list's whitelist."""
+
+
+class InvalidPageError(ValueError):
+    """Raised for a ``page`` or ``limit`` that is not a number or out of range."""
+
+
+# Batas atas limit per halaman; diatur lewat superbmd.max_page_limit
+max_page_limit = 100
+
+
+def page_params(params, default_limit=10):
+    """Validated ``(page, limit)`` from the query ``params``."""
+    try:
+        page = int(params.get('page', 1))
+        limit = int(params.get('limit', default_limit))
+    except ValueError:
+        raise InvalidPageError('page dan limit harus berupa angka.')
+    if page < 1 or not 1 <= limit <= max_page_limit:
+        raise InvalidPageError(f'page minimal 1 dan limit antara 1 dan {max_page_limit}.')
+    return page, limit
+
+
+class TTLCache:
+    """Bounded LRU whose entries expire ``ttl`` seconds after they were stored."""
+
+    def __init__(self, max_size=1000, ttl=30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def as_dict(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Satu cache bersama per proses
+count_cache = TTLCache()
+
+
+def order_by_columns(sort, keys, tiebreaker):
+    """ORDER BY columns for ``sort`` (``key`` or ``-key``); ``keys`` maps names to column tuples."""
+    if not sort:
+        return [tiebreaker]
+    descending = sort.startswith('-')
+    name = sort[1:] if descending else sort
+    if name not in keys:
+        raise InvalidSortError(f"sort harus salah satu dari: {', '.join(keys)} (awali '-' untuk urutan menurun).")
+    columns = [*keys[name], tiebreaker]
+    # Semua kolom searah, agar indeks (key, id) bisa dibaca mundur untuk urutan menurun
+    return [column.desc() for column in columns] if descending else columns
+
+
+def _exact_count(dbsession, stmt):
+    return dbsession.execute(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    ).scalar_one()
+
+
+def _table_estimate(dbsession, table):
+    """Row estimate kept by ANALYZE/autovacuum; ``None`` where unavailable."""
+    if dbsession.get_bind().dialect.name != 'postgresql':
+        return None
+    estimate = dbsession.execute(
+        text('SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)'), {'table': table}
+    ).scalar()
+    # -1: tabel belum pernah di-ANALYZE
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+def count_items(dbsession, stmt, count, table, filters):
+    """Total rows of ``stmt`` for the given count mode (``None`` for ``none``)."""
+    if count == 'none':
+        return None
+    if count == 'exact':
+        return _exact_count(dbsession, stmt)
+
+    key = (table, tuple(sorted((name, value) for name, value in filters.items() if value)))
+    total = count_cache.get(key)
+    if total is None:
+        total = _table_estimate(dbsession, table) if not key[1] else None
+        if total is None:
+            total = _exact_count(dbsession, stmt)
+        count_cache.put(key, total)
+    return total
+
+
+def paginate(dbsession, stmt, page, limit, count='exact', table=None, filters=None):
+    """Fetch one page of ``stmt`` (which must be ordered) plus its pagination block.
+
+    ``table`` and ``filters`` identify the result for ``count='estimate'``.
+    Returns ``(rows, pagination)``.
+    """
+    rows = dbsession.execute(stmt.limit(limit + 1).offset((page - 1) * limit)).all()
+    has_more = len(rows) > limit
+    total_items = count_items(dbsession, stmt, count, table, filters or {})
+    return rows[:limit], {
+        'total_items': total_items,
+        'total_pages': (total_items + limit - 1) // limit if total_items is not None else None,
+        'current_page': page,
+        'items_per_page': limit,
+        'has_more': has_more,
+        'count': count,
+    }
+
+
+def includeme(config):
+    global max_page_limit
+    settings = config.get_settings()
+    max_page_limit = int(settings.get('superbmd.max_page_limit', max_page_limit))
+    count_cache.max_size = int(settings.get('superbmd.count_cache_size', count_cache.max_size))
+    count_cache.ttl = float(settings.get('superbmd.count_cache_ttl', count_cache.ttl))
+    config.registry['count_cache'] = count_cache
@@ -0,0 +1,197 @@
+"""Generic pivot over whitelisted asset dimensions.
+
+A pivot request (``rows``, optional ``cols``, ``measure`` and the report
+filters) compiles to one grouped query. Its raw groups are cached per
+normalized request together with the asset data version (the ``barang``
+change sequence, bumped by every asset write), so a cached result is never
+served once an asset changed. Entries also expire after
+``superbmd.pivot_cache_ttl`` seconds, which bounds staleness from location
+hierarchy changes. Location labels are resolved on every request.
+
+When the columnar snapshot is enabled and fresh, a cache miss is answered
+from it with vectorized counting instead of SQL.
+
+Activate with ``config.include('backend_superbmd.services.pivot_service')``.
+"""
+from sqlalchemy import Integer, cast, extract, func, select
+from ..models.mymodel import Barang, ChangeSequence, KondisiBarang, Lokasi
+from .barang_service import CHANGE_FEED
+from .columnar_snapshot import columnar_snapshot
+from .lokasi_service import LokasiService
+from .pagination import TTLCache
+from .rollup_service import _as_date, _truncate_to_month
+import datetime
+
+DIMENSIONS = ('id_lokasi', 'kondisi', 'penanggung_jawab', 'bulan_masuk', 'tahun_masuk')
+MEASURES = ('count',)
+
+# Urutan kondisi mengikuti deklarasi enum, bukan abjad
+_KONDISI_ORDER = {kondisi: index for index, kondisi in enumerate(KondisiBarang)}
+
+# Satu cache bersama per proses
+pivot_cache = TTLCache(max_size=256, ttl=300.0)
+
+
+def _dimension(name, dialect_name):
+    if name == 'bulan_masuk':
+        return _truncate_to_month(Barang.tanggal_masuk, dialect_name)
+    if name == 'tahun_masuk':
+        if dialect_name == 'sqlite':
+            return cast(func.strftime('%Y', Barang.tanggal_masuk), Integer)
+        return cast(extract('year', Barang.tanggal_masuk), Integer)
+    return getattr(Barang, name)
+
+
+def _snapshot_filters(dbsession, filters):
+    """Report filters as ``group_count`` arguments; ``None`` if one does not parse (SQL reports the error)."""
+    try:
+        parsed = {}
+        if filters.get('start_date'):
+            parsed['start'] = datetime.datetime.strptime(filters['start_date'], '%Y-%m-%d').date()
+        if filters.get('end_date'):
+            parsed['end'] = (
+                datetime.datetime.strptime(filters['end_date'], '%Y-%m-%d') + datetime.timedelta(days=1)
+            ).date()
+        if filters.get('condition'):
+            parsed['kondisi'] = KondisiBarang(filters['condition'])
+        if filters.get('location_id'):
+            parsed['lokasi_ids'] = dbsession.execute(
+                LokasiService.subtree_ids(int(filters['location_id']))
+            ).scalars().all()
+    except ValueError:
+        return None
+    return parsed
+
+
+def _measure(name):
+    return func.count(Barang.id)
+
+
+def _sort_key(value):
+    if isinstance(value, KondisiBarang):
+        return _KONDISI_ORDER[value]
+    return value
+
+
+def _label(dimension, value, nama_lokasi):
+    if dimension == 'id_lokasi':
+        return nama_lokasi.get(value, '')
+    if dimension == 'kondisi':
+        return value.value
+    if dimension == 'bulan_masuk':
+        return f'{value.year}-{value.month:02d}'
+    return str(value)
+
+
+def _key_value(value):
+    if isinstance(value, KondisiBarang):
+        return value.value
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+class PivotService:
+    """Service for the generic asset pivot report."""
+
+    @staticmethod
+    def data_version(dbsession) -> int:
+        return dbsession.execute(
+            select(ChangeSequence.value).where(ChangeSequence.name == CHANGE_FEED)
+        ).scalar() or 0
+
+    @staticmethod
+    def pivot(dbsession, rows: str, cols, measure: str, filters: dict, apply_filters) -> dict:
+        """Aggregate ``measure`` over ``rows`` x ``cols`` (``cols`` may be ``None``).
+
+        ``apply_filters(stmt, Barang, filters)`` adds the report filters to the
+        grouped statement; ``filters`` also forms part of the cache key. Only
+        call this from read-only transactions: the data version read here must
+        be a committed one.
+        """
+        key = (
+            rows, cols, measure,
+            tuple(sorted((name, value) for name, value in filters.items() if value)),
+            PivotService.data_version(dbsession),
+        )
+        groups = pivot_cache.get(key)
+        if groups is None and columnar_snapshot.available:
+            groups = PivotService._from_snapshot(dbsession, rows, cols, filters)
+            if groups is not None:
+                pivot_cache.put(key, groups)
+        if groups is None:
+            dialect_name = dbsession.get_bind().dialect.name
+            names = [name for name in (rows, cols) if name]
+            dimensions = [_dimension(name, dialect_name) for name in names]
+            stmt = select(*dimensions, _measure(measure)).group_by(*dimensions)
+            stmt = apply_filters(stmt, Barang, filters)
+            groups = []
+            for row in dbsession.execute(stmt):
+                # SQLite mengembalikan bulan sebagai string
+                values = [_as_date(value) if name == 'bulan_masuk' and value is not None else value
+                          for name, value in zip(names, row)]
+                groups.append((values[0], values[1] if cols else None, row[-1]))
+            pivot_cache.put(key, groups)
+        return PivotService._table(dbsession, rows, cols, measure, groups)
+
+    @staticmethod
+    def _from_snapshot(dbsession, rows, cols, filters):
+        parsed = _snapshot_filters(dbsession, filters)
+        if parsed is None:
+            return None
+        counts = columnar_snapshot.group_count([name for name in (rows, cols) if name], **parsed)
+        if counts is None:
+            return None
+        return [(values[0], values[1] if cols else None, amount) for values, amount in counts.items()]
+
+    @staticmethod
+    def _table(dbsession, rows, cols, measure, groups) -> dict:
+        row_values = sorted({g[0] for g in groups if g[0] is not None}, key=_sort_key)
+        col_values = sorted({g[1] for g in groups if g[1] is not None}, key=_sort_key) if cols else []
+        row_index = {value: i for i, value in enumerate(row_values)}
+        col_index = {value: i for i, value in enumerate(col_values)}
+
+        cells = [[0] * len(col_values) for _ in row_values]
+        row_totals = [0] * len(row_values)
+        col_totals = [0] * len(col_values)
+        for row_value, col_value, amount in groups:
+            if row_value is None or (cols and col_value is None):
+                continue
+            i = row_index[row_value]
+            row_totals[i] += amount
+            if cols:
+                j = col_index[col_value]
+                cells[i][j] += amount
+                col_totals[j] += amount
+
+        nama_lokasi = {}
+        if 'id_lokasi' in (rows, cols):
+            ids = row_values if rows == 'id_lokasi' else col_values
+            nama_lokasi = dict(dbsession.execute(
+                select(Lokasi.id, Lokasi.nama_lokasi).where(Lokasi.id.in_(ids))
+            ).all())
+
+        def keys(dimension, values):
+            return [
+                {'value': _key_value(value), 'label': _label(dimension, value, nama_lokasi)}
+                for value in values
+            ]
+
+        return {
+            'rows': rows,
+            'cols': cols,
+            'measure': measure,
+            'row_keys': keys(rows, row_values),
+            'col_keys': keys(cols, col_values),
+            'cells': cells,
+            'row_totals': row_totals,
+            'col_totals': col_totals,
+            'total': sum(row_totals),
+        }
+
+
+def includeme(config):
+    settings = config.get_settings()
+    pivot_cache.max_size = int(settings.get('superbmd.pivot_cache_size', pivot_cache.max_size))
+    pivot_cache.ttl = float(settings.get('superbmd.pivot_cache_ttl', pivot_cache.ttl))
+    config.registry['pivot_cache'] = pivot_cache
@@ -0,0 +1,262 @@
+from typing import List, Optional
+from sqlalchemy import Date, cast, delete, func, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from ..models.mymodel import Barang, BarangRollup, KondisiBarang, Lokasi
+from .lokasi_service import LokasiService
+import datetime
+
+# Kolom tanggal yang bisa dipakai untuk deret waktu
+DATE_FIELDS = ('tanggal_masuk', 'tanggal_pembaruan')
+BUCKETS = ('day', 'week', 'month', 'quarter', 'year')
+GROUP_BY = ('location', 'condition')
+# Dialek yang mendukung INSERT ... ON CONFLICT DO UPDATE
+UPSERT_DIALECTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def bucket_label(day: datetime.date, bucket: str) -> str:
+    """Label of the ``bucket`` period containing ``day``."""
+    if bucket == 'day':
+        return day.isoformat()
+    if bucket == 'week':
+        year, week, _ = day.isocalendar()
+        return f'{year}-W{week:02d}'
+    if bucket == 'month':
+        return f'{day.year}-{day.month:02d}'
+    if bucket == 'quarter':
+        return f'{day.year}-Q{(day.month - 1) // 3 + 1}'
+    return str(day.year)
+
+
+def _truncate_to_month(column, dialect_name):
+    if dialect_name == 'sqlite':
+        return func.date(column, 'start of month')
+    return cast(func.date_trunc('month', column), Date)
+
+
+def _truncate_to_day(column, dialect_name):
+    if dialect_name == 'sqlite':
+        return func.date(column)
+    return cast(column, Date)
+
+
+def _as_date(value):
+    # SQLite mengembalikan func.date() sebagai string 'YYYY-MM-DD'
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+class RollupService:
+    """Service for the monthly asset rollup and time-series reports."""
+
+    @staticmethod
+    def rollup_keys(barang) -> list:
+        """Rollup rows an asset contributes to, as ``(field, bulan, id_lokasi, kondisi)``."""
+        keys = []
+        for field in DATE_FIELDS:
+            value = getattr(barang, field)
+            if value is not None:
+                keys.append((field, month_start(value), barang.id_lokasi, barang.kondisi))
+        return keys
+
+    @staticmethod
+    def apply_delta(dbsession, old_keys: list, new_keys: list) -> None:
+        """Move an asset's contribution from ``old_keys`` to ``new_keys``."""
+        changes = {}
+        for key in old_keys:
+            changes[key] = changes.get(key, 0) - 1
+        for key in new_keys:
+            changes[key] = changes.get(key, 0) + 1
+        RollupService.apply_counts(dbsession, changes)
+
+    @staticmethod
+    def apply_counts(dbsession, changes: dict) -> None:
+        """Add ``amount`` to each rollup row in ``{key: amount}``."""
+        for key, amount in changes.items():
+            if amount:
+                RollupService._bump(dbsession, key, amount)
+
+    @staticmethod
+    def counts_for(dbsession, criteria) -> dict:
+        """Rollup contributions ``{key: count}`` of the assets matching ``criteria``, grouped in SQL."""
+        dialect_name = dbsession.get_bind().dialect.name
+        counts = {}
+        for field in DATE_FIELDS:
+            column = getattr(Barang, field)
+            bulan = _truncate_to_month(column, dialect_name)
+            rows = dbsession.execute(
+                select(bulan, Barang.id_lokasi, Barang.kondisi, func.count(Barang.id))
+                .where(criteria, column.isnot(None))
+                .group_by(bulan, Barang.id_lokasi, Barang.kondisi)
+            ).all()
+            for month, id_lokasi, kondisi, count in rows:
+                counts[(field, _as_date(month), id_lokasi, kondisi)] = count
+        return counts
+
+    @staticmethod
+    def _bump(dbsession, key, amount: int) -> None:
+        field, bulan, id_lokasi, kondisi = key
+        dialect_name = dbsession.get_bind().dialect.name
+        upsert = UPSERT_DIALECTS.get(dialect_name)
+        if upsert is not None:
+            # Satu pernyataan atomik: dua transaksi yang membuat baris yang sama tidak saling bentrok
+            stmt = upsert(BarangRollup).values(
+                field=field, bulan=bulan, id_lokasi=id_lokasi, kondisi=kondisi, jumlah=amount
+            )
+            dbsession.execute(stmt.on_conflict_do_update(
+                index_elements=[BarangRollup.field, BarangRollup.bulan, BarangRollup.id_lokasi, BarangRollup.kondisi],
+                set_={'jumlah': BarangRollup.jumlah + stmt.excluded.jumlah},
+            ))
+            return
+        result = dbsession.execute(
+            update(BarangRollup)
+            .where(
+                BarangRollup.field == field,
+                BarangRollup.bulan == bulan,
+                BarangRollup.id_lokasi == id_lokasi,
+                BarangRollup.kondisi == kondisi,
+            )
+            .values(jumlah=BarangRollup.jumlah + amount)
+        )
+        if result.rowcount == 0:
+            dbsession.execute(insert(BarangRollup).values(
+                field=field, bulan=bulan, id_lokasi=id_lokasi, kondisi=kondisi, jumlah=amount
+            ))
+
+    @staticmethod
+    def rebuild(dbsession) -> None:
+        """Recompute the whole rollup from ``barang`` with one grouped INSERT per field.
+
+        Works with a ``Session`` or a ``Connection``.
+        """
+        dialect_name = dbsession.get_bind().dialect.name if hasattr(dbsession, 'get_bind') else dbsession.dialect.name
+        dbsession.execute(delete(BarangRollup))
+        for field in DATE_FIELDS:
+            column = getattr(Barang, field)
+            bulan = _truncate_to_month(column, dialect_name)
+            source = (
+                select(literal(field), bulan, Barang.id_lokasi, Barang.kondisi, func.count(Barang.id))
+                # INSERT ... SELECT tidak melewati filter soft delete: saring sendiri
+                .where(column.isnot(None), Barang.deleted_at.is_(None))
+                .group_by(bulan, Barang.id_lokasi, Barang.kondisi)
+            )
+            dbsession.execute(insert(BarangRollup).from_select(
+                ['field', 'bulan', 'id_lokasi', 'kondisi', 'jumlah'], source
+            ))
+
+    @staticmethod
+    def get_timeseries(
+        dbsession,
+        bucket: str = 'month',
+        date_field: str = 'tanggal_masuk',
+        group_by: Optional[str] = None,
+        start_date: Optional[datetime.date] = None,
+        end_date: Optional[datetime.date] = None,
+        location_id: Optional[int] = None,
+        condition: Optional[KondisiBarang] = None,
+        models: tuple = (Barang,),
+        execution_options: Optional[dict] = None,
+    ) -> List[dict]:
+        """Asset counts per period, optionally split by location or condition.
+
+        Month/quarter/year buckets are summed from the monthly rollup when the
+        date range is month-aligned; otherwise counts are grouped per day from
+        ``barang`` (index range on the date column) and re-bucketed.
+        ``location_id`` covers the location and all its sub-locations.
+        ``models``/``execution_options`` pick the asset tables as for the other
+        reports; the rollup only covers ``barang``, so any other source is
+        always counted per day.
+        """
+        options = execution_options or {}
+        month_aligned = (
+            (start_date is None or start_date.day == 1)
+            and (end_date is None or (end_date + datetime.timedelta(days=1)).day == 1)
+        )
+        if bucket in ('month', 'quarter', 'year') and month_aligned and list(models) == [Barang]:
+            rows = RollupService._monthly_counts(
+                dbsession, date_field, group_by, start_date, end_date, location_id, condition
+            )
+        else:
+            rows = [
+                row
+                for model in models
+                for row in RollupService._daily_counts(
+                    dbsession, model, date_field, group_by, start_date, end_date, location_id, condition, options
+                )
+            ]
+
+        totals = {}
+        for day, group, count in rows:
+            key = (bucket_label(_as_date(day), bucket), group)
+            totals[key] = totals.get(key, 0) + count
+
+        group_names = RollupService._group_names(dbsession, group_by, {g for _, g in totals}, options)
+        result = [
+            {'period': period, 'group': group_names.get(group), 'total_assets': count}
+            for (period, group), count in totals.items()
+            if count  # Baris rekap bisa tersisa dengan jumlah 0 setelah barang dipindah/dihapus
+        ]
+        result.sort(key=lambda item: (item['period'], item['group'] or ''))
+        return result
+
+    @staticmethod
+    def _group_column(model, group_by):
+        if group_by == 'location':
+            return model.id_lokasi
+        if group_by == 'condition':
+            return model.kondisi
+        return None
+
+    @staticmethod
+    def _monthly_counts(dbsession, date_field, group_by, start_date, end_date, location_id, condition):
+        group_col = RollupService._group_column(BarangRollup, group_by)
+        columns = [BarangRollup.bulan, group_col if group_col is not None else literal(None)]
+        stmt = select(*columns, func.sum(BarangRollup.jumlah)).where(BarangRollup.field == date_field)
+        if start_date:
+            stmt = stmt.where(BarangRollup.bulan >= month_start(start_date))
+        if end_date:
+            stmt = stmt.where(BarangRollup.bulan <= month_start(end_date))
+        if location_id:
+            stmt = stmt.where(BarangRollup.id_lokasi.in_(LokasiService.subtree_ids(location_id)))
+        if condition:
+            stmt = stmt.where(BarangRollup.kondisi == condition)
+        stmt = stmt.group_by(BarangRollup.bulan)
+        if group_col is not None:
+            stmt = stmt.group_by(group_col)
+        return dbsession.execute(stmt).all()
+
+    @staticmethod
+    def _daily_counts(dbsession, model, date_field, group_by, start_date, end_date, location_id, condition, options):
+        column = getattr(model, date_field)
+        day = _truncate_to_day(column, dbsession.get_bind().dialect.name)
+        group_col = RollupService._group_column(model, group_by)
+        columns = [day, group_col if group_col is not None else literal(None)]
+        stmt = select(*columns, func.count(model.id)).where(column.isnot(None))
+        if start_date:
+            stmt = stmt.where(column >= datetime.datetime.combine(start_date, datetime.time.min))
+        if end_date:
+            stmt = stmt.where(column < datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min))
+        if location_id:
+            stmt = stmt.where(model.id_lokasi.in_(LokasiService.subtree_ids(location_id)))
+        if condition:
+            stmt = stmt.where(model.kondisi == condition)
+        stmt = stmt.group_by(day)
+        if group_col is not None:
+            stmt = stmt.group_by(group_col)
+        return dbsession.execute(stmt, execution_options=options).all()
+
+    @staticmethod
+    def _group_names(dbsession, group_by, groups, options) -> dict:
+        if group_by == 'condition':
+            return {g: g.value for g in groups if g is not None}
+        if group_by == 'location' and groups:
+            return dict(dbsession.execute(
+                select(Lokasi.id, Lokasi.nama_lokasi).where(Lokasi.id.in_(groups)), execution_options=options
+            ).all())
+        return {}
@@ -0,0 +1,146 @@
+"""Hot in-memory index of assets by ``kode_barang`` for stocktake scanners.
+
+Lookups that hit the index never touch the database. Misses are loaded in
+one batched query and cached. ``BarangService`` and ``LokasiService`` record
+which codes their writes affect in ``dbsession.info``; once the session
+commits they are evicted, and a rollback discards them.
+
+A generation counter guards against a reader that loaded a row just before
+a concurrent commit putting the stale copy back after the eviction. Entries
+also expire after ``superbmd.scan_index_ttl`` seconds, which bounds how long
+another worker process can serve a record changed elsewhere.
+
+Activate with ``config.include('backend_superbmd.services.scan_index')``.
+"""
+import collections
+import threading
+import time
+
+from sqlalchemy import event, select
+
+from ..models.mymodel import Barang, Lokasi
+
+PENDING_KEY = 'scan_index_invalidations'
+# Penanda "hapus semua", mis. saat nama lokasi berubah
+ALL = object()
+
+
+def _record(row):
+    return {
+        'id': row.id,
+        'kode_barang': row.kode_barang,
+        'nama_barang': row.nama_barang,
+        'kondisi': row.kondisi.value,
+        'id_lokasi': row.id_lokasi,
+        'nama_lokasi': row.nama_lokasi,
+    }
+
+
+class ScanIndex:
+    """Bounded LRU of compact asset records keyed by ``kode_barang``."""
+
+    def __init__(self, max_size=100000, ttl=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, dbsession_factory, codes):
+        """Resolve ``codes`` to ``{kode_barang: record}``; unknown codes are left out.
+
+        ``dbsession_factory`` is only called when some code is not cached.
+        """
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generation
+            for code in codes:
+                entry = self._entries.get(code)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(code)
+                    found[code] = entry[1]
+                else:
+                    missing.append(code)
+            self.hits += len(found)
+            self.misses += len(missing)
+        if not missing:
+            return found
+
+        loaded = self._load(dbsession_factory(), missing)
+        found.update(loaded)
+        with self._lock:
+            # Ada penulisan yang di-commit selama query berjalan: jangan simpan salinan lama
+            if generation == self._generation:
+                expires = time.monotonic() + self.ttl
+                for code, record in loaded.items():
+                    self._entries[code] = (expires, record)
+                    self._entries.move_to_end(code)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return found
+
+    @staticmethod
+    def _load(dbsession, codes):
+        rows = dbsession.execute(
+            select(
+                Barang.id, Barang.kode_barang, Barang.nama_barang, Barang.kondisi,
+                Barang.id_lokasi, Lokasi.nama_lokasi,
+            )
+            .join(Lokasi, Lokasi.id == Barang.id_lokasi)
+            .where(Barang.kode_barang.in_(codes))
+        ).all()
+        return {row.kode_barang: _record(row) for row in rows}
+
+    def invalidate(self, codes):
+        with self._lock:
+            self._generation += 1
+            if ALL in codes:
+                self._entries.clear()
+                return
+            for code in codes:
+                self._entries.pop(code, None)
+
+    def clear(self):
+        self.invalidate({ALL})
+
+    def as_dict(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Satu indeks bersama per proses
+scan_index = ScanIndex()
+
+
+def record_scan_invalidation(dbsession, *codes):
+    """Evict ``codes`` from the scan index once ``dbsession`` commits."""
+    dbsession.info.setdefault(PENDING_KEY, set()).update(codes)
+
+
+def record_scan_invalidate_all(dbsession):
+    record_scan_invalidation(dbsession, ALL)
+
+
+def install_scan_invalidation(session_factory, index):
+    def after_commit(session):
+        codes = session.info.pop(PENDING_KEY, None)
+        if codes:
+            index.invalidate(codes)
+
+    def after_rollback(session):
+        session.info.pop(PENDING_KEY, None)
+
+    event.listen(session_factory, 'after_commit', after_commit)
+    event.listen(session_factory, 'after_rollback', after_rollback)
+
+
+def includeme(config):
+    settings = config.get_settings()
+    scan_index.max_size = int(settings.get('superbmd.scan_index_size', scan_index.max_size))
+    scan_index.ttl = float(settings.get('superbmd.scan_index_ttl', scan_index.ttl))
+    config.registry['scan_index'] = scan_index
+    install_scan_invalidation(config.registry['dbsession_factory'], scan_index)
@@ -0,0 +1,174 @@
+"""Coalescing of identical concurrent expensive GET requests (single-flight).
+
+Views declared with ``@view_config(..., coalesce=True)`` are wrapped by a
+view deriver. Requests for the same route, matchdict and query string that
+arrive while an identical request is being computed do not run the view:
+they wait for that one computation and get a copy of its rendered response
+(status, headers and body), so thirty dashboards opened at once cost one
+set of aggregate queries. Query parameters are compared sorted by name;
+repeated parameters keep their order.
+
+An error raised by the computing request is raised in every waiting request
+too; HTTP errors are shared as responses. Waiters give up after
+``superbmd.singleflight_timeout`` seconds with ``503`` and ``Retry-After``
+rather than piling their own copy of a slow query onto the database.
+
+Results are only shared while in flight, nothing is kept afterwards:
+freshness stays with the caches below (pivot, valuation and count caches,
+keyed by data version) and any ``Cache-Control`` header a view sets is
+passed on to every waiter. ``superbmd.singleflight = false`` turns
+coalescing off.
+
+Activate with ``config.include('backend_superbmd.services.singleflight')``.
+"""
+import threading
+
+from pyramid.httpexceptions import HTTPException
+from pyramid.response import Response
+from pyramid.settings import asbool
+
+from ..models.readonly import SAFE_METHODS
+
+
+class SingleFlightTimeout(Exception):
+    """Raised in a waiter whose in-flight computation took longer than the timeout."""
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs one computation per key at a time and hands its result to concurrent callers."""
+
+    def __init__(self, enabled=True, timeout=30.0):
+        self.enabled = enabled
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def do(self, key, compute):
+        """Return ``(result, shared)``: ``compute()``'s result, and whether another caller computed it."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = compute()
+            except Exception as e:
+                call.error = e
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                # Lepas kunci sebelum memberi tahu: permintaan sesudahnya menghitung ulang
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result, False
+
+        if not call.done.wait(self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise SingleFlightTimeout(key)
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    def in_flight(self, key):
+        """True while a computation for ``key`` runs, i.e. a new caller would only wait for it."""
+        with self._lock:
+            return key in self._calls
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'in_flight': len(self._calls),
+                'waiting': sum(call.waiters for call in self._calls.values()),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+            }
+
+
+def request_key(request, route=None, matchdict=None):
+    """Route, matchdict and sorted query parameters identifying an identical request.
+
+    ``route`` and ``matchdict`` stand in for the matched route before routing
+    has run (in a tween).
+    """
+    if route is None:
+        route, matchdict = request.matched_route, request.matchdict
+    name = route.name if route is not None else request.path
+    params = sorted(request.params.items(), key=lambda item: item[0])
+    return name, tuple(sorted((matchdict or {}).items())), tuple(params)
+
+
+def _freeze(view, context, request):
+    """Run ``view`` and keep only what every waiter needs to rebuild the response."""
+    try:
+        response = view(context, request)
+    except HTTPException as e:
+        response = e
+        response.prepare(request.environ)
+    return response.status, list(response.headerlist), response.body
+
+
+def _thaw(frozen):
+    status, headerlist, body = frozen
+    # Response baru per permintaan: tween (mis. CORS) boleh mengubah header tanpa saling ganggu
+    return Response(status=status, headerlist=list(headerlist), body=body)
+
+
+def coalesced_view(view, info):
+    if not info.options.get('coalesce'):
+        return view
+    singleflight = info.registry['singleflight']
+
+    def wrapper(context, request):
+        if not singleflight.enabled or request.method not in SAFE_METHODS:
+            return view(context, request)
+        try:
+            frozen, _ = singleflight.do(request_key(request), lambda: _freeze(view, context, request))
+        except SingleFlightTimeout:
+            response = Response(status=503, json_body={
+                'message': 'Permintaan yang sama masih diproses terlalu lama. Coba lagi sebentar lagi.'
+            })
+            response.headers['Retry-After'] = str(max(int(singleflight.timeout), 1))
+            return response
+        return _thaw(frozen)
+
+    return wrapper
+
+coalesced_view.options = ('coalesce',)
+
+
+# Satu registri in-flight bersama per proses
+singleflight = SingleFlight()
+
+
+def includeme(config):
+    settings = config.get_settings()
+    singleflight.enabled = asbool(settings.get('superbmd.singleflight', singleflight.enabled))
+    singleflight.timeout = float(settings.get('superbmd.singleflight_timeout', singleflight.timeout))
+    config.registry['singleflight'] = singleflight
+    config.add_view_deriver(coalesced_view)
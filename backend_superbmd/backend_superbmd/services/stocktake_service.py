@@ -0,0 +1,185 @@
+from typing import List, Optional
+from sqlalchemy import and_, delete, func, insert, select
+from ..models.mymodel import (
+    Barang, KondisiBarang, Lokasi, LokasiClosure, StocktakeScan, StocktakeSession, StocktakeStatus
+)
+from .barang_service import BarangService
+import datetime
+
+# Kategori hasil rekonsiliasi
+CATEGORIES = ('found', 'missing', 'unexpected', 'misplaced')
+
+
+class StocktakeClosedError(ValueError):
+    """Raised when scans or corrections are sent to a session that was already applied."""
+
+
+class StocktakeService:
+    """Service for stocktake (stock opname) sessions."""
+
+    @staticmethod
+    def create_session(dbsession, session_data: dict) -> StocktakeSession:
+        """Open a stocktake session for a location and its sub-locations."""
+        session = StocktakeSession(**session_data)
+        dbsession.add(session)
+        dbsession.flush()
+        return session
+
+    @staticmethod
+    def get_session(dbsession, session_id: int) -> Optional[StocktakeSession]:
+        return dbsession.get(StocktakeSession, session_id)
+
+    @staticmethod
+    def scan_count(dbsession, session_id: int) -> int:
+        return dbsession.execute(
+            select(func.count()).select_from(StocktakeScan).where(StocktakeScan.session_id == session_id)
+        ).scalar_one()
+
+    @staticmethod
+    def submit_scans(dbsession, session: StocktakeSession, id_lokasi: int, items: List[dict]) -> int:
+        """Stage a batch of scans; a code scanned again replaces its earlier scan.
+
+        ``items`` are ``{'kode_barang': ..., 'kondisi': ...}`` dicts (kondisi optional).
+        """
+        if session.status != StocktakeStatus.OPEN:
+            raise StocktakeClosedError('Sesi stock opname sudah diterapkan dan tidak bisa diubah.')
+        now = datetime.datetime.now()
+        # Kode yang sama dalam satu batch: scan terakhir yang dipakai
+        rows = {
+            item['kode_barang']: {
+                'session_id': session.id,
+                'kode_barang': item['kode_barang'],
+                'id_lokasi': id_lokasi,
+                'kondisi': KondisiBarang(item['kondisi']) if item.get('kondisi') else None,
+                'scanned_at': now,
+            }
+            for item in items
+        }
+        if not rows:
+            return 0
+        dbsession.execute(delete(StocktakeScan).where(
+            StocktakeScan.session_id == session.id, StocktakeScan.kode_barang.in_(rows)
+        ))
+        dbsession.execute(insert(StocktakeScan), list(rows.values()))
+        return len(rows)
+
+    @staticmethod
+    def reconcile(dbsession, session: StocktakeSession, details: bool = True) -> dict:
+        """Compare the staged scans with the register.
+
+        * found: scanned where the register says it is
+        * misplaced: registered, but scanned at another location
+        * unexpected: scanned code that is not in the register
+        * missing: registered under the session's location, not scanned
+
+        Each category is one set-based join between ``stocktake_scan`` (PK
+        ``session_id, kode_barang``) and ``barang`` (unique ``kode_barang``).
+        """
+        scan = StocktakeScan
+        scan_lokasi = Lokasi.__table__.alias('scan_lokasi')
+        register_lokasi = Lokasi.__table__.alias('register_lokasi')
+
+        scanned = (
+            select(
+                Barang.id, scan.kode_barang, Barang.nama_barang,
+                Barang.kondisi, scan.kondisi.label('kondisi_scan'),
+                Barang.id_lokasi, register_lokasi.c.nama_lokasi,
+                scan.id_lokasi.label('id_lokasi_scan'), scan_lokasi.c.nama_lokasi.label('nama_lokasi_scan'),
+            )
+            .join(Barang, Barang.kode_barang == scan.kode_barang)
+            .join(register_lokasi, register_lokasi.c.id == Barang.id_lokasi)
+            .join(scan_lokasi, scan_lokasi.c.id == scan.id_lokasi)
+            .where(scan.session_id == session.id)
+            .order_by(scan.kode_barang)
+        )
+        unexpected = (
+            select(scan.kode_barang, scan.kondisi.label('kondisi_scan'),
+                   scan.id_lokasi.label('id_lokasi_scan'), scan_lokasi.c.nama_lokasi.label('nama_lokasi_scan'))
+            .outerjoin(Barang, Barang.kode_barang == scan.kode_barang)
+            .join(scan_lokasi, scan_lokasi.c.id == scan.id_lokasi)
+            .where(scan.session_id == session.id, Barang.id.is_(None))
+            .order_by(scan.kode_barang)
+        )
+        missing = (
+            select(Barang.id, Barang.kode_barang, Barang.nama_barang, Barang.kondisi,
+                   Barang.id_lokasi, Lokasi.nama_lokasi)
+            .join(LokasiClosure, LokasiClosure.descendant_id == Barang.id_lokasi)
+            .join(Lokasi, Lokasi.id == Barang.id_lokasi)
+            .outerjoin(scan, and_(scan.session_id == session.id, scan.kode_barang == Barang.kode_barang))
+            .where(LokasiClosure.ancestor_id == session.id_lokasi, scan.kode_barang.is_(None))
+            .order_by(Barang.kode_barang)
+        )
+
+        result = {name: [] for name in CATEGORIES}
+        for row in dbsession.execute(scanned):
+            record = StocktakeService._record(row)
+            record['id_lokasi_scan'] = row.id_lokasi_scan
+            record['nama_lokasi_scan'] = row.nama_lokasi_scan
+            record['kondisi_scan'] = row.kondisi_scan.value if row.kondisi_scan else None
+            result['found' if row.id_lokasi == row.id_lokasi_scan else 'misplaced'].append(record)
+        for row in dbsession.execute(unexpected):
+            result['unexpected'].append({
+                'kode_barang': row.kode_barang,
+                'kondisi_scan': row.kondisi_scan.value if row.kondisi_scan else None,
+                'id_lokasi_scan': row.id_lokasi_scan,
+                'nama_lokasi_scan': row.nama_lokasi_scan,
+            })
+        for row in dbsession.execute(missing):
+            result['missing'].append(StocktakeService._record(row))
+
+        summary = {name: len(result[name]) for name in CATEGORIES}
+        summary['condition_changes'] = sum(
+            1 for name in ('found', 'misplaced') for r in result[name]
+            if r['kondisi_scan'] and r['kondisi_scan'] != r['kondisi']
+        )
+        if not details:
+            return {'summary': summary}
+        return dict(result, summary=summary)
+
+    @staticmethod
+    def _record(row) -> dict:
+        return {
+            'id': row.id,
+            'kode_barang': row.kode_barang,
+            'nama_barang': row.nama_barang,
+            'kondisi': row.kondisi.value,
+            'id_lokasi': row.id_lokasi,
+            'nama_lokasi': row.nama_lokasi,
+        }
+
+    @staticmethod
+    def apply_corrections(dbsession, session: StocktakeSession,
+                          locations: bool = True, conditions: bool = True) -> dict:
+        """Move misplaced assets to where they were scanned and/or take over scanned conditions.
+
+        The affected assets are selected with one join and updated through
+        ``BarangService.bulk_update_barang``. The session is then closed.
+        """
+        if session.status != StocktakeStatus.OPEN:
+            raise StocktakeClosedError('Sesi stock opname sudah diterapkan dan tidak bisa diubah.')
+        scan = StocktakeScan
+        rows = dbsession.execute(
+            select(Barang.id, Barang.id_lokasi, Barang.kondisi,
+                   scan.id_lokasi.label('id_lokasi_scan'), scan.kondisi.label('kondisi_scan'))
+            .join(Barang, Barang.kode_barang == scan.kode_barang)
+            .where(scan.session_id == session.id)
+        ).all()
+
+        changes = []
+        moved = recondition = 0
+        for row in rows:
+            change = {'id': row.id}
+            if locations and row.id_lokasi_scan != row.id_lokasi:
+                change['id_lokasi'] = row.id_lokasi_scan
+                moved += 1
+            if conditions and row.kondisi_scan is not None and row.kondisi_scan != row.kondisi:
+                change['kondisi'] = row.kondisi_scan
+                recondition += 1
+            if len(change) > 1:
+                changes.append(change)
+
+        updated = BarangService.bulk_update_barang(dbsession, changes)
+        session.status = StocktakeStatus.APPLIED
+        session.applied_at = datetime.datetime.now()
+        dbsession.flush()
+        return {'updated': updated, 'moved': moved, 'condition_changed': recondition}
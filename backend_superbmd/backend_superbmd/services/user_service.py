@@ -1,28 +1,67 @@
-from typing import List, Optional
-from ..models.mymodel import User, UserRole # Import UserRole jika perlu
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from ..models.mymodel import Barang, User, UserRole # Import UserRole jika perlu
+from .barang_service import BarangService
+from .pagination import order_by_columns, paginate
 # Hapus import hash_password karena autentikasi dipindahkan ke frontend
 # from ..security.auth import hash_password 
 
 class UserService:
     """Service for user operations."""
 
+    # Kunci sort yang diizinkan; masing-masing didukung indeks (kolom, id)
+    SORT_KEYS = {
+        'username': (User.username,),
+        'role': (User.role,),
+    }
+
     @staticmethod
     def get_all_users(dbsession, search_term: Optional[str] = None) -> List[User]:
         """Get all users, with optional search."""
-        query = dbsession.query(User)
+        stmt = select(User)
+        if search_term:
+            stmt = stmt.where(User.username.ilike(f'%{search_term}%'))
+        return dbsession.execute(stmt).scalars().all()
+
+    @staticmethod
+    def get_users_page(
+        dbsession, page: int, limit: int, count: str = 'exact', search_term: Optional[str] = None,
+        sort: Optional[str] = None
+    ) -> Tuple[List[User], dict]:
+        """One page of users plus pagination."""
+        order_by = order_by_columns(sort, UserService.SORT_KEYS, User.id)
+        stmt = select(User)
         if search_term:
-            query = query.filter(User.username.ilike(f'%{search_term}%'))
-        return query.all()
+            stmt = stmt.where(User.username.ilike(f'%{search_term}%'))
+        rows, pagination = paginate(
+            dbsession, stmt.order_by(*order_by), page, limit, count, table='users', filters={'search': search_term}
+        )
+        return [row.User for row in rows], pagination
 
     @staticmethod
     def get_user_by_id(dbsession, user_id: int) -> Optional[User]:
         """Get user by ID."""
-        return dbsession.query(User).get(user_id) # Menggunakan .get() untuk PK
+        return dbsession.get(User, user_id) # Identity map dulu, lalu load PK yang sudah di-cache
 
     @staticmethod
     def get_user_by_username(dbsession, username: str) -> Optional[User]:
         """Get user by username."""
-        return dbsession.query(User).filter(User.username == username).first()
+        stmt = select(User).where(User.username == username).limit(1)
+        return dbsession.execute(stmt).scalars().first()
+
+    @staticmethod
+    def get_barang_counts(dbsession, user_ids: List[int]) -> Dict[int, int]:
+        """Number of assets each of ``user_ids`` is responsible for (absent users have none).
+
+        One grouped read of the ``(id_penanggung_jawab, id)`` index.
+        """
+        if not user_ids:
+            return {}
+        return dict(dbsession.execute(
+            select(Barang.id_penanggung_jawab, func.count())
+            .where(Barang.id_penanggung_jawab.in_(user_ids))
+            .group_by(Barang.id_penanggung_jawab)
+        ).all())
 
     @staticmethod
     def create_user(dbsession, user_data: dict) -> User:
@@ -50,15 +89,20 @@ class UserService:
             user.role = UserRole(update_data['role'])
             del update_data['role'] # Hapus dari update_data
 
+        renamed = 'username' in update_data and update_data['username'] != user.username
         for field, value in update_data.items():
             setattr(user, field, value) # Update field lainnya
 
         dbsession.add(user) # Pastikan objek tetap dikelola oleh sesi
         dbsession.flush()
+        if renamed:
+            # Nama penanggung jawab pada barang mengikuti username baru
+            BarangService.rename_penanggung_jawab(dbsession, user.id, user.username)
         return user
 
     @staticmethod
     def delete_user(dbsession, user: User) -> None:
-        """Delete a user."""
+        """Delete a user; their assets keep the name but lose the link."""
+        BarangService.unlink_penanggung_jawab(dbsession, user.id)
         dbsession.delete(user)
         dbsession.flush()
\ No newline at end of file
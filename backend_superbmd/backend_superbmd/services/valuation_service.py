@@ -0,0 +1,201 @@
+"""Book value and accumulated depreciation of the asset register as of a date.
+
+The depreciable register (assets with a ``nilai_perolehan`` entered on or
+before the as-of date) is read in one query and valued column-wise: elapsed
+months, depreciated fraction and book value are NumPy array expressions
+over all assets at once, then summed per (location, condition) group.
+Amounts are integer sen, so totals add up exactly. Without NumPy the same
+formulas run per asset in Python.
+
+Depreciation counts the month of ``tanggal_masuk`` as a full month and runs
+over ``umur_manfaat`` years: ``garis_lurus`` writes off an equal share each
+month, ``saldo_menurun`` applies double declining balance, ``(1 - 2 /
+umur) ** tahun``, and writes off the remainder at the end of the useful
+life. Assets without a useful life (land, for example) are not depreciated.
+
+Group totals are cached per (as-of date, asset data version); location and
+condition filters and location names are applied on every request.
+
+Activate with ``config.include('backend_superbmd.services.valuation_service')``.
+"""
+import datetime
+
+from sqlalchemy import BigInteger, Integer, case, cast, extract, func, select
+
+from ..models.mymodel import Barang, KondisiBarang, Lokasi, MetodePenyusutan
+from .lokasi_service import LokasiService
+from .pagination import TTLCache
+from .pivot_service import PivotService
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - tergantung lingkungan
+    numpy = None
+
+_KONDISI = list(KondisiBarang)
+_KONDISI_CODE = {kondisi: code for code, kondisi in enumerate(_KONDISI)}
+# Urutan nilai per kelompok: jumlah, nilai perolehan, akumulasi penyusutan, nilai buku
+FIELDS = ('jumlah', 'nilai_perolehan', 'akumulasi_penyusutan', 'nilai_buku')
+
+# Satu cache bersama per proses
+valuation_cache = TTLCache(max_size=64, ttl=3600.0)
+
+
+def _month_index(value) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def _month_index_sql(dialect_name):
+    """``tahun * 12 + bulan - 1`` of ``tanggal_masuk`` as an SQL integer expression."""
+    if dialect_name == 'sqlite':
+        year = cast(func.strftime('%Y', Barang.tanggal_masuk), Integer)
+        month = cast(func.strftime('%m', Barang.tanggal_masuk), Integer)
+    else:
+        year = cast(extract('year', Barang.tanggal_masuk), Integer)
+        month = cast(extract('month', Barang.tanggal_masuk), Integer)
+    return year * 12 + month - 1
+
+
+def _fraction(months: int, umur: int, saldo_menurun: int) -> float:
+    """Depreciated share of the acquisition value after ``months`` (per asset, Python)."""
+    if not umur:
+        return 0.0
+    if months >= umur * 12:
+        return 1.0
+    if saldo_menurun:
+        return 1.0 - (1.0 - min(2.0 / umur, 1.0)) ** (months / 12)
+    return months / (umur * 12)
+
+
+class ValuationService:
+    """Service for asset valuation and depreciation."""
+
+    @staticmethod
+    def _register(dbsession, as_of: datetime.date) -> list:
+        """Depreciable assets as integer tuples, see ``compute_groups``.
+
+        Every column is encoded in the database, so rows arrive as plain
+        integers: no per-row Decimal, datetime or enum conversion here.
+        """
+        dialect_name = dbsession.get_bind().dialect.name
+        return dbsession.execute(
+            select(
+                Barang.id_lokasi,
+                case(*[(Barang.kondisi == kondisi, code) for kondisi, code in _KONDISI_CODE.items()]),
+                _month_index_sql(dialect_name),
+                cast(func.round(Barang.nilai_perolehan * 100), BigInteger),
+                func.coalesce(Barang.umur_manfaat, 0),
+                case((Barang.metode_penyusutan == MetodePenyusutan.SALDO_MENURUN, 1), else_=0),
+            ).where(
+                Barang.nilai_perolehan.is_not(None),
+                Barang.tanggal_masuk < as_of + datetime.timedelta(days=1),
+            )
+        ).all()
+
+    @staticmethod
+    def compute_groups(rows: list, as_of: datetime.date) -> dict:
+        """Sum register ``rows`` per (location, condition) as of ``as_of``.
+
+        ``rows`` are ``(id_lokasi, kondisi code, month index of tanggal_masuk,
+        nilai_perolehan in sen, umur_manfaat or 0, 1 for saldo_menurun)``.
+        Returns ``{(id_lokasi, kondisi): [jumlah, perolehan, akumulasi, buku]}`` in sen.
+        """
+        if numpy is None:
+            return ValuationService._compute_groups_python(rows, as_of)
+        if not rows:
+            return {}
+        # fromiter membaca nilai langsung tanpa membangun list per baris
+        register = numpy.fromiter(
+            (value for row in rows for value in row), dtype=numpy.int64, count=len(rows) * 6
+        ).reshape(-1, 6)
+        id_lokasi, kondisi, masuk, sen, umur, saldo_menurun = register.T
+        months = _month_index(as_of) + 1 - masuk
+        life = umur * 12
+
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            straight = months / life
+            rate = numpy.minimum(2.0 / umur, 1.0)
+            balance = 1.0 - (1.0 - rate) ** (months / 12)
+        fraction = numpy.where(saldo_menurun == 1, balance, straight)
+        fraction = numpy.where(months >= life, 1.0, fraction)
+        fraction = numpy.where(umur > 0, fraction, 0.0)
+        akumulasi = numpy.rint(sen * fraction).astype(numpy.int64)
+
+        # Urutkan per kunci (lokasi, kondisi) lalu jumlahkan tiap rentang; int64 tetap eksak
+        keys = id_lokasi * len(_KONDISI) + kondisi
+        order = numpy.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = numpy.flatnonzero(numpy.r_[True, keys[1:] != keys[:-1]])
+        values = numpy.stack([numpy.ones_like(sen), sen, akumulasi, sen - akumulasi], axis=1)[order]
+        totals = numpy.add.reduceat(values, starts, axis=0)
+        return {
+            (key // len(_KONDISI), _KONDISI[key % len(_KONDISI)]): group
+            for key, group in zip(keys[starts].tolist(), totals.tolist())
+        }
+
+    @staticmethod
+    def _compute_groups_python(rows: list, as_of: datetime.date) -> dict:
+        groups = {}
+        as_of_month = _month_index(as_of)
+        for id_lokasi, kondisi, masuk, sen, umur, saldo_menurun in rows:
+            akumulasi = round(sen * _fraction(as_of_month + 1 - masuk, umur, saldo_menurun))
+            totals = groups.setdefault((id_lokasi, _KONDISI[kondisi]), [0, 0, 0, 0])
+            for i, value in enumerate((1, sen, akumulasi, sen - akumulasi)):
+                totals[i] += value
+        return groups
+
+    @staticmethod
+    def valuation(dbsession, as_of: datetime.date, location_id=None, condition=None) -> dict:
+        """Totals of the register as of ``as_of``, overall and per location and condition.
+
+        ``location_id`` restricts to that location and its sub-locations.
+        Only call this from read-only transactions (see ``PivotService.pivot``).
+        """
+        key = (as_of, PivotService.data_version(dbsession))
+        groups = valuation_cache.get(key)
+        if groups is None:
+            groups = ValuationService.compute_groups(ValuationService._register(dbsession, as_of), as_of)
+            valuation_cache.put(key, groups)
+
+        if location_id:
+            lokasi_ids = set(dbsession.execute(LokasiService.subtree_ids(location_id)).scalars())
+            groups = {k: v for k, v in groups.items() if k[0] in lokasi_ids}
+        if condition:
+            groups = {k: v for k, v in groups.items() if k[1] == condition}
+
+        total = [0] * len(FIELDS)
+        by_location, by_condition = {}, {kondisi: [0] * len(FIELDS) for kondisi in KondisiBarang}
+        for (id_lokasi, kondisi), values in groups.items():
+            location = by_location.setdefault(id_lokasi, [0] * len(FIELDS))
+            for i, value in enumerate(values):
+                total[i] += value
+                location[i] += value
+                by_condition[kondisi][i] += value
+
+        nama_lokasi = dict(dbsession.execute(
+            select(Lokasi.id, Lokasi.nama_lokasi).where(Lokasi.id.in_(by_location))
+        ).all())
+        return {
+            'as_of': as_of.isoformat(),
+            'total': _amounts(total),
+            'by_location': [
+                dict(_amounts(values), id_lokasi=id_lokasi, nama_lokasi=nama_lokasi.get(id_lokasi, ''))
+                for id_lokasi, values in sorted(by_location.items(), key=lambda item: nama_lokasi.get(item[0], ''))
+            ],
+            'by_condition': [
+                dict(_amounts(values), kondisi=kondisi.value) for kondisi, values in by_condition.items()
+            ],
+        }
+
+
+def _amounts(values) -> dict:
+    """Group totals in sen as a JSON dict in rupiah."""
+    jumlah, *amounts = values
+    return dict(zip(FIELDS, [jumlah] + [sen / 100 for sen in amounts]))
+
+
+def includeme(config):
+    settings = config.get_settings()
+    valuation_cache.max_size = int(settings.get('superbmd.valuation_cache_size', valuation_cache.max_size))
+    valuation_cache.ttl = float(settings.get('superbmd.valuation_cache_ttl', valuation_cache.ttl))
+    config.registry['valuation_cache'] = valuation_cache
@@ -10,7 +10,8 @@ from .user_views import (
     users_create,
     users_detail,
     users_update,
-    users_delete
+    users_delete,
+    users_barang
 )
 from .lokasi_views import (
     lokasi_list,    lokasi_create,
@@ -23,13 +24,29 @@ from .barang_views import (
     barang_create,
     barang_detail,
     barang_update,
-    barang_delete
+    barang_delete,
+    barang_changes,
+    barang_labels,
+    barang_transfer,
+    barang_transfers
 )
-from .dashboard_views import dashboard_data
+from .dashboard_views import dashboard_data, dashboard_stream
 from .report_views import (
     report_assets_by_location,
     report_assets_by_condition,
-    report_assets_in_out
+    report_assets_in_out,
+    report_assets_timeseries,
+    report_pivot,
+    report_valuation
+)
+from .metrics_views import metrics
+from .scan_views import scan
+from .stocktake_views import (
+    stocktake_create,
+    stocktake_detail,
+    stocktake_scans,
+    stocktake_reconciliation,
+    stocktake_apply
 )
 
 # Setelah mengimpornya di sini, config.scan('superbmd_backend.views')
@@ -2,35 +2,85 @@
 from pyramid.view import view_config
 from pyramid.response import Response
 from pyramid.httpexceptions import HTTPNotFound, HTTPBadRequest # HTTPForbidden mungkin tidak lagi diperlukan
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError, DBAPIError
 from marshmallow import ValidationError
 import logging
 import datetime
 
-from ..schemas.myschema import BarangSchema, BarangCreateSchema, BarangUpdateSchema, BarangListSchema
-from ..models.mymodel import Barang, Lokasi
-from ..services.barang_service import BarangService
+from ..schemas.myschema import (
+    BarangSchema, BarangCreateSchema, BarangUpdateSchema, BarangListSchema,
+    BarangTransferSchema, BarangTransferHistorySchema
+)
+from ..models.mymodel import Barang, BarangTombstone, Lokasi
+from ..services.barang_service import BarangService, InvalidFacetError
 from ..services.lokasi_service import LokasiService
+from ..services.user_service import UserService
+from ..services.label_service import LabelRenderingUnavailable
+from ..services.pagination import COUNT_MODES, InvalidPageError, InvalidSortError, page_params
+from ..services.job_queue import job_handler
+from .job_views import offload, should_offload
 
 log = logging.getLogger(__name__)
 
+# Batas jumlah perubahan per halaman feed delta-sync
+CHANGES_DEFAULT_LIMIT = 500
+CHANGES_MAX_LIMIT = 5000
+# Batas jumlah label per permintaan cetak
+LABELS_MAX_ASSETS = 10000
+# Batas jumlah label per job latar belakang, dan jumlah QR yang dirender per langkah progres
+LABELS_JOB_MAX_ASSETS = 100000
+LABELS_JOB_CHUNK = 1000
+
 # Schema instances
 barang_schema = BarangSchema()
 barang_create_schema = BarangCreateSchema()
 barang_update_schema = BarangUpdateSchema()
 barang_list_schema = BarangListSchema()
+barang_transfer_schema = BarangTransferSchema()
+barang_transfer_history_schema = BarangTransferHistorySchema(many=True)
+
+def _barang_to_dict(b, nama_lokasi):
+    """Flat JSON representation of a Barang used by the list endpoints."""
+    return {
+        'id': b.id,
+        'nama_barang': b.nama_barang,
+        'kode_barang': b.kode_barang,
+        'kondisi': b.kondisi.value,
+        'id_lokasi': b.id_lokasi,
+        'penanggung_jawab': b.penanggung_jawab,
+        'id_penanggung_jawab': b.id_penanggung_jawab,
+        'tanggal_masuk': b.tanggal_masuk.strftime('%Y-%m-%d') if b.tanggal_masuk else None,
+        'tanggal_pembaruan': b.tanggal_pembaruan.strftime('%Y-%m-%d') if b.tanggal_pembaruan else None,
+        'gambar_aset': b.gambar_aset,
+        'nilai_perolehan': str(b.nilai_perolehan) if b.nilai_perolehan is not None else None,
+        'umur_manfaat': b.umur_manfaat,
+        'metode_penyusutan': b.metode_penyusutan.value if b.metode_penyusutan else None,
+        'created_at': b.created_at.isoformat() if b.created_at else None,
+        'updated_at': b.updated_at.isoformat() if b.updated_at else None,
+        'nama_lokasi': nama_lokasi
+    }
 
 @view_config(route_name='barang_list', renderer='json', request_method='GET') # Hapus permission
 def barang_list(request):
     """
     Retrieves a paginated list of items. Accessible by anyone.
+    Query params: count (exact|estimate|none, default exact) selects how total_items is computed;
+    sort (<key> or -<key> for descending) orders the whole result, with id as tiebreaker;
+    facets (comma separated: kondisi,id_lokasi,penanggung_jawab) adds value counts for the current filters.
     """
-    page = int(request.params.get('page', 1))
-    limit = int(request.params.get('limit', 10))
+    try:
+        page, limit = page_params(request.params)
+    except InvalidPageError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
+    count_mode = request.params.get('count', 'exact')
+    if count_mode not in COUNT_MODES:
+        raise HTTPBadRequest(json_body={'message': 'count harus exact, estimate atau none.'})
     search_term = request.params.get('search', '').strip()
     location_id_filter = request.params.get('location_id')
     condition_filter = request.params.get('condition')
     penanggung_jawab_filter = request.params.get('penanggung_jawab')
+    id_penanggung_jawab_filter = request.params.get('id_penanggung_jawab')
     start_date_filter = request.params.get('start_date')
     end_date_filter = request.params.get('end_date')
 
@@ -38,53 +88,188 @@ def barang_list(request):
     # current_user_roles = request.identity.get('role')
     # current_username = request.identity.get('sub')
 
-    all_barang = BarangService.get_all_barang(
-        request.dbsession,
-        search_term=search_term,
-        location_id=int(location_id_filter) if location_id_filter else None,
-        condition=condition_filter,
-        penanggung_jawab=penanggung_jawab_filter,
-        start_date=start_date_filter,
-        end_date=end_date_filter
-    )
+    filters = {
+        'search_term': search_term,
+        'location_id': int(location_id_filter) if location_id_filter else None,
+        'condition': condition_filter,
+        'penanggung_jawab': penanggung_jawab_filter,
+        'start_date': start_date_filter,
+        'end_date': end_date_filter,
+        'id_penanggung_jawab': int(id_penanggung_jawab_filter) if id_penanggung_jawab_filter else None,
+    }
+    try:
+        rows, pagination = BarangService.get_barang_page(
+            request.dbsession, page, limit, count_mode, sort=request.params.get('sort'), **filters
+        )
+    except InvalidSortError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
 
     # Hapus filtering ini karena otorisasi di frontend
     # if current_user_roles == 'penanggung_jawab':
     #     all_barang = [b for b in all_barang if b.penanggung_jawab == current_username]
 
-    total_items = len(all_barang)
-    barang = all_barang[(page - 1) * limit : page * limit]
-    total_pages = (total_items + limit - 1) // limit
-    
-    lokasi_map = {lok.id: lok.nama_lokasi for lok in request.dbsession.query(Lokasi).all()}
-    barang_with_lokasi = []
-    for b in barang:
-        data = {
-            'id': b.id,
-            'nama_barang': b.nama_barang,
-            'kode_barang': b.kode_barang,
-            'kondisi': b.kondisi.value,
-            'id_lokasi': b.id_lokasi,
-            'penanggung_jawab': b.penanggung_jawab,
-            'tanggal_masuk': b.tanggal_masuk.strftime('%Y-%m-%d') if b.tanggal_masuk else None,
-            'tanggal_pembaruan': b.tanggal_pembaruan.strftime('%Y-%m-%d') if b.tanggal_pembaruan else None,
-            'gambar_aset': b.gambar_aset,
-            'created_at': b.created_at.isoformat() if b.created_at else None,
-            'updated_at': b.updated_at.isoformat() if b.updated_at else None,
-            'nama_lokasi': lokasi_map.get(b.id_lokasi, '')
-        }
-        barang_with_lokasi.append(data)
+    # Paginasi di SQL; nama lokasi ikut dari join, tidak perlu memuat semua lokasi
+    result = {
+        'items': [_barang_to_dict(b, nama_lokasi) for b, nama_lokasi in rows],
+        'pagination': pagination
+    }
+    facets = request.params.get('facets')
+    if facets:
+        try:
+            result['facets'] = BarangService.get_facets(
+                request.dbsession, [name.strip() for name in facets.split(',') if name.strip()], **filters
+            )
+        except InvalidFacetError as e:
+            raise HTTPBadRequest(json_body={'message': str(e)})
+    return result
+
+@view_config(route_name='barang_changes', renderer='json', request_method='GET')
+def barang_changes(request):
+    """
+    Delta-sync feed: assets inserted/updated and tombstones for deletions since a token.
+    Query params: since (token from the previous response, 0 for a full sync), limit
+    """
+    try:
+        since = int(request.params.get('since', 0))
+        limit = min(int(request.params.get('limit', CHANGES_DEFAULT_LIMIT)), CHANGES_MAX_LIMIT)
+    except ValueError:
+        raise HTTPBadRequest(json_body={'message': 'Parameter since/limit tidak valid.'})
+    if since < 0 or limit < 1:
+        raise HTTPBadRequest(json_body={'message': 'Parameter since/limit tidak valid.'})
+
+    changes, has_more = BarangService.get_changes_since(request.dbsession, since, limit)
+
+    lokasi_ids = {obj.id_lokasi for _, obj in changes if isinstance(obj, Barang)}
+    lokasi_map = {}
+    if lokasi_ids:
+        lokasi_map = dict(request.dbsession.execute(
+            select(Lokasi.id, Lokasi.nama_lokasi).where(Lokasi.id.in_(lokasi_ids))
+        ).all())
+
+    items = []
+    deleted = []
+    for seq, obj in changes:
+        if isinstance(obj, BarangTombstone):
+            deleted.append({'id': obj.id_barang, 'kode_barang': obj.kode_barang, 'change_seq': seq})
+        else:
+            data = _barang_to_dict(obj, lokasi_map.get(obj.id_lokasi, ''))
+            data['change_seq'] = seq
+            items.append(data)
 
     return {
-        'items': barang_with_lokasi,
-        'pagination': {
-            'total_items': total_items,
-            'total_pages': total_pages,
-            'current_page': page,
-            'items_per_page': limit
-        }
+        'items': items,
+        'deleted': deleted,
+        'next_token': str(changes[-1][0] if changes else since),
+        'has_more': has_more
     }
 
+@job_handler('barang_labels')
+def _labels_job(job):
+    """HTML label sheet of every asset under ``params['location_id']``."""
+    try:
+        location_id = int(job.params['location_id'])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPBadRequest(json_body={'message': 'Parameter location_id wajib berupa angka.'})
+    renderer = job.registry['label_renderer']
+    if not renderer.available():
+        raise LabelRenderingUnavailable('Paket segno belum terpasang; label QR tidak bisa dibuat.')
+    rows = BarangService.get_label_rows(job.dbsession, location_id, LABELS_JOB_MAX_ASSETS + 1)
+    if len(rows) > LABELS_JOB_MAX_ASSETS:
+        raise HTTPBadRequest(json_body={
+            'message': f'Lokasi memiliki lebih dari {LABELS_JOB_MAX_ASSETS} barang. Cetak label per sub-lokasi.',
+        })
+    # QR dirender per potongan agar progres terlihat; render_html lalu memakai cache
+    for start in range(0, len(rows), LABELS_JOB_CHUNK):
+        renderer.qr_paths([(row[0], row[1]) for row in rows[start:start + LABELS_JOB_CHUNK]])
+        job.progress(0.9 * (start + LABELS_JOB_CHUNK) / len(rows))
+    return 'text/html; charset=utf-8', renderer.render_html(rows)
+
+@view_config(route_name='barang_labels', request_method='GET')
+def barang_labels(request):
+    """
+    Printable QR label sheets (A4, 3 x 8) for all assets under a location.
+    Query params: location_id (required), format (html|svg), page (for svg, 1-based), background
+    HTML sheets of more than superbmd.jobs_offload_labels assets are answered with 202 and a job.
+    Locations with more than LABELS_MAX_ASSETS assets are refused (400) unless offloaded.
+    """
+    try:
+        location_id = int(request.params['location_id'])
+        page = int(request.params.get('page', 1))
+    except (KeyError, ValueError):
+        raise HTTPBadRequest(json_body={'message': 'Parameter location_id wajib berupa angka.'})
+    output_format = request.params.get('format', 'html')
+    if output_format not in ('html', 'svg'):
+        raise HTTPBadRequest(json_body={'message': 'format harus html atau svg.'})
+    if not LokasiService.get_lokasi_by_id(request.dbsession, location_id):
+        raise HTTPNotFound(json_body={'message': 'Lokasi tidak ditemukan.'})
+
+    # Satu baris lebih dari batas: label tidak boleh terpotong diam-diam
+    rows = BarangService.get_label_rows(request.dbsession, location_id, LABELS_MAX_ASSETS + 1)
+    renderer = request.registry['label_renderer']
+    if output_format == 'html' and renderer.available() and should_offload(
+        request, request.registry['job_queue'].offload_labels, lambda: len(rows)
+    ):
+        return offload(request, 'barang_labels')
+    if len(rows) > LABELS_MAX_ASSETS:
+        raise HTTPBadRequest(json_body={
+            'message': f'Lokasi memiliki lebih dari {LABELS_MAX_ASSETS} barang. '
+                       'Gunakan format=html dengan background=true, atau cetak label per sub-lokasi.',
+        })
+    try:
+        if output_format == 'html':
+            return Response(renderer.render_html(rows), content_type='text/html', charset='utf-8')
+        pages = renderer.render_pages(rows)
+    except LabelRenderingUnavailable as e:
+        return Response(status=501, json_body={'message': str(e)})
+
+    if not 1 <= page <= len(pages):
+        raise HTTPNotFound(json_body={'message': 'Halaman label tidak ditemukan.'})
+    response = Response(pages[page - 1], content_type='image/svg+xml', charset='utf-8')
+    response.headers['X-Total-Pages'] = str(len(pages))
+    return response
+
+@view_config(route_name='barang_transfer', renderer='json', request_method='POST')
+def barang_transfer(request):
+    """
+    Moves many assets to another location in one statement and records the transfer history.
+    Body: {"id_lokasi_tujuan": <id>, "ids": [...]} or {"id_lokasi_tujuan": <id>, "filter": {<barang_list filters>}},
+    plus optional "petugas" and "catatan". Assets already at the destination are skipped.
+    """
+    try:
+        transfer_data = barang_transfer_schema.load(request.json_body)
+    except ValidationError as e:
+        raise HTTPBadRequest(json_body={'message': 'Invalid request body', 'errors': e.messages})
+    except ValueError:
+        raise HTTPBadRequest(json_body={'message': 'Body harus berupa JSON.'})
+
+    if ('ids' in transfer_data) == ('filter' in transfer_data):
+        raise HTTPBadRequest(json_body={'message': 'Isi salah satu dari ids atau filter.'})
+    if not LokasiService.get_lokasi_by_id(request.dbsession, transfer_data['id_lokasi_tujuan']):
+        raise HTTPBadRequest(json_body={'message': 'Lokasi tujuan tidak ditemukan.'})
+
+    transferred = BarangService.transfer_barang(
+        request.dbsession,
+        transfer_data['id_lokasi_tujuan'],
+        ids=transfer_data.get('ids'),
+        filters=transfer_data.get('filter'),
+        petugas=transfer_data.get('petugas'),
+        catatan=transfer_data.get('catatan'),
+    )
+    log.info(f"{transferred} barang dipindahkan ke lokasi {transfer_data['id_lokasi_tujuan']}.")
+    return {'transferred': transferred}
+
+@view_config(route_name='barang_transfers', renderer='json', request_method='GET')
+def barang_transfers(request):
+    """
+    Transfer history of one asset, newest first.
+    Query params: barang_id (required)
+    """
+    try:
+        barang_id = int(request.params['barang_id'])
+    except (KeyError, ValueError):
+        raise HTTPBadRequest(json_body={'message': 'Parameter barang_id wajib berupa angka.'})
+    return barang_transfer_history_schema.dump(BarangService.get_transfers(request.dbsession, barang_id))
+
 @view_config(route_name='barang_create', renderer='json', request_method='POST') # Hapus permission
 def barang_create(request):
     """
@@ -99,7 +284,11 @@ def barang_create(request):
     if not LokasiService.get_lokasi_by_id(request.dbsession, barang_data['id_lokasi']):
         raise HTTPBadRequest(json_body={'message': 'ID Lokasi tidak ditemukan.'})
 
-    if BarangService.get_barang_by_kode(request.dbsession, barang_data['kode_barang']):
+    if barang_data.get('id_penanggung_jawab') is not None:
+        if not UserService.get_user_by_id(request.dbsession, barang_data['id_penanggung_jawab']):
+            raise HTTPBadRequest(json_body={'message': 'ID penanggung jawab tidak ditemukan.'})
+
+    if BarangService.get_barang_by_kode(request.dbsession, barang_data['kode_barang'], include_deleted=True):
         raise HTTPBadRequest(json_body={'message': 'Kode barang sudah digunakan.'})
 
     try:
@@ -163,8 +352,12 @@ def barang_update(request):
         if not LokasiService.get_lokasi_by_id(request.dbsession, update_data['id_lokasi']):
             raise HTTPBadRequest(json_body={'message': 'ID Lokasi tidak ditemukan.'})
 
+    if update_data.get('id_penanggung_jawab') is not None:
+        if not UserService.get_user_by_id(request.dbsession, update_data['id_penanggung_jawab']):
+            raise HTTPBadRequest(json_body={'message': 'ID penanggung jawab tidak ditemukan.'})
+
     if 'kode_barang' in update_data and update_data['kode_barang'] != existing_barang.kode_barang:
-        if BarangService.get_barang_by_kode(request.dbsession, update_data['kode_barang']):
+        if BarangService.get_barang_by_kode(request.dbsession, update_data['kode_barang'], include_deleted=True):
             raise HTTPBadRequest(json_body={'message': 'Kode barang sudah digunakan oleh barang lain.'})
 
     try:
@@ -2,65 +2,157 @@
 from pyramid.view import view_config
 from pyramid.response import Response
 from sqlalchemy import func
+import json
 import logging
+import queue
+import time
 
 from ..models.mymodel import Barang, Lokasi, KondisiBarang
+from ..services.columnar_snapshot import columnar_snapshot
 
 log = logging.getLogger(__name__)
 
-@view_config(route_name='dashboard', renderer='json', request_method='GET') # Hapus permission
+def _dashboard_from_columns(dbsession):
+    """Dashboard payload counted from the columnar snapshot; ``None`` when it cannot serve."""
+    counts = columnar_snapshot.group_count(('id_lokasi', 'kondisi'))
+    if counts is None:
+        return None
+    by_condition = {kondisi: 0 for kondisi in KondisiBarang}
+    by_lokasi_id = {}
+    for (lokasi_id, kondisi), count in counts.items():
+        by_condition[kondisi] += count
+        by_lokasi_id[lokasi_id] = by_lokasi_id.get(lokasi_id, 0) + count
+    # Sama seperti query SQL: semua lokasi (juga yang kosong), dikelompokkan per nama
+    by_location = {}
+    for lokasi_id, nama_lokasi in dbsession.query(Lokasi.id, Lokasi.nama_lokasi):
+        by_location[nama_lokasi] = by_location.get(nama_lokasi, 0) + by_lokasi_id.get(lokasi_id, 0)
+    return {
+        "total_assets": sum(by_condition.values()),
+        "total_locations": dbsession.query(func.count(Lokasi.id)).scalar(),
+        "assets_by_condition": [{'name': k.value, 'value': v} for k, v in by_condition.items()],
+        "assets_by_location": [{'name': name, 'value': by_location[name]} for name in sorted(by_location)]
+    }
+
+def get_dashboard_snapshot(dbsession):
+    """Run the dashboard aggregate queries and return the full payload."""
+    if columnar_snapshot.available:
+        snapshot = _dashboard_from_columns(dbsession)
+        if snapshot is not None:
+            return snapshot
+    total_assets = dbsession.query(func.count(Barang.id)).scalar() # Menggunakan id dari BaseModel
+
+    total_locations = dbsession.query(func.count(Lokasi.id)).scalar() # Menggunakan id dari BaseModel
+
+    assets_by_condition_raw = dbsession.query(
+        Barang.kondisi,
+        func.count(Barang.id) # Menggunakan id dari BaseModel
+    ).group_by(Barang.kondisi).all()
+
+    assets_by_condition = [
+        {'name': condition.value, 'value': count}
+        for condition, count in assets_by_condition_raw
+    ]
+    all_conditions_enum = [e for e in KondisiBarang]
+    for cond_enum in all_conditions_enum:
+        if not any(d['name'] == cond_enum.value for d in assets_by_condition):
+            assets_by_condition.append({'name': cond_enum.value, 'value': 0})
+    assets_by_condition.sort(key=lambda x: [e.value for e in KondisiBarang].index(x['name']))
+
+    assets_by_location_raw = dbsession.query(
+        Lokasi.nama_lokasi,
+        func.count(Barang.id) # Menggunakan id dari BaseModel
+    ).outerjoin(Barang, Lokasi.id == Barang.id_lokasi) # Join dengan ID dari BaseModel
+
+    # Hapus otorisasi dashboard untuk penanggung jawab
+    # current_user_roles = request.identity.get('role')
+    # current_username = request.identity.get('sub')
+    # if current_user_roles == 'penanggung_jawab':
+    #     assets_by_location_raw = assets_by_location_raw.filter(Barang.penanggung_jawab == current_username)
+
+    assets_by_location_raw = assets_by_location_raw.group_by(Lokasi.nama_lokasi).order_by(Lokasi.nama_lokasi).all()
+
+    assets_by_location = [
+        {'name': name, 'value': count}
+        for name, count in assets_by_location_raw
+    ]
+    assets_by_location.sort(key=lambda x: x['name'])
+
+    return {
+        "total_assets": total_assets,
+        "total_locations": total_locations,
+        "assets_by_condition": assets_by_condition,
+        "assets_by_location": assets_by_location
+    }
+
+@view_config(route_name='dashboard', renderer='json', request_method='GET', coalesce=True) # Hapus permission
 def dashboard_data(request):
     """
     Provides aggregated data for the dashboard. Accessible by anyone.
     """
-    dbsession = request.dbsession
-
     try:
-        total_assets = dbsession.query(func.count(Barang.id)).scalar() # Menggunakan id dari BaseModel
-
-        total_locations = dbsession.query(func.count(Lokasi.id)).scalar() # Menggunakan id dari BaseModel
-
-        assets_by_condition_raw = dbsession.query(
-            Barang.kondisi,
-            func.count(Barang.id) # Menggunakan id dari BaseModel
-        ).group_by(Barang.kondisi).all()
-
-        assets_by_condition = [
-            {'name': condition.value, 'value': count}
-            for condition, count in assets_by_condition_raw
-        ]
-        all_conditions_enum = [e for e in KondisiBarang]
-        for cond_enum in all_conditions_enum:
-            if not any(d['name'] == cond_enum.value for d in assets_by_condition):
-                assets_by_condition.append({'name': cond_enum.value, 'value': 0})
-        assets_by_condition.sort(key=lambda x: [e.value for e in KondisiBarang].index(x['name']))
-
-        assets_by_location_raw = dbsession.query(
-            Lokasi.nama_lokasi,
-            func.count(Barang.id) # Menggunakan id dari BaseModel
-        ).outerjoin(Barang, Lokasi.id == Barang.id_lokasi) # Join dengan ID dari BaseModel
-        
-        # Hapus otorisasi dashboard untuk penanggung jawab
-        # current_user_roles = request.identity.get('role')
-        # current_username = request.identity.get('sub')
-        # if current_user_roles == 'penanggung_jawab':
-        #     assets_by_location_raw = assets_by_location_raw.filter(Barang.penanggung_jawab == current_username)
-
-        assets_by_location_raw = assets_by_location_raw.group_by(Lokasi.nama_lokasi).order_by(Lokasi.nama_lokasi).all()
-
-        assets_by_location = [
-            {'name': name, 'value': count}
-            for name, count in assets_by_location_raw
-        ]
-        assets_by_location.sort(key=lambda x: x['name'])
-
+        snapshot = get_dashboard_snapshot(request.dbsession)
         log.info("Dashboard data retrieved successfully.")
-        return {
-            "total_assets": total_assets,
-            "total_locations": total_locations,
-            "assets_by_condition": assets_by_condition,
-            "assets_by_location": assets_by_location
-        }
+        return snapshot
     except Exception as e:
         log.error(f"Error fetching dashboard data: {e}")
-        raise Response(status=500, json_body={'message': 'Gagal memuat data dashboard.'})
\ No newline at end of file
+        raise Response(status=500, json_body={'message': 'Gagal memuat data dashboard.'})
+
+def _sse_event(event_name, data):
+    return f"event: {event_name}\ndata: {json.dumps(data, default=str)}\n\n".encode('utf-8')
+
+def _dashboard_stream(publisher, subscriber, snapshot, heartbeat, max_duration):
+    """Yield the snapshot, then deltas as they are published, with heartbeats while idle."""
+    try:
+        # Klien EventSource akan menyambung ulang otomatis setelah stream ditutup
+        yield b'retry: 5000\n\n'
+        yield _sse_event('snapshot', snapshot)
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline:
+            try:
+                event_name, data = subscriber.get(timeout=heartbeat)
+            except queue.Empty:
+                yield b': heartbeat\n\n'
+                continue
+            yield _sse_event(event_name, data)
+    finally:
+        publisher.unsubscribe(subscriber)
+
+@view_config(route_name='dashboard_stream', request_method='GET')
+def dashboard_stream(request):
+    """
+    Server-Sent Events stream of dashboard deltas. Accessible by anyone.
+    Sends a full ``snapshot`` event first, then ``delta`` events after each
+    committed asset/location change and ``resync`` when the client fell behind.
+
+    Each open stream occupies one waitress worker thread, so the number of
+    concurrent streams is capped by ``superbmd.sse_max_clients`` (per worker
+    process). The database session is released before streaming starts.
+    """
+    settings = request.registry.settings
+    publisher = request.registry['dashboard_publisher']
+    max_clients = int(settings.get('superbmd.sse_max_clients', 2))
+    if publisher.subscriber_count >= max_clients:
+        response = Response(status=503, json_body={'message': 'Terlalu banyak koneksi dashboard live.'})
+        response.headers['Retry-After'] = '30'
+        return response
+
+    # Berlangganan sebelum snapshot agar tidak ada delta yang terlewat
+    subscriber = publisher.subscribe()
+    try:
+        snapshot = get_dashboard_snapshot(request.dbsession)
+    except Exception as e:
+        publisher.unsubscribe(subscriber)
+        log.error(f"Error fetching dashboard snapshot for stream: {e}")
+        return Response(status=500, json_body={'message': 'Gagal memuat data dashboard.'})
+
+    response = Response(content_type='text/event-stream', charset='utf-8')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.app_iter = _dashboard_stream(
+        publisher,
+        subscriber,
+        snapshot,
+        heartbeat=float(settings.get('superbmd.sse_heartbeat', 15)),
+        max_duration=float(settings.get('superbmd.sse_max_duration', 300)),
+    )
+    return response
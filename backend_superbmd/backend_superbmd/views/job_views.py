@@ -0,0 +1,110 @@
+# superbmd_backend/views/job_views.py
+from pyramid.view import view_config
+from pyramid.response import FileResponse, Response
+from pyramid.httpexceptions import HTTPBadRequest, HTTPConflict, HTTPNotFound
+from pyramid.settings import asbool
+from marshmallow import ValidationError
+import logging
+import os
+
+from ..schemas.myschema import JobSubmitSchema
+from ..services.job_queue import JOB_HANDLERS, JobStatus, UnknownJobKindError
+
+log = logging.getLogger(__name__)
+
+# Schema instances
+job_submit_schema = JobSubmitSchema()
+
+def _job_to_dict(request, job):
+    data = {
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'progress': round(job['progress'], 3),
+        'error': job['error'],
+        'submitted_at': job['submitted_at'].isoformat(),
+        'started_at': job['started_at'].isoformat() if job['started_at'] else None,
+        'finished_at': job['finished_at'].isoformat() if job['finished_at'] else None,
+        'expires_at': job['expires_at'].isoformat() if job['expires_at'] else None,
+        'status_url': request.route_path('jobs_detail', id=job['id']),
+        'result_url': None,
+    }
+    if job['status'] == JobStatus.DONE.value:
+        data['result_url'] = request.route_path('jobs_result', id=job['id'])
+        data['result_size'] = job['result_size']
+    return data
+
+def should_offload(request, threshold, size=None):
+    """True if the request should be answered with a background job.
+
+    ``?background=true`` always offloads and ``?background=false`` never does.
+    Otherwise the request is offloaded when ``size()`` (called only when
+    needed) exceeds ``threshold``; a threshold of 0 disables this.
+    """
+    background = request.params.get('background')
+    if background is not None:
+        return asbool(background)
+    return bool(threshold) and size is not None and size() > threshold
+
+def offload(request, kind):
+    """Queue ``kind`` with the request's query params and answer ``202 Accepted``."""
+    params = {key: value for key, value in request.params.items() if key != 'background'}
+    job = request.registry['job_queue'].submit(kind, params)
+    log.info(f"Request {request.path} offloaded to job {job['id']} ({kind}).")
+    response = Response(status=202, json_body={
+        'message': 'Permintaan diproses di latar belakang. Pantau status job untuk mengambil hasilnya.',
+        'job': _job_to_dict(request, job),
+    })
+    response.headers['Location'] = request.route_path('jobs_detail', id=job['id'])
+    return response
+
+def _get_job_or_404(request):
+    job = request.registry['job_queue'].get(request.matchdict['id'])
+    if job is None:
+        raise HTTPNotFound(json_body={'message': 'Job tidak ditemukan atau hasilnya sudah kedaluwarsa.'})
+    return job
+
+@view_config(route_name='jobs_submit', renderer='json', request_method='POST')
+def jobs_submit(request):
+    """
+    Queues a background job. Body: {"kind": "<kind>", "params": {<report query params>}}.
+    Kinds: report_assets_in_out, report_pivot, report_valuation, barang_labels.
+    """
+    try:
+        job_data = job_submit_schema.load(request.json_body)
+    except ValidationError as e:
+        raise HTTPBadRequest(json_body={'message': 'Invalid request body', 'errors': e.messages})
+    except ValueError:
+        raise HTTPBadRequest(json_body={'message': 'Body harus berupa JSON.'})
+
+    try:
+        job = request.registry['job_queue'].submit(job_data['kind'], job_data['params'])
+    except UnknownJobKindError:
+        raise HTTPBadRequest(json_body={
+            'message': f"kind harus salah satu dari: {', '.join(sorted(JOB_HANDLERS))}."
+        })
+    request.response.status = 202
+    request.response.headers['Location'] = request.route_path('jobs_detail', id=job['id'])
+    return _job_to_dict(request, job)
+
+@view_config(route_name='jobs_detail', renderer='json', request_method='GET')
+def jobs_detail(request):
+    """
+    Status and progress (0.0 - 1.0) of a job; result_url is set once it is done.
+    """
+    return _job_to_dict(request, _get_job_or_404(request))
+
+@view_config(route_name='jobs_result', request_method='GET')
+def jobs_result(request):
+    """
+    Downloads the result file of a finished job.
+    """
+    job = _get_job_or_404(request)
+    if job['status'] == JobStatus.FAILED.value:
+        raise HTTPConflict(json_body={'message': f"Job gagal: {job['error']}"})
+    if job['status'] != JobStatus.DONE.value or not os.path.exists(job['result_path']):
+        raise HTTPConflict(json_body={'message': 'Hasil job belum tersedia.'})
+    response = FileResponse(job['result_path'], request=request, content_type=job['content_type'])
+    filename = f"{job['kind']}-{job['id'][:8]}{os.path.splitext(job['result_path'])[1]}"
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -8,7 +8,9 @@ import logging
 
 from ..schemas.myschema import LokasiSchema, LokasiCreateSchema, LokasiUpdateSchema, LokasiListSchema
 from ..models.mymodel import Lokasi
-from ..services.lokasi_service import LokasiService
+from ..services.archive_service import ArchiveService
+from ..services.lokasi_service import LokasiService, LokasiMoveError
+from ..services.pagination import COUNT_MODES, InvalidPageError, InvalidSortError, page_params
 
 log = logging.getLogger(__name__)
 
@@ -22,25 +24,28 @@ lokasi_list_schema = LokasiListSchema()
 def lokasi_list(request):
     """
     Retrieves a paginated list of locations. Accessible by anyone.
+    Query params: count (exact|estimate|none, default exact) selects how total_items is computed;
+    sort (<key> or -<key> for descending) orders the whole result, with id as tiebreaker.
     """
-    page = int(request.params.get('page', 1))
-    limit = int(request.params.get('limit', 10))
+    try:
+        page, limit = page_params(request.params)
+    except InvalidPageError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
     search_term = request.params.get('search', '').strip()
+    count_mode = request.params.get('count', 'exact')
+    if count_mode not in COUNT_MODES:
+        raise HTTPBadRequest(json_body={'message': 'count harus exact, estimate atau none.'})
 
-    all_lokasi = LokasiService.get_all_lokasi(request.dbsession, search_term)
-
-    total_items = len(all_lokasi)
-    lokasi = all_lokasi[(page - 1) * limit : page * limit]
-    total_pages = (total_items + limit - 1) // limit
+    try:
+        lokasi, pagination = LokasiService.get_lokasi_page(
+            request.dbsession, page, limit, count_mode, search_term, sort=request.params.get('sort')
+        )
+    except InvalidSortError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
 
     return lokasi_list_schema.dump({
         'items': lokasi,
-        'pagination': {
-            'total_items': total_items,
-            'total_pages': total_pages,
-            'current_page': page,
-            'items_per_page': limit
-        }
+        'pagination': pagination
     })
 
 @view_config(route_name='lokasi_create', renderer='json', request_method='POST') # Hapus permission
@@ -57,6 +62,9 @@ def lokasi_create(request):
     if LokasiService.get_lokasi_by_kode(request.dbsession, lokasi_data['kode_lokasi']):
         raise HTTPBadRequest(json_body={'message': 'Kode lokasi sudah digunakan.'})
 
+    if lokasi_data.get('parent_id') and not LokasiService.get_lokasi_by_id(request.dbsession, lokasi_data['parent_id']):
+        raise HTTPBadRequest(json_body={'message': 'Lokasi induk tidak ditemukan.'})
+
     try:
         new_lokasi = LokasiService.create_lokasi(request.dbsession, lokasi_data)
     except IntegrityError:
@@ -85,6 +93,7 @@ def lokasi_detail(request):
     return lokasi_schema.dump(lokasi)
 
 @view_config(route_name='lokasi_update', renderer='json', request_method='PUT') # Hapus permission
+@view_config(route_name='lokasi_update_legacy', renderer='json', request_method='PUT')
 def lokasi_update(request):
     """
     Updates an existing location. Accessible by anyone (otorisasi di frontend).
@@ -106,8 +115,13 @@ def lokasi_update(request):
         if LokasiService.get_lokasi_by_kode(request.dbsession, update_data['kode_lokasi']):
             raise HTTPBadRequest(json_body={'message': 'Kode lokasi sudah digunakan oleh lokasi lain.'})
 
+    if update_data.get('parent_id') and not LokasiService.get_lokasi_by_id(request.dbsession, update_data['parent_id']):
+        raise HTTPBadRequest(json_body={'message': 'Lokasi induk tidak ditemukan.'})
+
     try:
         updated_lokasi = LokasiService.update_lokasi(request.dbsession, existing_lokasi, update_data)
+    except LokasiMoveError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
     except IntegrityError:
         request.dbsession.rollback()
         raise HTTPBadRequest(json_body={'message': 'Gagal memperbarui lokasi. Data mungkin tidak valid.'})
@@ -123,7 +137,7 @@ def lokasi_update(request):
 def lokasi_delete(request):
     """
     Deletes a location. Accessible by anyone (otorisasi di frontend).
-    Note: Check for associated Barang before deleting a location.
+    Note: Check for associated Barang, sub-locations, transfers and stocktakes before deleting a location.
     """
     lokasi_id = int(request.matchdict['id'])
     
@@ -132,10 +146,24 @@ def lokasi_delete(request):
     if not lokasi_to_delete:
         raise HTTPNotFound(json_body={'message': 'Lokasi tidak ditemukan.'})
 
-    if lokasi_to_delete.barang:
+    if LokasiService.has_barang(request.dbsession, lokasi_id):
         raise HTTPBadRequest(json_body={'message': 'Gagal menghapus lokasi. Ada barang terkait dengan lokasi ini. Hapus barang terlebih dahulu.'})
 
+    if LokasiService.has_children(request.dbsession, lokasi_id):
+        raise HTTPBadRequest(json_body={'message': 'Gagal menghapus lokasi. Lokasi ini masih memiliki sub-lokasi.'})
+
+    # Riwayat perpindahan dan stock opname mereferensikan lokasi dengan foreign key
+    if LokasiService.has_transfers(request.dbsession, lokasi_id):
+        raise HTTPBadRequest(json_body={'message': 'Gagal menghapus lokasi. Lokasi ini tercatat dalam riwayat perpindahan barang.'})
+
+    if LokasiService.has_stocktakes(request.dbsession, lokasi_id):
+        raise HTTPBadRequest(json_body={'message': 'Gagal menghapus lokasi. Lokasi ini tercatat dalam sesi stock opname.'})
+
     try:
+        # Barang terhapus yang belum diarsipkan masih mereferensikan lokasi: arsipkan sekarang
+        archived = ArchiveService.archive_lokasi(request.dbsession, lokasi_id)
+        if archived:
+            log.info(f"Archived {archived} deleted assets of location {lokasi_to_delete.nama_lokasi}.")
         LokasiService.delete_lokasi(request.dbsession, lokasi_to_delete)
     except IntegrityError:
         request.dbsession.rollback()
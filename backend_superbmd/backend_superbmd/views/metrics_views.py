@@ -0,0 +1,25 @@
+# superbmd_backend/views/metrics_views.py
+from pyramid.view import view_config
+import logging
+
+log = logging.getLogger(__name__)
+
+@view_config(route_name='metrics', renderer='json', request_method='GET')
+def metrics(request):
+    """
+    Exposes runtime instrumentation for monitoring. Accessible by anyone.
+    """
+    registry = request.registry
+    return {
+        'startup_timings': registry.get('startup_timings', {}),
+        'sql_compiled_cache': registry['sql_cache_stats'].as_dict(),
+        'label_cache': registry['label_renderer'].as_dict(),
+        'scan_index': registry['scan_index'].as_dict(),
+        'count_cache': registry['count_cache'].as_dict(),
+        'pivot_cache': registry['pivot_cache'].as_dict(),
+        'valuation_cache': registry['valuation_cache'].as_dict(),
+        'columnar_snapshot': registry['columnar_snapshot'].as_dict(),
+        'job_queue': registry['job_queue'].as_dict(),
+        'singleflight': registry['singleflight'].as_dict(),
+        'admission': registry['admission'].as_dict(),
+    }
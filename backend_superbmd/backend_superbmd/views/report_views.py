@@ -2,12 +2,21 @@
 from pyramid.view import view_config
 from pyramid.response import Response
 from pyramid.httpexceptions import HTTPBadRequest
-from sqlalchemy import func, cast, Date, union_all, Text, case
+from pyramid.settings import asbool
+from sqlalchemy import func, cast, Date, union_all, Text, case, literal, text
 import datetime
+import json
 import logging
 
-from ..models.mymodel import Barang, Lokasi, KondisiBarang
+from ..models import INCLUDE_DELETED
+from ..models.mymodel import Barang, BarangArsip, Lokasi, LokasiClosure, KondisiBarang
 from ..schemas.myschema import ReportAssetByLocationSchema, ReportAssetByConditionSchema, ReportAssetInOutSchema
+from ..services.lokasi_service import LokasiService
+from ..services.rollup_service import RollupService, BUCKETS, DATE_FIELDS, GROUP_BY
+from ..services.pivot_service import PivotService, DIMENSIONS, MEASURES
+from ..services.valuation_service import ValuationService
+from ..services.job_queue import job_handler
+from .job_views import offload, should_offload
 
 log = logging.getLogger(__name__)
 
@@ -31,7 +40,12 @@ def _apply_report_filters(query, model_class, params):
         except ValueError:
             raise HTTPBadRequest(json_body={'message': 'Format end_date tidak valid (YYYY-MM-DD).'})
     if params.get('location_id'):
-        query = query.filter(model_class.id_lokasi == int(params['location_id']))
+        try:
+            location_id = int(params['location_id'])
+        except ValueError:
+            raise HTTPBadRequest(json_body={'message': 'location_id harus berupa angka.'})
+        # Lokasi beserta seluruh sub-lokasinya
+        query = query.filter(model_class.id_lokasi.in_(LokasiService.subtree_ids(location_id)))
     if params.get('condition'):
         try:
             condition_enum = KondisiBarang(params['condition'])
@@ -40,30 +54,61 @@ def _apply_report_filters(query, model_class, params):
             raise HTTPBadRequest(json_body={'message': 'Kondisi barang tidak valid.'})
     return query
 
-@view_config(route_name='report_assets_by_location', renderer='json', request_method='GET') # Hapus permission
+def _report_sources(params):
+    """Asset tables a report reads and the execution options to read them with.
+
+    Deleted and archived assets are left out unless ``include_archived`` is true.
+    """
+    if asbool(params.get('include_archived', False)):
+        return [Barang, BarangArsip], {INCLUDE_DELETED: True}
+    return [Barang], {}
+
+@view_config(route_name='report_assets_by_location', renderer='json', request_method='GET', coalesce=True) # Hapus permission
 def report_assets_by_location(request):
     """
     Generates a report of assets grouped by location. Accessible by anyone.
-    Query params: start_date, end_date
+    Counts are per location; rollup=true adds the assets of its sub-locations.
+    Query params: start_date, end_date, rollup (default false), include_archived
     """
     dbsession = request.dbsession
+    rollup = asbool(request.params.get('rollup', False))
+    models, options = _report_sources(request.params)
     
     try:
-        query = dbsession.query(
-            Lokasi.nama_lokasi,
-            func.count(Barang.id).label("total_assets"),
-            func.sum(case((Barang.kondisi == KondisiBarang.BAIK, 1), else_=0)).label("baik"),
-            func.sum(case((Barang.kondisi == KondisiBarang.RUSAK_RINGAN, 1), else_=0)).label("rusak_ringan"),
-            func.sum(case((Barang.kondisi == KondisiBarang.RUSAK_BERAT, 1), else_=0)).label("rusak_berat"),
-        ).outerjoin(Barang, Lokasi.id == Barang.id_lokasi) # Join dengan ID dari BaseModel
-        
-        query = _apply_report_filters(query, Barang, request.params)
+        totals = {}
+        for model_class in models:
+            query = dbsession.query(
+                Lokasi.id,
+                Lokasi.parent_id,
+                Lokasi.nama_lokasi,
+                func.count(model_class.id).label("total_assets"),
+                func.sum(case((model_class.kondisi == KondisiBarang.BAIK, 1), else_=0)).label("baik"),
+                func.sum(case((model_class.kondisi == KondisiBarang.RUSAK_RINGAN, 1), else_=0)).label("rusak_ringan"),
+                func.sum(case((model_class.kondisi == KondisiBarang.RUSAK_BERAT, 1), else_=0)).label("rusak_berat"),
+            ).join(
+                LokasiClosure, LokasiClosure.ancestor_id == Lokasi.id
+            )
+            # Semua lokasi tampil dari tabel barang; arsip hanya menambah hitungan
+            join = query.outerjoin if model_class is Barang else query.join
+            query = join(
+                model_class, LokasiClosure.descendant_id == model_class.id_lokasi # Barang di lokasi ini dan sub-lokasinya
+            )
+            if not rollup:
+                query = query.filter(LokasiClosure.depth == 0)
+            
+            query = _apply_report_filters(query, model_class, request.params)
 
-        report_data_raw = query.group_by(Lokasi.nama_lokasi).order_by(Lokasi.nama_lokasi).all()
+            report_data_raw = query.group_by(Lokasi.id, Lokasi.parent_id, Lokasi.nama_lokasi).order_by(Lokasi.nama_lokasi).execution_options(**options).all()
+            for loc_id, parent_id, loc_name, *counts in report_data_raw:
+                row = totals.setdefault(loc_id, [parent_id, loc_name, 0, 0, 0, 0])
+                for i, count in enumerate(counts):
+                    row[i + 2] += count or 0
 
         report_data = []
-        for loc_name, total, baik, rusak_ringan, rusak_berat in report_data_raw:
+        for loc_id, (parent_id, loc_name, total, baik, rusak_ringan, rusak_berat) in totals.items():
             report_data.append({
+                'location_id': loc_id,
+                'parent_id': parent_id,
                 'location_name': loc_name,
                 'total_assets': total,
                 'baik': baik,
@@ -78,36 +123,33 @@ def report_assets_by_location(request):
         log.error(f"Error generating assets by location report: {e}")
         return Response(status=500, json_body={'message': 'Gagal membuat laporan aset per lokasi.'})
 
-@view_config(route_name='report_assets_by_condition', renderer='json', request_method='GET') # Hapus permission
+@view_config(route_name='report_assets_by_condition', renderer='json', request_method='GET', coalesce=True) # Hapus permission
 def report_assets_by_condition(request):
     """
     Generates a report of assets grouped by condition. Accessible by anyone.
-    Query params: start_date, end_date, location_id
+    Query params: start_date, end_date, location_id, include_archived
     """
     dbsession = request.dbsession
+    models, options = _report_sources(request.params)
     
     try:
-        query = dbsession.query(
-            Barang.kondisi,
-            func.count(Barang.id) # Menggunakan id dari BaseModel
-        )
-        
-        query = _apply_report_filters(query, Barang, request.params)
+        counts = {}
+        for model_class in models:
+            query = dbsession.query(
+                model_class.kondisi,
+                func.count(model_class.id) # Menggunakan id dari BaseModel
+            )
+            
+            query = _apply_report_filters(query, model_class, request.params)
 
-        report_data_raw = query.group_by(Barang.kondisi).order_by(Barang.kondisi).all()
+            for condition, count in query.group_by(model_class.kondisi).execution_options(**options).all():
+                counts[condition] = counts.get(condition, 0) + count
 
-        report_data = []
-        for condition, count in report_data_raw:
-            report_data.append({
-                'condition': condition.value,
-                'total_assets': count
-            })
-        
-        all_conditions_enum = [e for e in KondisiBarang]
-        for cond_enum in all_conditions_enum:
-            if not any(d['condition'] == cond_enum.value for d in report_data):
-                report_data.append({'condition': cond_enum.value, 'total_assets': 0})
-        report_data.sort(key=lambda x: [e.value for e in KondisiBarang].index(x['condition']))
+        # Semua kondisi tampil, berurutan sesuai KondisiBarang
+        report_data = [
+            {'condition': cond_enum.value, 'total_assets': counts.get(cond_enum, 0)}
+            for cond_enum in KondisiBarang
+        ]
 
         return report_asset_by_condition_schema.dump(report_data)
     except HTTPBadRequest:
@@ -116,59 +158,224 @@ def report_assets_by_condition(request):
         log.error(f"Error generating assets by condition report: {e}")
         return Response(status=500, json_body={'message': 'Gagal membuat laporan aset per kondisi.'})
 
-@view_config(route_name='report_assets_in_out', renderer='json', request_method='GET') # Hapus permission
-def report_assets_in_out(request):
-    """
-    Generates a report for asset entry/update history. Accessible by anyone.
-    Query params: start_date, end_date, location_id, condition
-    """
-    dbsession = request.dbsession
-    
-    try:
+def _assets_in_out(dbsession, params, progress=None):
+    """Rows of the asset entry/update report for the query ``params`` (see ``report_assets_in_out``)."""
+    models, options = _report_sources(params)
+    statements = []
+    for model_class in models:
         in_query = dbsession.query(
-            Barang.nama_barang,
-            Barang.kode_barang,
+            model_class.nama_barang,
+            model_class.kode_barang,
             Lokasi.nama_lokasi,
-            Barang.tanggal_masuk.label("tanggal_transaksi"),
-            func.lit("MASUK").label("tipe_transaksi"),
+            model_class.tanggal_masuk.label("tanggal_transaksi"),
+            literal("MASUK").label("tipe_transaksi"),
             func.cast(None, Text).label("kondisi_lama"),
-            Barang.kondisi.label("kondisi_baru")
-        ).join(Lokasi, Lokasi.id == Barang.id_lokasi) # Join dengan ID dari BaseModel
+            model_class.kondisi.label("kondisi_baru")
+        ).join(Lokasi, Lokasi.id == model_class.id_lokasi) # Join dengan ID dari BaseModel
         
-        in_query_filtered = _apply_report_filters(in_query, Barang, request.params)
+        in_query_filtered = _apply_report_filters(in_query, model_class, params)
 
         updated_query = dbsession.query(
-            Barang.nama_barang,
-            Barang.kode_barang,
+            model_class.nama_barang,
+            model_class.kode_barang,
             Lokasi.nama_lokasi,
-            Barang.tanggal_pembaruan.label("tanggal_transaksi"),
-            func.lit("PEMBARUAN").label("tipe_transaksi"),
+            model_class.tanggal_pembaruan.label("tanggal_transaksi"),
+            literal("PEMBARUAN").label("tipe_transaksi"),
             func.cast(None, Text).label("kondisi_lama"),
-            Barang.kondisi.label("kondisi_baru")
-        ).join(Lokasi, Lokasi.id == Barang.id_lokasi).filter(Barang.tanggal_pembaruan != None) # Join dengan ID dari BaseModel
+            model_class.kondisi.label("kondisi_baru")
+        ).join(Lokasi, Lokasi.id == model_class.id_lokasi).filter(model_class.tanggal_pembaruan != None) # Join dengan ID dari BaseModel
 
-        updated_query_filtered = _apply_report_filters(updated_query, Barang, request.params)
+        updated_query_filtered = _apply_report_filters(updated_query, model_class, params)
+        statements += [in_query_filtered.statement, updated_query_filtered.statement]
 
-        combined_statement = in_query_filtered.statement.union_all(updated_query_filtered.statement)
-        full_report_query = dbsession.query(combined_statement.alias('full_report'))
+    combined_statement = union_all(*statements)
+    full_report_query = dbsession.query(combined_statement.alias('full_report')).execution_options(**options)
 
-        report_data_raw = full_report_query.order_by(Text("tanggal_transaksi")).all() # Order by text()
+    report_data_raw = full_report_query.order_by(text("tanggal_transaksi")).all() # Order by text()
+    if progress:
+        progress(0.6)
 
-        report_data = []
-        for row in report_data_raw:
-            report_data.append({
-                'nama_barang': row.nama_barang,
-                'kode_barang': row.kode_barang,
-                'lokasi': row.nama_lokasi,
-                'tanggal': row.tanggal_transaksi,
-                'tipe_transaksi': row.tipe_transaksi,
-                'kondisi_lama': row.kondisi_lama,
-                'kondisi_baru': row.kondisi_baru
-            })
+    report_data = []
+    for row in report_data_raw:
+        report_data.append({
+            'nama_barang': row.nama_barang,
+            'kode_barang': row.kode_barang,
+            'lokasi': row.nama_lokasi,
+            'tanggal': row.tanggal_transaksi,
+            'tipe_transaksi': row.tipe_transaksi,
+            'kondisi_lama': row.kondisi_lama,
+            'kondisi_baru': row.kondisi_baru
+        })
 
-        return report_asset_in_out_schema.dump(report_data)
+    return report_asset_in_out_schema.dump(report_data)
+
+def _assets_in_out_size(dbsession, params):
+    """Number of assets the in/out report covers; each gives one or two rows."""
+    models, options = _report_sources(params)
+    return sum(
+        _apply_report_filters(dbsession.query(func.count(model_class.id)), model_class, params)
+        .execution_options(**options).scalar()
+        for model_class in models
+    )
+
+@job_handler('report_assets_in_out')
+def _assets_in_out_job(job):
+    return 'application/json', json.dumps(_assets_in_out(job.dbsession, job.params, job.progress))
+
+@view_config(route_name='report_assets_in_out', renderer='json', request_method='GET', coalesce=True) # Hapus permission
+def report_assets_in_out(request):
+    """
+    Generates a report for asset entry/update history. Accessible by anyone.
+    Query params: start_date, end_date, location_id, condition, include_archived, background
+    Reports over more than superbmd.jobs_offload_rows assets are answered with 202 and a job.
+    """
+    dbsession = request.dbsession
+    
+    try:
+        threshold = request.registry['job_queue'].offload_rows
+        if should_offload(request, threshold, lambda: _assets_in_out_size(dbsession, request.params)):
+            return offload(request, 'report_assets_in_out')
+        return _assets_in_out(dbsession, request.params)
     except HTTPBadRequest:
         raise
     except Exception as e:
         log.error(f"Error generating assets in/out report: {e}")
-        return Response(status=500, json_body={'message': 'Gagal membuat laporan aset masuk/keluar.'})
\ No newline at end of file
+        return Response(status=500, json_body={'message': 'Gagal membuat laporan aset masuk/keluar.'})
+
+def _parse_report_date(value, name):
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise HTTPBadRequest(json_body={'message': f'Format {name} tidak valid (YYYY-MM-DD).'})
+
+@view_config(route_name='report_assets_timeseries', renderer='json', request_method='GET', coalesce=True)
+def report_assets_timeseries(request):
+    """
+    Generates asset counts per time bucket. Accessible by anyone.
+    Query params: bucket (day|week|month|quarter|year), date_field (tanggal_masuk|tanggal_pembaruan),
+    group_by (location|condition), start_date, end_date, location_id, condition, include_archived
+    """
+    params = request.params
+    bucket = params.get('bucket', 'month')
+    date_field = params.get('date_field', 'tanggal_masuk')
+    group_by = params.get('group_by') or None
+    if bucket not in BUCKETS:
+        raise HTTPBadRequest(json_body={'message': f"bucket harus salah satu dari: {', '.join(BUCKETS)}."})
+    if date_field not in DATE_FIELDS:
+        raise HTTPBadRequest(json_body={'message': f"date_field harus salah satu dari: {', '.join(DATE_FIELDS)}."})
+    if group_by is not None and group_by not in GROUP_BY:
+        raise HTTPBadRequest(json_body={'message': f"group_by harus salah satu dari: {', '.join(GROUP_BY)}."})
+
+    start_date = _parse_report_date(params['start_date'], 'start_date') if params.get('start_date') else None
+    end_date = _parse_report_date(params['end_date'], 'end_date') if params.get('end_date') else None
+    condition = None
+    if params.get('condition'):
+        try:
+            condition = KondisiBarang(params['condition'])
+        except ValueError:
+            raise HTTPBadRequest(json_body={'message': 'Kondisi barang tidak valid.'})
+    try:
+        location_id = int(params['location_id']) if params.get('location_id') else None
+    except ValueError:
+        raise HTTPBadRequest(json_body={'message': 'location_id harus berupa angka.'})
+    models, options = _report_sources(params)
+
+    try:
+        return RollupService.get_timeseries(
+            request.dbsession,
+            bucket=bucket,
+            date_field=date_field,
+            group_by=group_by,
+            start_date=start_date,
+            end_date=end_date,
+            location_id=location_id,
+            condition=condition,
+            models=models,
+            execution_options=options,
+        )
+    except Exception as e:
+        log.error(f"Error generating assets timeseries report: {e}")
+        return Response(status=500, json_body={'message': 'Gagal membuat laporan deret waktu aset.'})
+
+def _pivot_args(params):
+    """Validated ``(rows, cols, measure, filters)`` of a pivot request."""
+    rows = params.get('rows')
+    cols = params.get('cols') or None
+    measure = params.get('measure', 'count')
+    if rows not in DIMENSIONS or (cols is not None and cols not in DIMENSIONS):
+        raise HTTPBadRequest(json_body={'message': f"rows/cols harus salah satu dari: {', '.join(DIMENSIONS)}."})
+    if rows == cols:
+        raise HTTPBadRequest(json_body={'message': 'rows dan cols harus berbeda.'})
+    if measure not in MEASURES:
+        raise HTTPBadRequest(json_body={'message': f"measure harus salah satu dari: {', '.join(MEASURES)}."})
+
+    filters = {name: params.get(name) for name in ('start_date', 'end_date', 'location_id', 'condition')}
+    if filters['location_id']:
+        try:
+            int(filters['location_id'])
+        except ValueError:
+            raise HTTPBadRequest(json_body={'message': 'location_id harus berupa angka.'})
+    return rows, cols, measure, filters
+
+@job_handler('report_pivot')
+def _pivot_job(job):
+    rows, cols, measure, filters = _pivot_args(job.params)
+    table = PivotService.pivot(job.dbsession, rows, cols, measure, filters, _apply_report_filters)
+    return 'application/json', json.dumps(table, default=str)
+
+@view_config(route_name='report_pivot', renderer='json', request_method='GET', coalesce=True)
+def report_pivot(request):
+    """
+    Aggregates assets over one or two dimensions as a pivot table. Accessible by anyone.
+    Query params: rows (required), cols, measure (count), start_date, end_date, location_id, condition,
+    background (true: answer 202 and compute it as a job)
+    Dimensions: id_lokasi, kondisi, penanggung_jawab, bulan_masuk, tahun_masuk
+    """
+    rows, cols, measure, filters = _pivot_args(request.params)
+    if should_offload(request, 0):
+        return offload(request, 'report_pivot')
+    try:
+        return PivotService.pivot(request.dbsession, rows, cols, measure, filters, _apply_report_filters)
+    except HTTPBadRequest:
+        raise
+    except Exception as e:
+        log.error(f"Error generating pivot report: {e}")
+        return Response(status=500, json_body={'message': 'Gagal membuat laporan pivot aset.'})
+
+def _valuation_args(params):
+    """Validated ``(as_of, location_id, condition)`` of a valuation request."""
+    as_of = _parse_report_date(params['as_of'], 'as_of') if params.get('as_of') else datetime.date.today()
+    condition = None
+    if params.get('condition'):
+        try:
+            condition = KondisiBarang(params['condition'])
+        except ValueError:
+            raise HTTPBadRequest(json_body={'message': 'Kondisi barang tidak valid.'})
+    try:
+        location_id = int(params['location_id']) if params.get('location_id') else None
+    except ValueError:
+        raise HTTPBadRequest(json_body={'message': 'location_id harus berupa angka.'})
+    return as_of, location_id, condition
+
+@job_handler('report_valuation')
+def _valuation_job(job):
+    as_of, location_id, condition = _valuation_args(job.params)
+    valuation = ValuationService.valuation(job.dbsession, as_of, location_id=location_id, condition=condition)
+    return 'application/json', json.dumps(valuation)
+
+@view_config(route_name='report_valuation', renderer='json', request_method='GET', coalesce=True)
+def report_valuation(request):
+    """
+    Acquisition value, accumulated depreciation and book value of the register. Accessible by anyone.
+    Query params: as_of (YYYY-MM-DD, default today), location_id, condition,
+    background (true: answer 202 and compute it as a job)
+    Totals are given overall, per location and per condition.
+    """
+    as_of, location_id, condition = _valuation_args(request.params)
+    if should_offload(request, 0):
+        return offload(request, 'report_valuation')
+    try:
+        return ValuationService.valuation(request.dbsession, as_of, location_id=location_id, condition=condition)
+    except Exception as e:
+        log.error(f"Error generating valuation report: {e}")
+        return Response(status=500, json_body={'message': 'Gagal membuat laporan nilai aset.'})
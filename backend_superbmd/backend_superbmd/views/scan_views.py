@@ -0,0 +1,45 @@
+# superbmd_backend/views/scan_views.py
+from pyramid.view import view_config
+from pyramid.httpexceptions import HTTPBadRequest
+import logging
+
+log = logging.getLogger(__name__)
+
+# Batas kode per permintaan batch
+SCAN_MAX_CODES = 500
+
+def _requested_codes(request):
+    if request.method == 'POST':
+        try:
+            codes = request.json_body.get('kode_barang')
+        except (ValueError, AttributeError):
+            raise HTTPBadRequest(json_body={'message': 'Body harus berupa JSON {"kode_barang": [...]}.'})
+        if isinstance(codes, str):
+            codes = [codes]
+        if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+            raise HTTPBadRequest(json_body={'message': 'kode_barang harus berupa daftar string.'})
+    else:
+        # ?kode_barang=A&kode_barang=B atau ?kode_barang=A,B
+        codes = [c for value in request.params.getall('kode_barang') for c in value.split(',')]
+
+    # Buang duplikat, pertahankan urutan scan
+    codes = list(dict.fromkeys(c.strip() for c in codes if c.strip()))
+    if not codes:
+        raise HTTPBadRequest(json_body={'message': 'Parameter kode_barang wajib diisi.'})
+    if len(codes) > SCAN_MAX_CODES:
+        raise HTTPBadRequest(json_body={'message': f'Maksimal {SCAN_MAX_CODES} kode per permintaan.'})
+    return codes
+
+@view_config(route_name='scan', renderer='json', request_method=('GET', 'POST'))
+def scan(request):
+    """
+    Resolves scanned kode_barang values to compact asset records. Accessible by anyone.
+    Served from the in-memory scan index; the database is only queried for codes not cached yet.
+    Query params / body: kode_barang (one or many)
+    """
+    codes = _requested_codes(request)
+    found = request.registry['scan_index'].lookup(lambda: request.dbsession, codes)
+    return {
+        'items': [found[code] for code in codes if code in found],
+        'not_found': [code for code in codes if code not in found],
+    }
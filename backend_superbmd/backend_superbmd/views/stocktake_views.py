@@ -0,0 +1,114 @@
+# superbmd_backend/views/stocktake_views.py
+from pyramid.view import view_config
+from pyramid.httpexceptions import HTTPNotFound, HTTPBadRequest
+from pyramid.settings import asbool
+from marshmallow import ValidationError
+import logging
+
+from ..schemas.myschema import StocktakeSessionSchema, StocktakeScanBatchSchema, StocktakeApplySchema
+from ..services.lokasi_service import LokasiService
+from ..services.stocktake_service import StocktakeService, StocktakeClosedError
+
+log = logging.getLogger(__name__)
+
+# Schema instances
+stocktake_session_schema = StocktakeSessionSchema()
+stocktake_scan_batch_schema = StocktakeScanBatchSchema()
+stocktake_apply_schema = StocktakeApplySchema()
+
+def _load(schema, request):
+    try:
+        return schema.load(request.json_body)
+    except ValidationError as e:
+        raise HTTPBadRequest(json_body={'message': 'Invalid request body', 'errors': e.messages})
+    except ValueError:
+        raise HTTPBadRequest(json_body={'message': 'Body harus berupa JSON.'})
+
+def _get_session_or_404(request):
+    session = StocktakeService.get_session(request.dbsession, int(request.matchdict['id']))
+    if not session:
+        raise HTTPNotFound(json_body={'message': 'Sesi stock opname tidak ditemukan.'})
+    return session
+
+@view_config(route_name='stocktake_create', renderer='json', request_method='POST')
+def stocktake_create(request):
+    """
+    Opens a stocktake session for a location (including its sub-locations).
+    """
+    session_data = _load(stocktake_session_schema, request)
+    if not LokasiService.get_lokasi_by_id(request.dbsession, session_data['id_lokasi']):
+        raise HTTPBadRequest(json_body={'message': 'Lokasi tidak ditemukan.'})
+
+    session = StocktakeService.create_session(request.dbsession, session_data)
+    log.info(f"Stocktake session {session.id} opened for lokasi {session.id_lokasi}.")
+    request.response.status = 201
+    return stocktake_session_schema.dump(session)
+
+@view_config(route_name='stocktake_detail', renderer='json', request_method='GET')
+def stocktake_detail(request):
+    """
+    Retrieves a stocktake session with the number of staged scans.
+    """
+    session = _get_session_or_404(request)
+    data = stocktake_session_schema.dump(session)
+    data['total_scans'] = StocktakeService.scan_count(request.dbsession, session.id)
+    return data
+
+@view_config(route_name='stocktake_scans', renderer='json', request_method='POST')
+def stocktake_scans(request):
+    """
+    Submits a batch of scanned codes into the session's staging table.
+    Body: {"id_lokasi": <where scanned, optional>, "items": ["KODE", {"kode_barang": ..., "kondisi": ...}, ...]}
+    """
+    session = _get_session_or_404(request)
+    try:
+        body = request.json_body
+    except ValueError:
+        raise HTTPBadRequest(json_body={'message': 'Body harus berupa JSON.'})
+    if isinstance(body, dict) and isinstance(body.get('items'), list):
+        # Perangkat scan boleh mengirim daftar kode saja
+        body['items'] = [{'kode_barang': item} if isinstance(item, str) else item for item in body['items']]
+    try:
+        batch = stocktake_scan_batch_schema.load(body)
+    except ValidationError as e:
+        raise HTTPBadRequest(json_body={'message': 'Invalid request body', 'errors': e.messages})
+
+    id_lokasi = batch.get('id_lokasi') or session.id_lokasi
+    if not LokasiService.is_descendant(request.dbsession, id_lokasi, session.id_lokasi):
+        raise HTTPBadRequest(json_body={'message': 'Lokasi scan berada di luar lokasi sesi stock opname.'})
+
+    try:
+        accepted = StocktakeService.submit_scans(request.dbsession, session, id_lokasi, batch['items'])
+    except StocktakeClosedError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
+    return {
+        'accepted': accepted,
+        'total_scans': StocktakeService.scan_count(request.dbsession, session.id),
+    }
+
+@view_config(route_name='stocktake_reconciliation', renderer='json', request_method='GET')
+def stocktake_reconciliation(request):
+    """
+    Reconciles the staged scans with the register: found, missing, unexpected and misplaced assets.
+    Query params: details (default true; false returns only the summary counts)
+    """
+    session = _get_session_or_404(request)
+    details = asbool(request.params.get('details', True))
+    return StocktakeService.reconcile(request.dbsession, session, details=details)
+
+@view_config(route_name='stocktake_apply', renderer='json', request_method='POST')
+def stocktake_apply(request):
+    """
+    Applies location and/or condition corrections from the scans in bulk and closes the session.
+    Body: {"locations": true, "conditions": true}
+    """
+    session = _get_session_or_404(request)
+    options = _load(stocktake_apply_schema, request) if request.body else stocktake_apply_schema.load({})
+    try:
+        result = StocktakeService.apply_corrections(
+            request.dbsession, session, locations=options['locations'], conditions=options['conditions']
+        )
+    except StocktakeClosedError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
+    log.info(f"Stocktake session {session.id} applied: {result}.")
+    return result
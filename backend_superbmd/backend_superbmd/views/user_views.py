@@ -9,6 +9,9 @@ import logging
 from ..schemas.myschema import UserSchema, UserCreateSchema, UserUpdateSchema, UserListSchema, LoginSchema 
 from ..models.mymodel import User, UserRole
 from ..services.user_service import UserService
+from ..services.barang_service import BarangService
+from ..services.pagination import COUNT_MODES, InvalidPageError, InvalidSortError, page_params
+from .barang_views import _barang_to_dict
 
 log = logging.getLogger(__name__)
 
@@ -23,26 +26,35 @@ login_schema = LoginSchema()
 def users_list(request):
     """
     Retrieves a paginated list of users. Accessible by anyone.
+    Query params: count (exact|estimate|none, default exact) selects how total_items is computed;
+    sort (<key> or -<key> for descending) orders the whole result, with id as tiebreaker.
+    Each user carries jumlah_barang, the number of assets they are responsible for.
     """
-    page = int(request.params.get('page', 1))
-    limit = int(request.params.get('limit', 10))
+    try:
+        page, limit = page_params(request.params)
+    except InvalidPageError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
     search_term = request.params.get('search', '').strip()
+    count_mode = request.params.get('count', 'exact')
+    if count_mode not in COUNT_MODES:
+        raise HTTPBadRequest(json_body={'message': 'count harus exact, estimate atau none.'})
 
-    all_users = UserService.get_all_users(request.dbsession, search_term)
-
-    total_items = len(all_users)
-    users = all_users[(page - 1) * limit : page * limit]
-    total_pages = (total_items + limit - 1) // limit
+    try:
+        users, pagination = UserService.get_users_page(
+            request.dbsession, page, limit, count_mode, search_term, sort=request.params.get('sort')
+        )
+    except InvalidSortError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
 
-    return users_list_schema.dump({
+    result = users_list_schema.dump({
         'items': users,
-        'pagination': {
-            'total_items': total_items,
-            'total_pages': total_pages,
-            'current_page': page,
-            'items_per_page': limit
-        }
+        'pagination': pagination
     })
+    # Hanya untuk pengguna di halaman ini: satu query grouped pada indeks
+    counts = UserService.get_barang_counts(request.dbsession, [user.id for user in users])
+    for item in result['items']:
+        item['jumlah_barang'] = counts.get(item['id'], 0)
+    return result
 
 @view_config(route_name='users_create', renderer='json', request_method='POST') # Hapus permission
 def users_create(request):
@@ -155,6 +167,37 @@ def users_delete(request):
     log.info(f"User {user_to_delete.username} deleted.") # Pesan log diubah
     return Response(status=204) # No Content
 
+@view_config(route_name='users_barang', renderer='json', request_method='GET')
+def users_barang(request):
+    """
+    Paginated assets a user is responsible for, read through the id_penanggung_jawab index.
+    Query params: page, limit, count and sort as for /api/barang.
+    """
+    user_id = int(request.matchdict['id'])
+    if not UserService.get_user_by_id(request.dbsession, user_id):
+        raise HTTPNotFound(json_body={'message': 'Pengguna tidak ditemukan.'})
+
+    try:
+        page, limit = page_params(request.params)
+    except InvalidPageError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
+    count_mode = request.params.get('count', 'exact')
+    if count_mode not in COUNT_MODES:
+        raise HTTPBadRequest(json_body={'message': 'count harus exact, estimate atau none.'})
+
+    try:
+        rows, pagination = BarangService.get_barang_page(
+            request.dbsession, page, limit, count_mode, sort=request.params.get('sort'),
+            id_penanggung_jawab=user_id
+        )
+    except InvalidSortError as e:
+        raise HTTPBadRequest(json_body={'message': str(e)})
+
+    return {
+        'items': [_barang_to_dict(b, nama_lokasi) for b, nama_lokasi in rows],
+        'pagination': pagination
+    }
+
 @view_config(
     route_name='users_login',
     renderer='json',
@@ -48,6 +48,8 @@ setup(
     zip_safe=False,
     extras_require={
         'testing': tests_require,
+        'labels': ['segno'],
+        'analytics': ['numpy'],
     },
     install_requires=requires,
     entry_points={
@@ -56,6 +58,10 @@ setup(
         ],
         'console_scripts': [
             'initialize_backend_superbmd_db=backend_superbmd.scripts.initialize_db:main',
+            'loadtest_backend_superbmd=backend_superbmd.scripts.loadtest:main',
+            'archive_backend_superbmd_barang=backend_superbmd.scripts.archive_barang:main',
+            'worker_backend_superbmd_jobs=backend_superbmd.scripts.job_worker:main',
+            'serve_backend_superbmd=backend_superbmd.scripts.serve:main',
         ],
     },
 )
@@ -130,3 +130,24 @@ def dummy_config(dummy_request):
     """
     with testConfig(request=dummy_request) as config:
         yield config
+
+@pytest.fixture
+def lokasi_id(testapp):
+    """Id of a fresh lokasi."""
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': 'Gudang Uji', 'kode_lokasi': 'LOK01', 'alamat_lokasi': 'Jl. Uji 1',
+    })
+    return res.json[0]['id']
+
+@pytest.fixture
+def create_barang(testapp):
+    """Factory creating a barang through the API; returns the created barang."""
+    def create_barang(lokasi_id, kode, **fields):
+        data = {
+            'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': 'Baik', 'id_lokasi': lokasi_id,
+            'penanggung_jawab': 'admin', 'tanggal_masuk': '2024-01-02',
+        }
+        data.update(fields)
+        return testapp.post_json('/api/barang/create', data).json[0]
+
+    return create_barang
@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+import webtest
+
+from backend_superbmd.views import dashboard_views
+from backend_superbmd.services.admission import (
+    CRUD, LOOKUP, REPORT, ConcurrencyLimiter, Overloaded, TokenBuckets, route_class,
+)
+
+
+def test_route_classes():
+    assert route_class('report_pivot', 'GET') == REPORT
+    assert route_class('dashboard', 'GET') == REPORT
+    assert route_class('barang_detail', 'GET') == LOOKUP
+    assert route_class('barang_detail', 'PUT') == CRUD
+    assert route_class(None, 'GET') == LOOKUP
+    assert route_class('metrics', 'GET') is None
+    assert route_class('barang_list', 'OPTIONS') is None
+
+
+def test_limiter_queues_then_sheds():
+    limiter = ConcurrencyLimiter(limit=1, queue=1, timeout=5)
+    limiter.acquire()
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    for _ in range(500):
+        if limiter.as_dict()['waiting'] == 1:
+            break
+        threading.Event().wait(0.01)
+    # Antrean penuh: langsung ditolak tanpa menunggu
+    with pytest.raises(Overloaded):
+        limiter.acquire()
+    limiter.release()
+    waiter.join(5)
+    stats = limiter.as_dict()
+    assert (stats['active'], stats['waiting'], stats['admitted'], stats['shed']) == (1, 0, 2, 1)
+
+    limiter.timeout = 0.01
+    limiter.queue = 5
+    with pytest.raises(Overloaded):
+        limiter.acquire()
+
+
+def test_token_bucket_refills():
+    buckets = TokenBuckets(rate=2.0, burst=2)
+    assert buckets.take('a', now=0) == 0
+    assert buckets.take('a', now=0) == 0
+    assert buckets.take('a', now=0) == pytest.approx(0.5)
+    assert buckets.take('b', now=0) == 0
+    assert buckets.take('a', now=0.5) == 0
+    assert buckets.as_dict()['limited'] == 1
+
+    buckets.max_clients = 1
+    buckets.take('c', now=10)
+    assert buckets.as_dict()['clients'] == 1
+
+
+@pytest.fixture
+def admission(app, monkeypatch):
+    admission = app.registry['admission']
+    monkeypatch.setattr(admission.buckets, '_buckets', {})
+    return admission
+
+
+def test_full_report_class_is_shed(testapp, admission, monkeypatch):
+    report = admission.classes[REPORT]
+    monkeypatch.setattr(report, 'limit', 1)
+    monkeypatch.setattr(report, 'queue', 0)
+    monkeypatch.setattr(report, 'active', 1)
+
+    res = testapp.get('/api/report/assets-by-condition', status=503)
+    assert res.headers['Retry-After'] == '5'
+    assert res.headers['Access-Control-Allow-Origin']
+    # Lookup dan monitoring tetap dilayani
+    testapp.get('/api/lokasi', status=200)
+    metrics = testapp.get('/api/metrics', status=200).json['admission']
+    assert metrics['classes'][REPORT]['active'] == 1
+    assert metrics['classes'][LOOKUP]['active'] == 0
+
+
+def test_client_rate_limit(testapp, admission, monkeypatch):
+    monkeypatch.setattr(admission.buckets, 'rate', 0.01)
+    monkeypatch.setattr(admission.buckets, 'burst', 1)
+    testapp.get('/api/lokasi', status=200)
+    res = testapp.get('/api/lokasi', status=429)
+    assert int(res.headers['Retry-After']) > 1
+
+
+def test_identical_dashboards_share_one_report_slot(app, admission, monkeypatch):
+    report = admission.classes[REPORT]
+    monkeypatch.setattr(report, 'limit', 1)
+    monkeypatch.setattr(report, 'queue', 0)
+    flight = app.registry['singleflight']
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_snapshot(dbsession):
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'total_assets': 0}
+
+    monkeypatch.setattr(dashboard_views, 'get_dashboard_snapshot', slow_snapshot)
+    client = webtest.TestApp(app, extra_environ={'HTTP_HOST': 'example.com'})
+    statuses = []
+
+    def get():
+        statuses.append(client.get('/api/dashboard', expect_errors=True).status_int)
+
+    leader = threading.Thread(target=get)
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=get) for _ in range(10)]
+    for thread in waiters:
+        thread.start()
+    for _ in range(500):
+        if flight.as_dict()['waiting'] == 10:
+            break
+        threading.Event().wait(0.01)
+    # Laporan lain tetap antre di belakang slot yang dipegang pemimpin
+    client.get('/api/report/assets-by-condition', status=503)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join(5)
+
+    assert statuses == [200] * 11
+    assert len(calls) == 1
+    stats = report.as_dict()
+    assert (stats['active'], stats['joined']) == (0, 10)
@@ -0,0 +1,130 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from backend_superbmd.models import INCLUDE_DELETED, install_soft_delete_filter
+from backend_superbmd.models.meta import Base
+from backend_superbmd.models.mymodel import Barang, BarangArsip, Lokasi
+from backend_superbmd.services.archive_service import ArchiveService
+from backend_superbmd.services.barang_service import BarangService
+
+
+@pytest.fixture
+def lokasi_id(testapp):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': 'Gudang Arsip', 'kode_lokasi': 'ARS01', 'alamat_lokasi': 'Jl. Arsip 1',
+    })
+    return res.json[0]['id']
+
+
+def _create_barang(testapp, lokasi_id, kode, status=200, **fields):
+    data = {
+        'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': 'Rusak Berat', 'id_lokasi': lokasi_id,
+        'penanggung_jawab': 'admin', 'tanggal_masuk': '2015-03-02',
+    }
+    data.update(fields)
+    return testapp.post_json('/api/barang/create', data, status=status).json
+
+
+def _condition_counts(testapp, **params):
+    res = testapp.get('/api/report/assets-by-condition', params=params, status=200).json
+    return {row['condition']: row['total_assets'] for row in res}
+
+
+def test_soft_delete_hides_asset_until_reports_opt_in(testapp, dbsession, lokasi_id):
+    hapus = _create_barang(testapp, lokasi_id, 'ARB001')[0]
+    _create_barang(testapp, lokasi_id, 'ARB002', kondisi='Baik')
+    testapp.delete(f"/api/barang/delete/{hapus['id']}", status=204)
+
+    testapp.get(f"/api/barang/detail/{hapus['id']}", status=404)
+    items = testapp.get('/api/barang', params={'location_id': lokasi_id}).json['items']
+    assert [b['kode_barang'] for b in items] == ['ARB002']
+    params = {'location_id': lokasi_id}
+    assert _condition_counts(testapp, **params)['Rusak Berat'] == 0
+    assert _condition_counts(testapp, include_archived='true', **params)['Rusak Berat'] == 1
+    # Kode tetap terpakai selama barang belum diarsipkan; lokasi dengan barang aktif tidak bisa dihapus
+    _create_barang(testapp, lokasi_id, 'ARB001', status=400)
+    testapp.delete(f'/api/lokasi/delete/{lokasi_id}', status=400)
+
+    assert ArchiveService.archive_deleted(dbsession, datetime.datetime.now() + datetime.timedelta(days=1)) == 1
+    assert dbsession.get(BarangArsip, hapus['id']).kode_barang == 'ARB001'
+    assert _condition_counts(testapp, include_archived='true', **params) == {
+        'Baik': 1, 'Rusak Ringan': 0, 'Rusak Berat': 1,
+    }
+    res = testapp.get('/api/report/assets-by-location', params={'include_archived': 'true'}).json
+    assert [row['total_assets'] for row in res if row['location_id'] == lokasi_id] == [2]
+    res = testapp.get('/api/report/assets-in-out', params={'include_archived': 'true', **params}).json
+    assert sorted(row['kode_barang'] for row in res if row['tipe_transaksi'] == 'MASUK') == ['ARB001', 'ARB002']
+    # Setelah diarsipkan kode boleh dipakai lagi
+    _create_barang(testapp, lokasi_id, 'ARB001')
+
+
+def test_timeseries_counts_deleted_and_archived_assets_on_request(testapp, dbsession, lokasi_id):
+    _create_barang(testapp, lokasi_id, 'ART001', tanggal_masuk='2016-05-02')
+    hapus = _create_barang(testapp, lokasi_id, 'ART002', tanggal_masuk='2016-05-03')[0]
+    arsip = _create_barang(testapp, lokasi_id, 'ART003', tanggal_masuk='2016-05-03')[0]
+    testapp.delete(f"/api/barang/delete/{arsip['id']}", status=204)
+    assert ArchiveService.archive_deleted(dbsession, datetime.datetime.now() + datetime.timedelta(days=1)) == 1
+    testapp.delete(f"/api/barang/delete/{hapus['id']}", status=204)
+
+    def series(**params):
+        params = dict(location_id=lokasi_id, start_date='2016-05-01', end_date='2016-05-31', **params)
+        res = testapp.get('/api/report/assets-timeseries', params=params, status=200).json
+        return {row['period']: row['total_assets'] for row in res}
+
+    assert series() == {'2016-05': 1}
+    assert series(include_archived='true') == {'2016-05': 3}
+    assert series(bucket='day', include_archived='true') == {'2016-05-02': 1, '2016-05-03': 2}
+
+
+def test_deleting_lokasi_archives_its_deleted_assets(testapp, dbsession, lokasi_id):
+    barang = _create_barang(testapp, lokasi_id, 'ARB101')[0]
+    testapp.delete(f"/api/barang/delete/{barang['id']}", status=204)
+
+    testapp.delete(f'/api/lokasi/delete/{lokasi_id}', status=204)
+    assert dbsession.get(BarangArsip, barang['id']).id_lokasi == lokasi_id
+    assert dbsession.execute(
+        select(Barang.id).where(Barang.id == barang['id']), execution_options={INCLUDE_DELETED: True}
+    ).first() is None
+
+
+def test_archive_moves_only_old_deletions_in_batches():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    install_soft_delete_filter(session_factory)
+    now = datetime.datetime.now()
+    with session_factory.begin() as session:
+        session.add(Lokasi(id=1, nama_lokasi='Ruang A', kode_lokasi='RA1', alamat_lokasi='Jl. A'))
+        for i in range(5):
+            barang = BarangService.create_barang(session, {
+                'nama_barang': f'Meja {i}', 'kode_barang': f'AR{i:03d}', 'kondisi': 'Rusak Berat',
+                'id_lokasi': 1, 'penanggung_jawab': 'ani', 'tanggal_masuk': datetime.datetime(2010, 1, 1),
+            })
+            if i < 4:
+                BarangService.delete_barang(session, barang)
+                # Tiga dihapus bertahun-tahun lalu, satu baru kemarin
+                barang.deleted_at = now - datetime.timedelta(days=1 if i == 3 else 2000)
+
+    before = now - datetime.timedelta(days=365)
+    moved = []
+    while True:
+        with session_factory.begin() as session:
+            count = ArchiveService.archive_deleted(session, before, limit=2)
+        if not count:
+            break
+        moved.append(count)
+    assert moved == [2, 1]
+
+    with session_factory() as session:
+        assert session.scalars(select(BarangArsip.kode_barang).order_by(BarangArsip.id)).all() == [
+            'AR000', 'AR001', 'AR002',
+        ]
+        assert session.scalars(select(Barang.kode_barang)).all() == ['AR004']
+        remaining = session.execute(
+            select(func.count(Barang.id)), execution_options={INCLUDE_DELETED: True}
+        ).scalar_one()
+        assert remaining == 2
+        assert ArchiveService.count_pending(session, before) == 0
@@ -0,0 +1,34 @@
+def test_changes_full_then_incremental(testapp, lokasi_id, create_barang):
+    first = create_barang(lokasi_id, 'SYN001')['id']
+    second = create_barang(lokasi_id, 'SYN002')['id']
+
+    res = testapp.get('/api/barang/changes', params={'since': 0}, status=200).json
+    assert [item['id'] for item in res['items']] == [first, second]
+    assert res['deleted'] == []
+    assert res['has_more'] is False
+    token = res['next_token']
+
+    testapp.put_json(f'/api/barang/update/{first}', {'kondisi': 'Rusak Ringan'})
+    testapp.delete(f'/api/barang/delete/{second}', status=204)
+
+    res = testapp.get('/api/barang/changes', params={'since': token}, status=200).json
+    assert [(item['id'], item['kondisi']) for item in res['items']] == [(first, 'Rusak Ringan')]
+    assert [d['id'] for d in res['deleted']] == [second]
+    assert int(res['next_token']) > int(token)
+
+    res = testapp.get('/api/barang/changes', params={'since': res['next_token']}, status=200).json
+    assert res['items'] == [] and res['deleted'] == []
+
+
+def test_changes_pages_with_limit(testapp, lokasi_id, create_barang):
+    for i in range(3):
+        create_barang(lokasi_id, f'SYP00{i}')
+
+    res = testapp.get('/api/barang/changes', params={'since': 0, 'limit': 2}, status=200).json
+    assert len(res['items']) == 2 and res['has_more'] is True
+    res = testapp.get('/api/barang/changes', params={'since': res['next_token'], 'limit': 2}, status=200).json
+    assert len(res['items']) == 1 and res['has_more'] is False
+
+
+def test_changes_rejects_bad_token(testapp):
+    testapp.get('/api/barang/changes', params={'since': 'abc'}, status=400)
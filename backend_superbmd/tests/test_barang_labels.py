@@ -0,0 +1,69 @@
+import pytest
+
+from backend_superbmd.services import label_service
+from backend_superbmd.views import barang_views
+
+
+@pytest.fixture
+def lokasi_id(testapp):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': 'Gudang Label', 'kode_lokasi': 'LBL01', 'alamat_lokasi': 'Jl. Label 1',
+    })
+    return res.json[0]['id']
+
+
+def _create_barang(testapp, lokasi_id, kode):
+    res = testapp.post_json('/api/barang/create', {
+        'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': 'Baik',
+        'id_lokasi': lokasi_id, 'penanggung_jawab': 'admin', 'tanggal_masuk': '2024-01-02',
+    })
+    return res.json[0]['id']
+
+
+def test_labels_require_location(testapp):
+    testapp.get('/api/barang/labels', status=400)
+    testapp.get('/api/barang/labels', params={'location_id': 999999}, status=404)
+
+
+def test_label_sheet_pages_and_cache(testapp, lokasi_id):
+    pytest.importorskip('segno')
+    for i in range(30):
+        _create_barang(testapp, lokasi_id, f'LB{i:03d}')
+    renderer = testapp.app.registry['label_renderer']
+    misses = renderer.misses
+
+    res = testapp.get('/api/barang/labels', params={'location_id': lokasi_id, 'format': 'svg', 'page': 2}, status=200)
+    assert res.content_type == 'image/svg+xml'
+    assert res.headers['X-Total-Pages'] == '2'
+    assert res.text.count('<g>') == 6
+    assert 'LB029' in res.text
+    assert renderer.misses == misses + 30
+
+    # Cetak ulang: semua QR diambil dari cache
+    res = testapp.get('/api/barang/labels', params={'location_id': lokasi_id}, status=200)
+    assert res.content_type == 'text/html'
+    assert res.text.count('class="sheet"') == 2
+    assert renderer.misses == misses + 30
+
+    testapp.get('/api/barang/labels', params={'location_id': lokasi_id, 'format': 'svg', 'page': 3}, status=404)
+
+
+def test_labels_over_limit_are_refused_not_truncated(testapp, lokasi_id, monkeypatch):
+    monkeypatch.setattr(barang_views, 'LABELS_MAX_ASSETS', 2)
+    for i in range(3):
+        _create_barang(testapp, lokasi_id, f'LBX{i}')
+
+    res = testapp.get('/api/barang/labels', params={'location_id': lokasi_id, 'format': 'svg'}, status=400)
+    assert 'lebih dari 2 barang' in res.json['message']
+
+
+def test_pool_renders_same_paths_as_inline():
+    pytest.importorskip('segno')
+    renderer = label_service.LabelRenderer(workers=2)
+    assets = [(i, f'POOL{i:04d}') for i in range(label_service.POOL_THRESHOLD)]
+    try:
+        paths = renderer.qr_paths(assets)
+    finally:
+        renderer.shutdown()
+    payload = label_service.qr_payload(renderer.frontend_url, 5, 'POOL0005')
+    assert paths[(5, 'POOL0005')] == label_service.render_qr_path(payload)
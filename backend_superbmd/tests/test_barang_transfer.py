@@ -0,0 +1,115 @@
+import datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from backend_superbmd.models.meta import Base
+from backend_superbmd.models.mymodel import Barang, BarangRollup, Lokasi
+from backend_superbmd.services.barang_service import BarangService
+from backend_superbmd.services.rollup_service import RollupService
+
+
+def _create_lokasi(testapp, kode):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': f'Lokasi {kode}', 'kode_lokasi': kode, 'alamat_lokasi': 'Jl. Pindah 1',
+    })
+    return res.json[0]['id']
+
+
+def _create_barang(testapp, lokasi_id, kode, kondisi='Baik'):
+    res = testapp.post_json('/api/barang/create', {
+        'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': kondisi,
+        'id_lokasi': lokasi_id, 'penanggung_jawab': 'admin', 'tanggal_masuk': '2024-01-02',
+    })
+    return res.json[0]['id']
+
+
+def _kode_at(testapp, lokasi_id):
+    items = testapp.get('/api/barang', params={'location_id': lokasi_id, 'limit': 50}, status=200).json['items']
+    return sorted(b['kode_barang'] for b in items)
+
+
+def test_transfer_by_ids_and_by_filter(testapp):
+    asal = _create_lokasi(testapp, 'TRA01')
+    tujuan = _create_lokasi(testapp, 'TRT01')
+    first = _create_barang(testapp, asal, 'TR001')
+    _create_barang(testapp, asal, 'TR002', kondisi='Rusak Berat')
+    _create_barang(testapp, asal, 'TR003', kondisi='Rusak Berat')
+
+    res = testapp.post_json('/api/barang/transfer', {
+        'id_lokasi_tujuan': tujuan, 'ids': [first], 'petugas': 'admin', 'catatan': 'Pindah ruang',
+    }, status=200).json
+    assert res == {'transferred': 1}
+    assert _kode_at(testapp, tujuan) == ['TR001']
+
+    res = testapp.post_json('/api/barang/transfer', {
+        'id_lokasi_tujuan': tujuan, 'filter': {'location_id': asal, 'condition': 'Rusak Berat'},
+    }, status=200).json
+    assert res == {'transferred': 2}
+    assert _kode_at(testapp, asal) == []
+    assert _kode_at(testapp, tujuan) == ['TR001', 'TR002', 'TR003']
+
+    # Barang yang sudah berada di lokasi tujuan dilewati
+    res = testapp.post_json('/api/barang/transfer', {'id_lokasi_tujuan': tujuan, 'ids': [first]}, status=200).json
+    assert res == {'transferred': 0}
+
+    history = testapp.get('/api/barang/transfers', params={'barang_id': first}, status=200).json
+    assert [(h['id_lokasi_asal'], h['id_lokasi_tujuan'], h['petugas'], h['catatan']) for h in history] == [
+        (asal, tujuan, 'admin', 'Pindah ruang')
+    ]
+
+
+def test_transfer_rejects_invalid_requests(testapp):
+    tujuan = _create_lokasi(testapp, 'TRT02')
+    testapp.post_json('/api/barang/transfer', {'id_lokasi_tujuan': 999999, 'ids': [1]}, status=400)
+    testapp.post_json('/api/barang/transfer', {'id_lokasi_tujuan': tujuan}, status=400)
+    testapp.post_json('/api/barang/transfer', {
+        'id_lokasi_tujuan': tujuan, 'ids': [1], 'filter': {'condition': 'Baik'},
+    }, status=400)
+    testapp.get('/api/barang/transfers', status=400)
+
+
+def test_lokasi_in_transfer_history_cannot_be_deleted(testapp):
+    asal = _create_lokasi(testapp, 'TRA03')
+    singgah = _create_lokasi(testapp, 'TRS03')
+    barang_id = _create_barang(testapp, asal, 'TR301')
+    testapp.post_json('/api/barang/transfer', {'id_lokasi_tujuan': singgah, 'ids': [barang_id]}, status=200)
+    testapp.post_json('/api/barang/transfer', {'id_lokasi_tujuan': asal, 'ids': [barang_id]}, status=200)
+
+    res = testapp.delete(f'/api/lokasi/delete/{singgah}', status=400)
+    assert 'riwayat perpindahan' in res.json['message']
+
+
+def test_transfer_keeps_rollups_and_change_seq_consistent():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    with session_factory.begin() as session:
+        session.add_all([
+            Lokasi(id=1, nama_lokasi='Ruang A', kode_lokasi='RA1', alamat_lokasi='Jl. A'),
+            Lokasi(id=2, nama_lokasi='Ruang B', kode_lokasi='RB1', alamat_lokasi='Jl. B'),
+        ])
+        for i, kondisi in enumerate(['Baik', 'Baik', 'Rusak Ringan', 'Rusak Berat']):
+            BarangService.create_barang(session, {
+                'nama_barang': f'Meja {i}', 'kode_barang': f'RC{i:03d}', 'kondisi': kondisi,
+                'id_lokasi': 1, 'penanggung_jawab': 'admin', 'tanggal_masuk': datetime.datetime(2023, i + 1, 15),
+            })
+
+    with session_factory.begin() as session:
+        assert BarangService.transfer_barang(session, 2, filters={'condition': 'Baik'}) == 2
+        assert BarangService.transfer_barang(session, 2, ids=[3, 4]) == 2
+
+    def snapshot(session):
+        rows = session.execute(select(BarangRollup).where(BarangRollup.jumlah != 0)).scalars()
+        return {(r.field, r.bulan, r.id_lokasi, r.kondisi): r.jumlah for r in rows}
+
+    with session_factory.begin() as session:
+        incremental = snapshot(session)
+        RollupService.rebuild(session)
+        assert snapshot(session) == incremental
+
+        barang = session.execute(select(Barang)).scalars().all()
+        assert {b.id_lokasi for b in barang} == {2}
+        seqs = [b.change_seq for b in barang]
+        assert len(set(seqs)) == len(seqs)
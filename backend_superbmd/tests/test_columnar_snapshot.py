@@ -0,0 +1,90 @@
+import collections
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from backend_superbmd.models import install_soft_delete_filter
+from backend_superbmd.models.meta import Base
+from backend_superbmd.models.mymodel import Barang, KondisiBarang, Lokasi
+from backend_superbmd.services.barang_service import BarangService
+from backend_superbmd.services.columnar_snapshot import ColumnarSnapshot, install_snapshot_updates
+
+pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    install_soft_delete_filter(session_factory)
+    with session_factory.begin() as session:
+        session.add_all([
+            Lokasi(id=1, nama_lokasi='Ruang A', kode_lokasi='RA1', alamat_lokasi='Jl. A'),
+            Lokasi(id=2, nama_lokasi='Ruang B', kode_lokasi='RB1', alamat_lokasi='Jl. B'),
+        ])
+        for i, (kondisi, pj) in enumerate([('Baik', 'ani'), ('Baik', 'budi'), ('Rusak Berat', 'ani')]):
+            BarangService.create_barang(session, {
+                'nama_barang': f'Lemari {i}', 'kode_barang': f'CS{i:03d}', 'kondisi': kondisi,
+                'id_lokasi': 1 + i % 2, 'penanggung_jawab': pj, 'tanggal_masuk': datetime.datetime(2022, i + 1, 10),
+            })
+    return session_factory
+
+
+@pytest.fixture
+def snapshot(session_factory):
+    snapshot = ColumnarSnapshot(enabled=True)
+    install_snapshot_updates(session_factory, snapshot)
+    session = session_factory()
+    snapshot.load(session)
+    session.close()
+    return snapshot
+
+
+def _sql_counts(session_factory):
+    with session_factory() as session:
+        rows = session.execute(select(Barang.id_lokasi, Barang.kondisi, Barang.penanggung_jawab)).all()
+    return dict(collections.Counter(tuple(row) for row in rows))
+
+
+def test_group_count_matches_sql_through_writes(session_factory, snapshot):
+    dims = ('id_lokasi', 'kondisi', 'penanggung_jawab')
+    assert snapshot.group_count(dims) == _sql_counts(session_factory)
+    assert snapshot.group_count(('bulan_masuk',), kondisi=KondisiBarang.BAIK) == {
+        (datetime.date(2022, 1, 1),): 1, (datetime.date(2022, 2, 1),): 1,
+    }
+    assert snapshot.group_count(('tahun_masuk',), lokasi_ids=[2]) == {(2022,): 1}
+    assert snapshot.group_count((), start=datetime.date(2022, 2, 1), end=datetime.date(2022, 3, 1)) == {(): 1}
+
+    with session_factory.begin() as session:
+        barang = BarangService.get_barang_by_kode(session, 'CS000')
+        BarangService.update_barang(session, barang, {'kondisi': 'Rusak Ringan', 'penanggung_jawab': 'citra'})
+        BarangService.create_barang(session, {
+            'nama_barang': 'Kursi', 'kode_barang': 'CS100', 'kondisi': 'Baik',
+            'id_lokasi': 2, 'penanggung_jawab': 'dedi', 'tanggal_masuk': datetime.datetime(2023, 5, 1),
+        })
+        BarangService.delete_barang(session, BarangService.get_barang_by_kode(session, 'CS001'))
+        BarangService.bulk_update_barang(session, [{'id': 3, 'id_lokasi': 2}])
+    assert snapshot.group_count(dims) == _sql_counts(session_factory)
+
+    # Rollback: perubahan tidak pernah sampai ke snapshot
+    session = session_factory()
+    BarangService.update_barang(session, BarangService.get_barang_by_kode(session, 'CS100'), {'id_lokasi': 1})
+    session.rollback()
+    session.close()
+    assert snapshot.group_count(dims) == _sql_counts(session_factory)
+
+
+def test_set_based_writes_fall_back_to_sql(session_factory, snapshot):
+    with session_factory.begin() as session:
+        BarangService.transfer_barang(session, 2, ids=[1])
+    assert snapshot.group_count(('id_lokasi',)) is None
+    assert snapshot.as_dict()['stale'] is True
+
+    session = session_factory()
+    snapshot.load(session)
+    session.close()
+    assert snapshot.group_count(('id_lokasi',)) == {(1,): 1, (2,): 2}
+    assert ColumnarSnapshot(enabled=False).group_count(('id_lokasi',)) is None
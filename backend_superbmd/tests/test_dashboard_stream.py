@@ -0,0 +1,157 @@
+import datetime
+import json
+import threading
+
+import pytest
+from sqlalchemy import delete
+
+from backend_superbmd.models import INCLUDE_DELETED
+from backend_superbmd.models.mymodel import Barang, BarangTombstone
+from backend_superbmd.services.barang_service import BarangService
+from backend_superbmd.services.dashboard_events import DashboardPublisher, read_sequence
+from backend_superbmd.services.lokasi_service import LokasiService
+from backend_superbmd.views.dashboard_views import _dashboard_stream
+
+
+def _parse(chunk):
+    lines = chunk.decode('utf-8').strip().splitlines()
+    fields = dict(line.split(': ', 1) for line in lines)
+    return fields['event'], json.loads(fields['data'])
+
+
+def test_publisher_resyncs_slow_subscriber():
+    publisher = DashboardPublisher(queue_size=2)
+    subscriber = publisher.subscribe()
+    for i in range(3):
+        publisher.publish('delta', {'total_assets': i})
+    assert subscriber.get_nowait() == ('resync', {})
+    assert subscriber.empty()
+
+
+def test_concurrent_publish_to_full_queue_never_raises():
+    publisher = DashboardPublisher(queue_size=1)
+    subscriber = publisher.subscribe()
+    errors = []
+
+    def spam():
+        try:
+            for i in range(2000):
+                publisher.publish('delta', {'total_assets': i})
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=spam) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert subscriber.qsize() == 1
+
+
+def test_publisher_resyncs_on_writes_of_other_processes():
+    publisher = DashboardPublisher()
+    subscriber = publisher.subscribe()
+    assert publisher.sync(10) is False
+    # Commit sendiri: sudah dikirim sebagai delta
+    publisher.committed_locally()
+    assert publisher.sync(11) is False
+    # Commit lokal yang belum terbaca tidak dianggap milik proses lain
+    publisher.committed_locally()
+    assert publisher.sync(11) is False
+    assert publisher.sync(12) is False
+    assert subscriber.empty()
+
+    assert publisher.sync(14) is True
+    assert subscriber.get_nowait() == ('resync', {})
+
+
+def test_stream_sends_snapshot_heartbeat_and_deltas():
+    publisher = DashboardPublisher()
+    subscriber = publisher.subscribe()
+    stream = _dashboard_stream(publisher, subscriber, {'total_assets': 3}, heartbeat=0.01, max_duration=5)
+
+    assert next(stream).startswith(b'retry:')
+    assert _parse(next(stream)) == ('snapshot', {'total_assets': 3})
+    assert next(stream) == b': heartbeat\n\n'
+
+    publisher.publish('delta', {'total_assets': 1})
+    assert _parse(next(stream)) == ('delta', {'total_assets': 1})
+
+    stream.close()
+    assert publisher.subscriber_count == 0
+
+
+@pytest.fixture
+def committed_session(app):
+    """A plain session whose commits fire the dashboard publisher."""
+    dbsession = app.registry['dbsession_factory']()
+    yield dbsession
+    dbsession.rollback()
+    dbsession.close()
+
+
+def test_commit_publishes_delta_and_rollback_discards(app, committed_session):
+    publisher = app.registry['dashboard_publisher']
+    subscriber = publisher.subscribe()
+    try:
+        lokasi = LokasiService.create_lokasi(committed_session, {
+            'nama_lokasi': 'Ruang Live', 'kode_lokasi': 'LIVE01', 'alamat_lokasi': 'Jl. Live 1',
+        })
+        barang = BarangService.create_barang(committed_session, {
+            'nama_barang': 'Monitor', 'kode_barang': 'LIVE-B1', 'kondisi': 'Baik',
+            'id_lokasi': lokasi.id, 'penanggung_jawab': 'admin',
+            'tanggal_masuk': datetime.datetime(2024, 5, 1),
+        })
+        assert subscriber.empty()
+        committed_session.commit()
+
+        event_name, delta = subscriber.get_nowait()
+        assert event_name == 'delta'
+        assert delta['total_assets'] == 1
+        assert delta['total_locations'] == 1
+        assert delta['assets_by_condition'] == {'Baik': 1}
+        assert delta['assets_by_location'] == {'Ruang Live': 1}
+
+        BarangService.update_barang(committed_session, barang, {'kondisi': 'Rusak Berat'})
+        committed_session.rollback()
+        assert subscriber.empty()
+
+        barang = BarangService.get_barang_by_kode(committed_session, 'LIVE-B1')
+        BarangService.delete_barang(committed_session, barang)
+        LokasiService.delete_lokasi(committed_session, LokasiService.get_lokasi_by_kode(committed_session, 'LIVE01'))
+        committed_session.commit()
+
+        event_name, delta = subscriber.get_nowait()
+        assert delta['total_assets'] == -1
+        assert delta['total_locations'] == -1
+    finally:
+        publisher.unsubscribe(subscriber)
+        committed_session.execute(delete(BarangTombstone).where(BarangTombstone.kode_barang == 'LIVE-B1'))
+        # Barang hanya dihapus lunak; buang barisnya agar tidak tertinggal untuk test lain
+        committed_session.execute(
+            delete(Barang).where(Barang.kode_barang == 'LIVE-B1'), execution_options={INCLUDE_DELETED: True}
+        )
+        committed_session.commit()
+
+
+def test_shared_commit_bumps_dashboard_sequence(app, committed_session, monkeypatch):
+    publisher = app.registry['dashboard_publisher']
+    monkeypatch.setattr(publisher, 'shared', True)
+    monkeypatch.setattr(publisher, '_seen', None)
+    monkeypatch.setattr(publisher, '_local', 0)
+    before = read_sequence(committed_session)
+    publisher.sync(before)
+    committed_session.rollback()
+    try:
+        LokasiService.create_lokasi(committed_session, {
+            'nama_lokasi': 'Ruang Bersama', 'kode_lokasi': 'LIVE02', 'alamat_lokasi': 'Jl. Live 2',
+        })
+        committed_session.commit()
+        assert read_sequence(committed_session) == before + 1
+        assert publisher.sync(before + 1) is False
+    finally:
+        lokasi = LokasiService.get_lokasi_by_kode(committed_session, 'LIVE02')
+        if lokasi is not None:
+            LokasiService.delete_lokasi(committed_session, lokasi)
+            committed_session.commit()
@@ -0,0 +1,39 @@
+import datetime
+import random
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from backend_superbmd.models.meta import Base
+from backend_superbmd.models.mymodel import Barang, KondisiBarang, Lokasi, User
+from backend_superbmd.scripts import initialize_db
+
+
+def test_normal_insert_after_scaled_seed():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        initialize_db.seed_initial_data(connection)
+        initialize_db.seed_scaled_data(connection, 1, batch_size=300, rng=random.Random(1))
+
+    with Session(engine) as session:
+        seeded = session.scalar(select(func.max(Barang.id)))
+        lokasi_id = session.scalar(select(func.min(Lokasi.id)))
+        barang = Barang(
+            nama_barang='Meja Baru', kode_barang='SEED-NEW', kondisi=KondisiBarang.BAIK, id_lokasi=lokasi_id,
+            penanggung_jawab='admin', tanggal_masuk=datetime.datetime(2024, 1, 2),
+        )
+        session.add(barang)
+        session.commit()
+        assert barang.id == seeded + 1
+
+
+def test_sequences_are_synced_on_postgresql():
+    statements = [
+        str(stmt.compile(dialect=postgresql.dialect()))
+        for stmt in initialize_db._sequence_sync_statements(Lokasi, User, Barang)
+    ]
+    assert len(statements) == 3
+    assert 'setval(pg_get_serial_sequence(%(pg_get_serial_sequence_1)s' in statements[2]
+    assert 'max(barang.id)' in statements[2]
@@ -0,0 +1,113 @@
+import json
+import os
+import time
+
+import pytest
+
+from backend_superbmd.services import job_queue as job_queue_module
+from backend_superbmd.services.job_queue import JOB_HANDLERS, JobQueue, JobStatus
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(jobs_dir=str(tmp_path), workers=0)
+
+
+@pytest.fixture
+def echo_handler(monkeypatch):
+    def echo(job):
+        if job.params.get('fail'):
+            raise ValueError('gagal sengaja')
+        job.progress(0.5)
+        return 'application/json', json.dumps(job.params)
+    monkeypatch.setitem(JOB_HANDLERS, 'echo', echo)
+
+
+def test_submit_run_and_expire(queue, echo_handler):
+    job = queue.submit('echo', {'n': 1})
+    # Job identik yang belum selesai dipakai bersama
+    assert queue.submit('echo', {'n': 1})['id'] == job['id']
+    failing = queue.submit('echo', {'fail': True})
+    assert queue.as_dict()['queued'] == 2
+
+    assert queue.run_pending(dbsession=object()) == 2
+    done = queue.get(job['id'])
+    assert (done['status'], done['progress']) == (JobStatus.DONE.value, 1.0)
+    with open(done['result_path']) as result_file:
+        assert json.load(result_file) == {'n': 1}
+    assert queue.get(failing['id'])['error'] == 'gagal sengaja'
+    assert queue.submit('echo', {'n': 1})['id'] != job['id']
+
+    queue.result_ttl = -1
+    queue._finish(job['id'], JobStatus.DONE, result_path=done['result_path'])
+    assert queue.purge_expired() == 1
+    assert queue.get(job['id']) is None
+    assert not os.path.exists(done['result_path'])
+
+
+def test_stale_running_job_is_requeued(queue, echo_handler):
+    job = queue.submit('echo', {})
+    assert queue.claim('mati')['id'] == job['id']
+    assert queue.claim('lain') is None
+    queue.stale_after = -1
+    assert queue.requeue_stale() == 1
+    assert queue.claim('lain')['worker'] == 'lain'
+
+
+def test_worker_thread_runs_submitted_jobs(queue, echo_handler, monkeypatch):
+    monkeypatch.setattr(job_queue_module, 'get_read_only_session', lambda session_factory: None)
+    monkeypatch.setattr(job_queue_module, 'close_read_only_session', lambda dbsession: None)
+    queue.poll_interval = 0.05
+    queue.start(threads=1)
+    try:
+        job = queue.submit('echo', {'n': 2})
+        deadline = time.monotonic() + 5
+        while queue.get(job['id'])['status'] != JobStatus.DONE.value and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert queue.get(job['id'])['status'] == JobStatus.DONE.value
+    finally:
+        queue.stop(timeout=5)
+
+
+@pytest.fixture
+def app_queue(app, queue, monkeypatch):
+    queue.offload_rows = 1
+    queue.registry = app.registry
+    monkeypatch.setitem(app.registry, 'job_queue', queue)
+    return queue
+
+
+def test_large_report_is_offloaded(testapp, dbsession, app_queue):
+    lokasi = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': 'Gudang Job', 'kode_lokasi': 'JOB01', 'alamat_lokasi': 'Jl. Job 1',
+    }).json[0]
+    for kode in ('JB001', 'JB002'):
+        testapp.post_json('/api/barang/create', {
+            'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': 'Baik', 'id_lokasi': lokasi['id'],
+            'penanggung_jawab': 'admin', 'tanggal_masuk': '2024-01-02',
+        })
+    params = {'location_id': lokasi['id']}
+
+    res = testapp.get('/api/report/assets-in-out', params=params, status=202)
+    status_url = res.headers['Location']
+    assert testapp.get(status_url).json['status'] == 'queued'
+    app_queue.run_pending(dbsession=dbsession)
+
+    job = testapp.get(status_url).json
+    assert (job['status'], job['progress']) == ('done', 1.0)
+    result = testapp.get(job['result_url'], status=200)
+    assert result.content_type == 'application/json'
+    direct = testapp.get('/api/report/assets-in-out', params=dict(params, background='false'), status=200).json
+    assert result.json == direct
+    assert sorted(row['kode_barang'] for row in direct if row['tipe_transaksi'] == 'MASUK') == ['JB001', 'JB002']
+
+
+def test_submit_and_failures(testapp, dbsession, app_queue):
+    res = testapp.post_json('/api/jobs', {'kind': 'report_valuation', 'params': {'as_of': '31-12-2023'}}, status=202)
+    app_queue.run_pending(dbsession=dbsession)
+    job = testapp.get(res.json['status_url']).json
+    assert (job['status'], job['error']) == ('failed', 'Format as_of tidak valid (YYYY-MM-DD).')
+    testapp.get(f"/api/jobs/{job['id']}/result", status=409)
+
+    testapp.post_json('/api/jobs', {'kind': 'hapus_semua'}, status=400)
+    testapp.get('/api/jobs/tidakada', status=404)
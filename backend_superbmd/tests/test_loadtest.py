@@ -0,0 +1,101 @@
+import datetime
+import threading
+
+import pytest
+from sqlalchemy import delete
+from waitress import create_server
+
+from backend_superbmd.models import INCLUDE_DELETED, Barang, Lokasi
+from backend_superbmd.scripts.loadtest import (
+    READ_MIX, LoadTest, RouteStats, percentile, stop_local_server,
+)
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_route_stats_counts_locked_errors():
+    stats = RouteStats()
+    stats.record(0.01, 200)
+    stats.record(0.02, 500, b'{"message": "database is locked"}')
+    summary = stats.summary(1.0)
+    assert summary['requests'] == 2
+    assert summary['errors'] == 1
+    assert summary['db_locked'] == 1
+    assert summary['status_counts'] == {200: 1, 500: 1}
+
+
+@pytest.fixture
+def server(app):
+    server = create_server(app, host='127.0.0.1', port=0, threads=2)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.effective_port}'
+    stop_local_server(server, thread)
+
+
+@pytest.fixture
+def committed_barang(app):
+    """One committed location and asset, so detail and filtered list actions have targets."""
+    dbsession = app.registry['dbsession_factory']()
+    lokasi = Lokasi(nama_lokasi='Gudang Loadtest', kode_lokasi='LT01', alamat_lokasi='Jl. Loadtest 1')
+    dbsession.add(lokasi)
+    dbsession.flush()
+    dbsession.add(Barang(
+        nama_barang='Laptop Loadtest', kode_barang='LT-B1', id_lokasi=lokasi.id,
+        penanggung_jawab='admin', tanggal_masuk=datetime.datetime(2024, 1, 2),
+    ))
+    dbsession.commit()
+    try:
+        yield
+    finally:
+        dbsession.execute(delete(Barang).where(Barang.kode_barang == 'LT-B1'),
+                          execution_options={INCLUDE_DELETED: True})
+        dbsession.execute(delete(Lokasi).where(Lokasi.kode_lokasi == 'LT01'))
+        dbsession.commit()
+        dbsession.close()
+
+
+def test_loadtest_read_mix_against_waitress(server):
+    loadtest = LoadTest(server, clients=2, duration=0.5, think_time=0, write_ratio=0, seed=1)
+    elapsed, summaries = loadtest.run()
+
+    assert elapsed > 0
+    assert sum(s['requests'] for s in summaries.values()) > 0
+    for label, summary in summaries.items():
+        assert summary['errors'] == 0, label
+
+
+def test_every_read_action_is_exercised(server, committed_barang):
+    loadtest = LoadTest(server, seed=1)
+    loadtest.prime()
+    assert loadtest.barang_ids and loadtest.lokasi_ids
+    rng = loadtest.client_random(0)
+    conn = loadtest._connection()
+    try:
+        for action, _ in READ_MIX:
+            loadtest.run_action(conn, action, rng)
+    finally:
+        conn.close()
+
+    summaries = loadtest.summaries(1.0)
+    assert set(summaries) == {action for action, _ in READ_MIX}
+    for label, summary in summaries.items():
+        assert summary['requests'] > 0 and summary['errors'] == 0, label
+
+
+def test_seed_gives_each_client_a_reproducible_sequence():
+    first, second = LoadTest('http://localhost', seed=7), LoadTest('http://localhost', seed=7)
+
+    def sequence(loadtest, index):
+        rng = loadtest.client_random(index)
+        return [loadtest._pick(rng, READ_MIX) for _ in range(20)]
+
+    picks = [sequence(loadtest, i) for loadtest in (first, second) for i in range(2)]
+    assert picks[0] == picks[2] and picks[1] == picks[3]
+    assert picks[0] != picks[1]
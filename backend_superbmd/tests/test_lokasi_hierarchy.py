@@ -0,0 +1,71 @@
+import pytest
+
+
+def _create_lokasi(testapp, kode, parent_id=None):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': f'Lokasi {kode}', 'kode_lokasi': kode, 'alamat_lokasi': 'Jl. Hierarki 1',
+        'parent_id': parent_id,
+    })
+    return res.json[0]['id']
+
+
+def _create_barang(testapp, lokasi_id, kode):
+    testapp.post_json('/api/barang/create', {
+        'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': 'Baik',
+        'id_lokasi': lokasi_id, 'penanggung_jawab': 'admin', 'tanggal_masuk': '2024-01-02',
+    })
+
+
+def _kode_barang(testapp, lokasi_id):
+    res = testapp.get('/api/barang', params={'location_id': lokasi_id, 'limit': 100}, status=200).json
+    return sorted(item['kode_barang'] for item in res['items'])
+
+
+def _report_totals(testapp, **params):
+    res = testapp.get('/api/report/assets-by-location', params=params, status=200).json
+    return {row['location_name']: row['total_assets'] for row in res}
+
+
+@pytest.mark.filterwarnings('error::sqlalchemy.exc.SAWarning')
+def test_subtree_filter_and_rollup_follow_moves(testapp):
+    kabupaten = _create_lokasi(testapp, 'HKAB01')
+    instansi = _create_lokasi(testapp, 'HINS01', parent_id=kabupaten)
+    gedung = _create_lokasi(testapp, 'HGED01', parent_id=instansi)
+    ruang = _create_lokasi(testapp, 'HRUA01', parent_id=gedung)
+    lain = _create_lokasi(testapp, 'HINS02', parent_id=kabupaten)
+    _create_barang(testapp, instansi, 'HB001')
+    _create_barang(testapp, ruang, 'HB002')
+    _create_barang(testapp, lain, 'HB003')
+
+    assert _kode_barang(testapp, kabupaten) == ['HB001', 'HB002', 'HB003']
+    assert _kode_barang(testapp, instansi) == ['HB001', 'HB002']
+    assert _kode_barang(testapp, gedung) == ['HB002']
+
+    totals = _report_totals(testapp, rollup='true')
+    assert totals['Lokasi HKAB01'] == 3
+    assert totals['Lokasi HGED01'] == 1
+    # Tanpa rollup hitungan tetap per lokasi, seperti sebelum ada hierarki
+    assert _report_totals(testapp)['Lokasi HKAB01'] == 0
+
+    # Pindahkan gedung (beserta ruangnya) ke instansi lain
+    testapp.put_json(f'/api/lokasi/update/{gedung}', {'parent_id': lain}, status=200)
+    assert _kode_barang(testapp, instansi) == ['HB001']
+    assert _kode_barang(testapp, lain) == ['HB002', 'HB003']
+    assert _kode_barang(testapp, kabupaten) == ['HB001', 'HB002', 'HB003']
+
+    # Jadikan gedung lokasi puncak
+    # Ejaan rute lama tetap diterima
+    testapp.put_json(f'/api/lokasi/uptade/{gedung}', {'parent_id': None}, status=200)
+    assert _kode_barang(testapp, kabupaten) == ['HB001', 'HB003']
+    assert _kode_barang(testapp, gedung) == ['HB002']
+
+
+def test_move_under_own_descendant_is_rejected(testapp):
+    induk = _create_lokasi(testapp, 'HCYC01')
+    anak = _create_lokasi(testapp, 'HCYC02', parent_id=induk)
+
+    testapp.put_json(f'/api/lokasi/update/{induk}', {'parent_id': anak}, status=400)
+    testapp.put_json(f'/api/lokasi/update/{induk}', {'parent_id': induk}, status=400)
+    testapp.delete(f'/api/lokasi/delete/{induk}', status=400)
+    testapp.delete(f'/api/lokasi/delete/{anak}', status=204)
+    testapp.delete(f'/api/lokasi/delete/{induk}', status=204)
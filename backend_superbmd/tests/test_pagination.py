@@ -0,0 +1,125 @@
+from backend_superbmd.services.pagination import count_cache
+
+
+def _create_lokasi(testapp, kode):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': f'Paging {kode}', 'kode_lokasi': kode, 'alamat_lokasi': 'Jl. Halaman 1',
+    })
+    return res.json[0]['id']
+
+
+def _create_barang(testapp, lokasi_id, kode):
+    testapp.post_json('/api/barang/create', {
+        'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': 'Baik',
+        'id_lokasi': lokasi_id, 'penanggung_jawab': 'admin', 'tanggal_masuk': '2024-01-02',
+    })
+
+
+def test_barang_list_pages_in_sql_with_count_modes(testapp):
+    lokasi_id = _create_lokasi(testapp, 'PGL01')
+    for i in range(5):
+        _create_barang(testapp, lokasi_id, f'PGX{i:03d}')
+    params = {'search': 'PGX', 'limit': 2}
+
+    res = testapp.get('/api/barang', params=dict(params, page=1), status=200).json
+    assert [b['kode_barang'] for b in res['items']] == ['PGX000', 'PGX001']
+    assert res['items'][0]['nama_lokasi'] == 'Paging PGL01'
+    assert res['pagination'] == {
+        'total_items': 5, 'total_pages': 3, 'current_page': 1, 'items_per_page': 2,
+        'has_more': True, 'count': 'exact',
+    }
+
+    res = testapp.get('/api/barang', params=dict(params, page=3, count='none'), status=200).json
+    assert [b['kode_barang'] for b in res['items']] == ['PGX004']
+    assert res['pagination']['has_more'] is False
+    assert res['pagination']['total_items'] is None
+    assert res['pagination']['total_pages'] is None
+
+    count_cache.clear()
+    res = testapp.get('/api/barang', params=dict(params, count='estimate'), status=200).json
+    assert res['pagination']['total_items'] == 5
+    # Hitungan per filter di-cache: halaman berikutnya tidak menghitung ulang
+    _create_barang(testapp, lokasi_id, 'PGX005')
+    res = testapp.get('/api/barang', params=dict(params, page=2, count='estimate'), status=200).json
+    assert res['pagination']['total_items'] == 5
+    assert res['pagination']['has_more'] is True
+    assert testapp.get('/api/barang', params=params, status=200).json['pagination']['total_items'] == 6
+
+
+def test_lokasi_and_users_lists_accept_count_modes(testapp):
+    _create_lokasi(testapp, 'PGL02')
+    _create_lokasi(testapp, 'PGL03')
+    res = testapp.get('/api/lokasi', params={'search': 'PGL0', 'limit': 1, 'count': 'none'}, status=200).json
+    assert [l['kode_lokasi'] for l in res['items']] == ['PGL02']
+    assert res['pagination']['has_more'] is True
+
+    res = testapp.get('/api/users', params={'limit': 1, 'count': 'estimate'}, status=200).json
+    assert res['pagination']['count'] == 'estimate'
+
+    for url in ('/api/barang', '/api/lokasi', '/api/users'):
+        testapp.get(url, params={'count': 'approx'}, status=400)
+
+
+def test_sort_orders_whole_result_with_id_tiebreaker(testapp):
+    lokasi_b = _create_lokasi(testapp, 'PGS02')
+    lokasi_a = _create_lokasi(testapp, 'PGS01')
+    for kode, lokasi_id in [('PGS-C', lokasi_a), ('PGS-A', lokasi_b), ('PGS-B', lokasi_a)]:
+        _create_barang(testapp, lokasi_id, kode)
+
+    def kode(sort, page=1):
+        res = testapp.get('/api/barang', params={'search': 'PGS-', 'limit': 2, 'page': page, 'sort': sort}, status=200)
+        return [b['kode_barang'] for b in res.json['items']]
+
+    assert kode('kode_barang') + kode('kode_barang', page=2) == ['PGS-A', 'PGS-B', 'PGS-C']
+    assert kode('-kode_barang') == ['PGS-C', 'PGS-B']
+    # Dalam satu lokasi, urutan ditentukan id barang
+    assert kode('nama_lokasi') + kode('nama_lokasi', page=2) == ['PGS-C', 'PGS-B', 'PGS-A']
+    assert kode('-nama_lokasi') == ['PGS-A', 'PGS-B']
+
+    res = testapp.get('/api/lokasi', params={'search': 'PGS0', 'sort': 'kode_lokasi'}, status=200).json
+    assert [l['kode_lokasi'] for l in res['items']] == ['PGS01', 'PGS02']
+
+    for url in ('/api/barang', '/api/lokasi', '/api/users'):
+        testapp.get(url, params={'sort': 'password'}, status=400)
+
+
+def test_facets_count_values_for_current_filters(testapp):
+    lokasi_a = _create_lokasi(testapp, 'PGF01')
+    lokasi_b = _create_lokasi(testapp, 'PGF02')
+    for kode, lokasi_id, kondisi in [
+        ('PGF-1', lokasi_a, 'Baik'), ('PGF-2', lokasi_a, 'Rusak Berat'), ('PGF-3', lokasi_b, 'Baik'),
+    ]:
+        testapp.post_json('/api/barang/create', {
+            'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': kondisi,
+            'id_lokasi': lokasi_id, 'penanggung_jawab': 'admin', 'tanggal_masuk': '2024-01-02',
+        })
+
+    res = testapp.get('/api/barang', params={
+        'search': 'PGF-', 'limit': 1, 'facets': 'kondisi,id_lokasi,penanggung_jawab',
+    }, status=200).json
+    assert len(res['items']) == 1
+    assert res['facets'] == {
+        'kondisi': [{'value': 'Baik', 'count': 2}, {'value': 'Rusak Berat', 'count': 1}],
+        'id_lokasi': [
+            {'value': lokasi_a, 'count': 2, 'label': 'Paging PGF01'},
+            {'value': lokasi_b, 'count': 1, 'label': 'Paging PGF02'},
+        ],
+        'penanggung_jawab': [{'value': 'admin', 'count': 3}],
+    }
+
+    res = testapp.get('/api/barang', params={'search': 'PGF-', 'condition': 'Baik', 'facets': 'id_lokasi'}).json
+    assert [(f['value'], f['count']) for f in res['facets']['id_lokasi']] == [(lokasi_a, 1), (lokasi_b, 1)]
+    assert 'facets' not in testapp.get('/api/barang', params={'search': 'PGF-'}).json
+
+    testapp.get('/api/barang', params={'facets': 'kondisi,password'}, status=400)
+
+
+def test_lists_reject_out_of_range_page_and_limit(testapp):
+    user_id = testapp.post_json(
+        '/api/users/create', {'username': 'pager', 'password': 'rahasia1', 'role': 'penanggung_jawab'}
+    ).json[0]['id']
+    for url in ('/api/barang', '/api/lokasi', '/api/users', f'/api/users/{user_id}/barang'):
+        for params in ({'page': 0}, {'page': -1}, {'limit': 0}, {'limit': 101}, {'page': 'dua'}):
+            res = testapp.get(url, params=params, status=400)
+            assert 'message' in res.json
+        testapp.get(url, params={'page': 1, 'limit': 100}, status=200)
@@ -0,0 +1,24 @@
+from backend_superbmd.services.barang_service import BarangService
+from backend_superbmd.services.user_service import UserService
+
+
+def test_service_lookups_hit_compiled_cache(app, dbsession):
+    stats = app.registry['sql_cache_stats']
+    # warm the cache for this statement shape
+    BarangService.get_barang_by_kode(dbsession, 'WARM-UP')
+    UserService.get_user_by_username(dbsession, 'warm-up')
+    BarangService.get_all_barang(dbsession, search_term='x', condition='Baik')
+    stats.reset()
+
+    BarangService.get_barang_by_kode(dbsession, 'NOPE-1')
+    UserService.get_user_by_username(dbsession, 'nope-1')
+    BarangService.get_all_barang(dbsession, search_term='y', condition='Baik')
+
+    assert stats.misses == 0
+    assert stats.hits >= 3
+    assert stats.hit_ratio == 1.0
+
+
+def test_metrics_exposes_cache_hit_ratio(testapp):
+    res = testapp.get('/api/metrics', status=200)
+    assert set(res.json['sql_compiled_cache']) == {'hits', 'misses', 'uncached', 'hit_ratio'}
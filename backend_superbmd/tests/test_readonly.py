@@ -0,0 +1,119 @@
+import datetime
+
+from pyramid.config import Configurator
+from pyramid.request import Request
+from pyramid.scripting import prepare
+import pytest
+from sqlalchemy import delete, text, update
+from sqlalchemy.exc import OperationalError
+import webtest
+
+from backend_superbmd.models import INCLUDE_DELETED
+from backend_superbmd.models.mymodel import Barang, Lokasi
+from backend_superbmd.models.readonly import (
+    ReadOnlySessionError,
+    close_read_only_session,
+    get_read_only_session,
+    is_read_only,
+)
+from backend_superbmd.services.lokasi_service import LokasiService
+
+
+@pytest.fixture
+def read_only_session(app):
+    dbsession = get_read_only_session(app.registry['dbsession_factory'])
+    yield dbsession
+    close_read_only_session(dbsession)
+
+
+def test_read_only_session_refuses_flush(read_only_session):
+    read_only_session.add(Lokasi(nama_lokasi='Gudang', kode_lokasi='RO001', alamat_lokasi='Jl. Baca'))
+    with pytest.raises(ReadOnlySessionError):
+        read_only_session.flush()
+
+
+def test_read_only_session_refuses_dml(read_only_session):
+    with pytest.raises(ReadOnlySessionError):
+        read_only_session.execute(update(Lokasi).values(nama_lokasi='X'))
+
+
+def test_read_only_session_has_no_autoflush(read_only_session):
+    assert read_only_session.autoflush is False
+
+
+def test_get_request_uses_read_only_session(app):
+    request = Request.blank('/api/lokasi')
+    with prepare(request=request, registry=app.registry) as env:
+        assert is_read_only(env['request'].dbsession)
+
+
+def test_post_request_keeps_transactional_session(app):
+    request = Request.blank('/api/lokasi/create', method='POST')
+    with prepare(request=request, registry=app.registry) as env:
+        assert not is_read_only(env['request'].dbsession)
+
+
+def test_get_request_end_to_end(app):
+    res = webtest.TestApp(app).get('/api/dashboard', status=200)
+    assert 'total_assets' in res.json
+
+
+@pytest.fixture
+def committed_barang(app):
+    """A committed location and asset, visible to requests that open their own session."""
+    dbsession = app.registry['dbsession_factory']()
+    lokasi = LokasiService.create_lokasi(dbsession, {
+        'nama_lokasi': 'Gudang Baca', 'kode_lokasi': 'RO002', 'alamat_lokasi': 'Jl. Baca 2',
+    })
+    dbsession.add(Barang(
+        nama_barang='Lemari Baca', kode_barang='RO-B1', id_lokasi=lokasi.id,
+        penanggung_jawab='admin', tanggal_masuk=datetime.datetime(2024, 3, 4),
+    ))
+    dbsession.commit()
+    try:
+        yield lokasi.id
+    finally:
+        dbsession.execute(delete(Barang).where(Barang.kode_barang == 'RO-B1'),
+                          execution_options={INCLUDE_DELETED: True})
+        LokasiService.delete_lokasi(dbsession, lokasi)
+        dbsession.commit()
+        dbsession.close()
+
+
+def test_views_run_in_read_only_session(app, committed_barang):
+    # Tanpa app.dbsession dari conftest: request memakai sesi read-only dan melewati pyramid_tm
+    testapp = webtest.TestApp(app)
+    items = testapp.get('/api/barang', params={'location_id': committed_barang}, status=200).json['items']
+    assert [item['kode_barang'] for item in items] == ['RO-B1']
+    report = testapp.get('/api/report/assets-by-condition', params={'location_id': committed_barang}, status=200)
+    assert {row['condition']: row['total_assets'] for row in report.json}['Baik'] == 1
+    scan = testapp.get('/api/scan', params={'kode_barang': ['RO-B1', 'RO-XX']}, status=200).json
+    assert [item['kode_barang'] for item in scan['items']] == ['RO-B1']
+    assert scan['not_found'] == ['RO-XX']
+
+
+@pytest.fixture
+def write_on_get_app(app_settings, dbengine):
+    """A minimal app with the real session setup and one view that writes on any method."""
+    def write(request):
+        if request.params.get('raw'):
+            request.dbsession.execute(text('UPDATE lokasi SET nama_lokasi = nama_lokasi WHERE id = -1'))
+        else:
+            request.dbsession.add(Lokasi(nama_lokasi='Gudang', kode_lokasi='RO003', alamat_lokasi='Jl. Tulis'))
+            request.dbsession.flush()
+        return {'ok': True}
+
+    with Configurator(settings=dict(app_settings, dbengine=dbengine)) as config:
+        config.include('backend_superbmd.models')
+        config.add_route('write', '/write')
+        config.add_view(write, route_name='write', renderer='json')
+        return webtest.TestApp(config.make_wsgi_app())
+
+
+def test_write_from_get_is_refused(write_on_get_app):
+    with pytest.raises(ReadOnlySessionError):
+        write_on_get_app.get('/write')
+    # Tulis lewat SQL mentah ditolak oleh koneksi itu sendiri (PRAGMA query_only)
+    with pytest.raises(OperationalError, match='readonly'):
+        write_on_get_app.get('/write', params={'raw': '1'})
+    assert write_on_get_app.post('/write?raw=1', status=200).json == {'ok': True}
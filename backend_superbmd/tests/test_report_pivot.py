@@ -0,0 +1,66 @@
+import pytest
+
+
+@pytest.fixture
+def lokasi_id(testapp):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': 'Gudang Pivot', 'kode_lokasi': 'PIV01', 'alamat_lokasi': 'Jl. Pivot 1',
+    })
+    return res.json[0]['id']
+
+
+def _create_barang(testapp, lokasi_id, kode, tanggal, kondisi='Baik', penanggung_jawab='admin'):
+    testapp.post_json('/api/barang/create', {
+        'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': kondisi,
+        'id_lokasi': lokasi_id, 'penanggung_jawab': penanggung_jawab, 'tanggal_masuk': tanggal,
+    })
+
+
+def _pivot(testapp, **params):
+    return testapp.get('/api/report/pivot', params=params, status=200).json
+
+
+def test_pivot_rows_by_cols(testapp, lokasi_id):
+    _create_barang(testapp, lokasi_id, 'PV001', '2021-03-05')
+    _create_barang(testapp, lokasi_id, 'PV002', '2021-03-20', kondisi='Rusak Berat', penanggung_jawab='budi')
+    _create_barang(testapp, lokasi_id, 'PV003', '2022-07-02', penanggung_jawab='budi')
+
+    res = _pivot(testapp, rows='penanggung_jawab', cols='kondisi', location_id=lokasi_id)
+    assert [k['value'] for k in res['row_keys']] == ['admin', 'budi']
+    assert [k['label'] for k in res['col_keys']] == ['Baik', 'Rusak Berat']
+    assert res['cells'] == [[1, 0], [1, 1]]
+    assert res['row_totals'] == [1, 2]
+    assert res['col_totals'] == [2, 1]
+    assert res['total'] == 3
+
+    res = _pivot(testapp, rows='bulan_masuk', location_id=lokasi_id, condition='Baik')
+    assert [(k['value'], k['label']) for k in res['row_keys']] == [('2021-03-01', '2021-03'), ('2022-07-01', '2022-07')]
+    assert res['row_totals'] == [1, 1]
+    assert res['col_keys'] == []
+
+    res = _pivot(testapp, rows='id_lokasi', cols='tahun_masuk', location_id=lokasi_id)
+    assert res['row_keys'] == [{'value': lokasi_id, 'label': 'Gudang Pivot'}]
+    assert [k['value'] for k in res['col_keys']] == [2021, 2022]
+    assert res['cells'] == [[2, 1]]
+
+
+def test_pivot_cache_follows_asset_writes(testapp, lokasi_id):
+    _create_barang(testapp, lokasi_id, 'PV101', '2021-03-05')
+    assert _pivot(testapp, rows='kondisi', location_id=lokasi_id)['total'] == 1
+    # Penulisan barang menaikkan versi data: hasil cache lama tidak dipakai lagi
+    _create_barang(testapp, lokasi_id, 'PV102', '2021-03-06')
+    assert _pivot(testapp, rows='kondisi', location_id=lokasi_id)['total'] == 2
+
+
+def test_pivot_rejects_unknown_dimensions(testapp):
+    testapp.get('/api/report/pivot', status=400)
+    testapp.get('/api/report/pivot', params={'rows': 'password'}, status=400)
+    testapp.get('/api/report/pivot', params={'rows': 'kondisi', 'cols': 'kondisi'}, status=400)
+    testapp.get('/api/report/pivot', params={'rows': 'kondisi', 'measure': 'avg'}, status=400)
+
+
+def test_reports_reject_non_numeric_location(testapp):
+    res = testapp.get('/api/report/pivot', params={'rows': 'kondisi', 'location_id': 'abc'}, status=400)
+    assert res.json['message'] == 'location_id harus berupa angka.'
+    testapp.get('/api/report/pivot', params={'rows': 'kondisi', 'location_id': 'abc', 'background': 'true'}, status=400)
+    testapp.get('/api/report/assets-by-condition', params={'location_id': 'abc'}, status=400)
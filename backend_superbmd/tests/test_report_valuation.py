@@ -0,0 +1,85 @@
+import datetime
+import random
+
+import pytest
+
+from backend_superbmd.models.mymodel import KondisiBarang
+from backend_superbmd.services import valuation_service
+from backend_superbmd.services.valuation_service import ValuationService
+
+
+@pytest.fixture
+def lokasi_id(testapp):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': 'Gedung Nilai', 'kode_lokasi': 'NIL01', 'alamat_lokasi': 'Jl. Nilai 1',
+    })
+    return res.json[0]['id']
+
+
+def _create_barang(testapp, lokasi_id, kode, tanggal, **fields):
+    data = {
+        'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': 'Baik', 'id_lokasi': lokasi_id,
+        'penanggung_jawab': 'admin', 'tanggal_masuk': tanggal,
+    }
+    data.update(fields)
+    return testapp.post_json('/api/barang/create', data).json[0]
+
+
+def _valuation(testapp, **params):
+    return testapp.get('/api/report/valuation', params=params, status=200).json
+
+
+def test_valuation_totals(testapp, lokasi_id):
+    # Garis lurus 4 tahun: 24 bulan (Jan 2022 - Des 2023) = separuh nilai
+    _create_barang(testapp, lokasi_id, 'NV001', '2022-01-10',
+                   nilai_perolehan='12000000', umur_manfaat=4, metode_penyusutan='garis_lurus')
+    # Saldo menurun ganda 4 tahun: tarif 50% per tahun
+    _create_barang(testapp, lokasi_id, 'NV002', '2023-01-01', kondisi='Rusak Ringan',
+                   nilai_perolehan='1000000', umur_manfaat=4, metode_penyusutan='saldo_menurun')
+    # Tanah: tanpa masa manfaat, tidak disusutkan
+    _create_barang(testapp, lokasi_id, 'NV003', '2020-05-05', nilai_perolehan='50000000.50')
+    # Belum ada pada tanggal laporan / tanpa nilai perolehan
+    _create_barang(testapp, lokasi_id, 'NV004', '2024-02-01', nilai_perolehan='700000', umur_manfaat=2)
+    _create_barang(testapp, lokasi_id, 'NV005', '2021-01-01')
+
+    res = _valuation(testapp, as_of='2023-12-31', location_id=lokasi_id)
+    assert res['total'] == {
+        'jumlah': 3, 'nilai_perolehan': 63000000.5,
+        'akumulasi_penyusutan': 6500000.0, 'nilai_buku': 56500000.5,
+    }
+    assert [(row['nama_lokasi'], row['jumlah']) for row in res['by_location']] == [('Gedung Nilai', 3)]
+    by_condition = {row['kondisi']: row for row in res['by_condition']}
+    assert by_condition['Rusak Ringan']['nilai_buku'] == 500000.0
+    assert by_condition['Rusak Berat']['jumlah'] == 0
+
+    # Setelah masa manfaat habis nilai buku nol
+    res = _valuation(testapp, as_of='2030-01-01', location_id=lokasi_id, condition='Baik')
+    assert res['total']['nilai_buku'] == 50000000.5
+
+
+def test_valuation_cache_follows_asset_writes(testapp, lokasi_id):
+    barang = _create_barang(testapp, lokasi_id, 'NV101', '2022-01-01', nilai_perolehan='1000', umur_manfaat=1)
+    assert _valuation(testapp, as_of='2022-06-30', location_id=lokasi_id)['total']['nilai_buku'] == 500.0
+    testapp.put_json(f"/api/barang/update/{barang['id']}", {'nilai_perolehan': '3000'})
+    assert _valuation(testapp, as_of='2022-06-30', location_id=lokasi_id)['total']['nilai_buku'] == 1500.0
+
+
+def test_valuation_rejects_bad_params(testapp):
+    testapp.get('/api/report/valuation', params={'as_of': '31-12-2023'}, status=400)
+    testapp.get('/api/report/valuation', params={'condition': 'Hilang'}, status=400)
+
+
+def test_vectorized_matches_per_asset(monkeypatch):
+    pytest.importorskip('numpy')
+    rng = random.Random(45)
+    rows = [
+        (
+            rng.randint(1, 5), rng.randrange(len(KondisiBarang)), rng.randint(2010 * 12, 2023 * 12 + 6),
+            rng.randrange(10 ** 12), rng.choice([0, 1, 2, 4, 5, 8, 20, 50]), rng.randint(0, 1),
+        )
+        for _ in range(2000)
+    ]
+    as_of = datetime.date(2023, 7, 15)
+    vectorized = ValuationService.compute_groups(rows, as_of)
+    monkeypatch.setattr(valuation_service, 'numpy', None)
+    assert ValuationService.compute_groups(rows, as_of) == vectorized
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend_superbmd.models.meta import Base
+from backend_superbmd.models.mymodel import Lokasi
+from backend_superbmd.services.barang_service import BarangService
+from backend_superbmd.services.scan_index import ScanIndex, install_scan_invalidation
+
+
+@pytest.fixture
+def scan_index(app):
+    index = app.registry['scan_index']
+    yield index
+    # Transaksi testapp selalu di-rollback: jangan tinggalkan entri yang tidak pernah ada
+    index.clear()
+
+
+def test_scan_batch_lookup_is_served_from_index(testapp, dbengine, scan_index):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': 'Gudang Scan', 'kode_lokasi': 'SCAN01', 'alamat_lokasi': 'Jl. Scan 1',
+    })
+    lokasi_id = res.json[0]['id']
+    for kode in ('SCN001', 'SCN002'):
+        testapp.post_json('/api/barang/create', {
+            'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': 'Baik',
+            'id_lokasi': lokasi_id, 'penanggung_jawab': 'admin', 'tanggal_masuk': '2024-01-02',
+        })
+
+    res = testapp.get('/api/scan', params={'kode_barang': 'SCN002,SCN404,SCN001'}, status=200).json
+    assert [item['kode_barang'] for item in res['items']] == ['SCN002', 'SCN001']
+    assert res['items'][0]['nama_lokasi'] == 'Gudang Scan'
+    assert res['not_found'] == ['SCN404']
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(dbengine, 'before_cursor_execute', listener)
+    try:
+        res = testapp.post_json('/api/scan', {'kode_barang': ['SCN001', 'SCN002']}, status=200).json
+    finally:
+        event.remove(dbengine, 'before_cursor_execute', listener)
+    assert len(res['items']) == 2
+    assert statements == []
+
+
+def test_scan_rejects_empty_and_oversized_batches(testapp):
+    testapp.get('/api/scan', status=400)
+    testapp.post_json('/api/scan', {'kode_barang': [f'K{i}' for i in range(501)]}, status=400)
+
+
+def test_committed_writes_evict_entries():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    index = ScanIndex()
+    install_scan_invalidation(session_factory, index)
+
+    with session_factory.begin() as session:
+        session.add(Lokasi(id=1, nama_lokasi='Ruang A', kode_lokasi='RA1', alamat_lokasi='Jl. A'))
+        BarangService.create_barang(session, {
+            'nama_barang': 'Kursi', 'kode_barang': 'EV001', 'kondisi': 'Baik',
+            'id_lokasi': 1, 'penanggung_jawab': 'admin',
+        })
+
+    session = session_factory()
+    assert index.lookup(lambda: session, ['EV001'])['EV001']['kondisi'] == 'Baik'
+    session.close()
+
+    with session_factory.begin() as session:
+        barang = BarangService.get_barang_by_kode(session, 'EV001')
+        BarangService.update_barang(session, barang, {'kondisi': 'Rusak Berat'})
+        # Belum commit: indeks masih menyajikan data yang sudah di-commit
+        assert index.lookup(lambda: None, ['EV001'])['EV001']['kondisi'] == 'Baik'
+
+    session = session_factory()
+    assert index.lookup(lambda: session, ['EV001'])['EV001']['kondisi'] == 'Rusak Berat'
+    session.close()
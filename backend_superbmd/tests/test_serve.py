@@ -0,0 +1,82 @@
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+from backend_superbmd.scripts.serve import RequestCounter, after_fork, bind_sockets
+
+
+def test_bind_sockets_listens_before_fork():
+    sockets = bind_sockets('127.0.0.1:0', backlog=8)
+    try:
+        assert len(sockets) == 1
+        host, port = sockets[0].getsockname()
+        with socket.create_connection((host, port), timeout=5):
+            pass
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def test_request_counter_signals_recycle():
+    recycle = threading.Event()
+    app = RequestCounter(lambda environ, start_response: [b'ok'], max_requests=2, recycle=recycle)
+    assert app({}, None) == [b'ok']
+    assert not recycle.is_set()
+    app({}, None)
+    assert recycle.is_set()
+
+    unlimited = RequestCounter(lambda environ, start_response: [], max_requests=0, recycle=threading.Event())
+    unlimited({}, None)
+    assert not unlimited.recycle.is_set()
+
+
+def test_after_fork_drops_inherited_connections(app):
+    engine = app.registry['dbsession_factory'].kw['bind']
+    with engine.connect():
+        pass
+    after_fork(app.registry)
+    assert engine.pool.checkedin() == 0
+
+
+def _wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise AssertionError(f'server on port {port} did not start')
+
+
+def test_main_recycles_workers_without_dropping_requests(ini_file, dbengine):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    master = subprocess.Popen(
+        [sys.executable, '-c', 'import sys; from backend_superbmd.scripts.serve import main; main(sys.argv)',
+         ini_file, '--workers', '2', '--max-requests', '3', '--max-requests-jitter', '0',
+         '--graceful-timeout', '5', '--listen', f'127.0.0.1:{port}'],
+        stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        _wait_for_port(port)
+        statuses = []
+        for _ in range(12):
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/lokasi', timeout=30) as res:
+                statuses.append(res.status)
+    finally:
+        master.send_signal(signal.SIGTERM)
+        _, log = master.communicate(timeout=60)
+
+    assert statuses == [200] * 12
+    assert master.returncode == 0
+    # Setiap worker berhenti setelah 3 permintaan dan digantikan fork baru
+    assert log.count('starting a new one') >= 2
+    assert log.count(' serving (max requests: 3)') >= 4
+    assert 'apply per worker (2 workers)' in log
+    assert 'All workers stopped.' in log
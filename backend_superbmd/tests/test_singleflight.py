@@ -0,0 +1,100 @@
+import threading
+
+from backend_superbmd.services.singleflight import SingleFlight, SingleFlightTimeout
+
+
+def _run_concurrently(flight, key, compute, callers):
+    started = threading.Event()
+    results, errors = [], []
+
+    def blocking():
+        started.set()
+        return compute()
+
+    def call():
+        try:
+            results.append(flight.do(key, blocking))
+        except Exception as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=call) for _ in range(callers - 1)]
+    for thread in waiters:
+        thread.start()
+    return leader, waiters, results, errors
+
+
+def _wait_for_waiters(flight, count):
+    for _ in range(500):
+        if flight.as_dict()['waiting'] == count:
+            return
+        threading.Event().wait(0.01)
+
+
+def test_identical_calls_share_one_computation():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {'total': 42}
+
+    leader, waiters, results, errors = _run_concurrently(flight, 'dashboard', compute, 5)
+    _wait_for_waiters(flight, 4)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join(5)
+
+    assert len(calls) == 1 and not errors
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(result == {'total': 42} for result, _ in results)
+    stats = flight.as_dict()
+    assert (stats['leaders'], stats['coalesced'], stats['in_flight']) == (1, 4, 0)
+    # Tidak ada yang disimpan: panggilan berikutnya menghitung ulang
+    assert flight.do('dashboard', lambda: 'baru') == ('baru', False)
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError('query gagal')
+
+    leader, waiters, results, errors = _run_concurrently(flight, 'laporan', compute, 3)
+    _wait_for_waiters(flight, 2)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join(5)
+
+    assert not results
+    assert [str(e) for e in errors] == ['query gagal'] * 3
+    assert flight.as_dict()['errors'] == 1
+
+
+def test_waiter_times_out():
+    flight = SingleFlight(timeout=0.05)
+    release = threading.Event()
+    leader, waiters, results, errors = _run_concurrently(flight, 'lambat', lambda: release.wait(5), 2)
+    waiters[0].join(5)
+    release.set()
+    leader.join(5)
+
+    assert len(errors) == 1 and isinstance(errors[0], SingleFlightTimeout)
+    assert results == [(True, False)]
+    assert flight.as_dict()['timeouts'] == 1
+
+
+def test_dashboard_is_coalesced(testapp, app):
+    flight = app.registry['singleflight']
+    leaders = flight.leaders
+    res = testapp.get('/api/dashboard', status=200)
+    assert 'assets_by_condition' in res.json
+    assert flight.leaders == leaders + 1
+    assert testapp.get('/api/metrics', status=200).json['singleflight']['in_flight'] == 0
+
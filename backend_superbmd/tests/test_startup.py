@@ -0,0 +1,18 @@
+from backend_superbmd import main
+
+# Generous budget so slow CI machines don't flake; a full-package scan with
+# every optional subsystem loaded used to blow well past this.
+STARTUP_BUDGET_SECONDS = 2.0
+
+
+def test_startup_time_budget(app_settings, dbengine):
+    app = main({}, dbengine=dbengine, **app_settings)
+    timings = app.registry['startup_timings']
+    assert set(timings) >= {'routes', 'models', 'scan', 'total'}
+    assert timings['total'] < STARTUP_BUDGET_SECONDS
+
+
+def test_startup_skips_jinja2_by_default(app):
+    from pyramid.interfaces import IRendererFactory
+    assert app.registry.queryUtility(IRendererFactory, name='.jinja2') is None
+    assert 'jinja2' not in app.registry['startup_timings']
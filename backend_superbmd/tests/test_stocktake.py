@@ -0,0 +1,80 @@
+import pytest
+
+
+def _create_lokasi(testapp, kode, parent_id=None):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': f'Lokasi {kode}', 'kode_lokasi': kode, 'alamat_lokasi': 'Jl. Opname 1',
+        'parent_id': parent_id,
+    })
+    return res.json[0]['id']
+
+
+def _create_barang(testapp, lokasi_id, kode, kondisi='Baik'):
+    res = testapp.post_json('/api/barang/create', {
+        'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': kondisi,
+        'id_lokasi': lokasi_id, 'penanggung_jawab': 'admin', 'tanggal_masuk': '2024-01-02',
+    })
+    return res.json[0]['id']
+
+
+@pytest.fixture
+def gedung(testapp):
+    gedung = _create_lokasi(testapp, 'OPG01')
+    ruang_a = _create_lokasi(testapp, 'OPR01', parent_id=gedung)
+    ruang_b = _create_lokasi(testapp, 'OPR02', parent_id=gedung)
+    _create_barang(testapp, ruang_a, 'OP001')
+    _create_barang(testapp, ruang_a, 'OP002')
+    _create_barang(testapp, ruang_b, 'OP003')
+    return gedung, ruang_a, ruang_b
+
+
+def test_reconcile_and_apply_corrections(testapp, gedung):
+    gedung_id, ruang_a, ruang_b = gedung
+    session = testapp.post_json('/api/stocktake', {'id_lokasi': gedung_id, 'petugas': 'admin'}, status=201).json
+    url = f"/api/stocktake/{session['id']}"
+
+    testapp.post_json(f'{url}/scans', {'id_lokasi': ruang_a, 'items': [
+        'OP001', {'kode_barang': 'OP003', 'kondisi': 'Rusak Ringan'}, 'OPX99',
+    ]}, status=200)
+    # Scan ulang menimpa scan sebelumnya
+    res = testapp.post_json(f'{url}/scans', {'id_lokasi': ruang_a, 'items': ['OP001']}, status=200).json
+    assert res == {'accepted': 1, 'total_scans': 3}
+
+    res = testapp.get(f'{url}/reconciliation', status=200).json
+    assert [r['kode_barang'] for r in res['found']] == ['OP001']
+    assert [r['kode_barang'] for r in res['missing']] == ['OP002']
+    assert [r['kode_barang'] for r in res['unexpected']] == ['OPX99']
+    assert [(r['kode_barang'], r['id_lokasi'], r['id_lokasi_scan']) for r in res['misplaced']] == [
+        ('OP003', ruang_b, ruang_a)
+    ]
+    assert res['summary'] == {
+        'found': 1, 'missing': 1, 'unexpected': 1, 'misplaced': 1, 'condition_changes': 1,
+    }
+
+    res = testapp.post_json(f'{url}/apply', {'conditions': True, 'locations': True}, status=200).json
+    assert res == {'updated': 1, 'moved': 1, 'condition_changed': 1}
+    moved = testapp.get('/api/barang', params={'location_id': ruang_a, 'limit': 10}, status=200).json['items']
+    assert {(b['kode_barang'], b['kondisi']) for b in moved} == {
+        ('OP001', 'Baik'), ('OP002', 'Baik'), ('OP003', 'Rusak Ringan')
+    }
+
+    assert testapp.get(url, status=200).json['status'] == 'applied'
+    testapp.post_json(f'{url}/scans', {'items': ['OP002']}, status=400)
+
+
+def test_scans_outside_session_location_are_rejected(testapp, gedung):
+    gedung_id, ruang_a, _ = gedung
+    lain = _create_lokasi(testapp, 'OPL01')
+    session = testapp.post_json('/api/stocktake', {'id_lokasi': ruang_a}, status=201).json
+
+    testapp.post_json(f"/api/stocktake/{session['id']}/scans", {'id_lokasi': lain, 'items': ['OP001']}, status=400)
+    testapp.post_json(f"/api/stocktake/{session['id']}/scans", {'items': []}, status=400)
+    testapp.get('/api/stocktake/999999', status=404)
+
+
+def test_lokasi_with_stocktake_cannot_be_deleted(testapp):
+    kosong = _create_lokasi(testapp, 'OPK01')
+    testapp.post_json('/api/stocktake', {'id_lokasi': kosong}, status=201)
+
+    res = testapp.delete(f'/api/lokasi/delete/{kosong}', status=400)
+    assert 'stock opname' in res.json['message']
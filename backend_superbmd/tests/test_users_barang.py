@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import select
+
+from backend_superbmd.models import INCLUDE_DELETED
+from backend_superbmd.models.mymodel import Barang
+
+
+@pytest.fixture
+def lokasi_id(testapp):
+    res = testapp.post_json('/api/lokasi/create', {
+        'nama_lokasi': 'Ruang PJ', 'kode_lokasi': 'RPJ01', 'alamat_lokasi': 'Jl. Penanggung 1',
+    })
+    return res.json[0]['id']
+
+
+def _create_user(testapp, username):
+    res = testapp.post_json('/api/users/create', {'username': username, 'password': 'rahasia1', 'role': 'penanggung_jawab'})
+    return res.json[0]['id']
+
+
+def _create_barang(testapp, lokasi_id, kode, **fields):
+    data = {
+        'nama_barang': f'Barang {kode}', 'kode_barang': kode, 'kondisi': 'Baik', 'id_lokasi': lokasi_id,
+        'penanggung_jawab': 'tidak-terdaftar', 'tanggal_masuk': '2024-01-02',
+    }
+    data.update(fields)
+    return testapp.post_json('/api/barang/create', data).json[0]
+
+
+def test_penanggung_jawab_resolves_to_user(testapp, lokasi_id):
+    sari = _create_user(testapp, 'sari')
+    joko = _create_user(testapp, 'joko')
+    # Nama yang cocok dengan username, atau langsung id pengguna
+    assert _create_barang(testapp, lokasi_id, 'PJ001', penanggung_jawab='sari')['id_penanggung_jawab'] == sari
+    barang = _create_barang(testapp, lokasi_id, 'PJ002', id_penanggung_jawab=joko)
+    assert (barang['penanggung_jawab'], barang['id_penanggung_jawab']) == ('joko', joko)
+    assert _create_barang(testapp, lokasi_id, 'PJ003')['id_penanggung_jawab'] is None
+    testapp.put_json(f"/api/barang/update/{barang['id']}", {'id_penanggung_jawab': sari})
+
+    res = testapp.get(f'/api/users/{sari}/barang', params={'sort': 'kode_barang'}, status=200).json
+    assert [b['kode_barang'] for b in res['items']] == ['PJ001', 'PJ002']
+    assert {b['penanggung_jawab'] for b in res['items']} == {'sari'}
+    assert res['pagination']['total_items'] == 2
+    assert testapp.get(f'/api/users/{joko}/barang').json['items'] == []
+
+    counts = {u['username']: u['jumlah_barang'] for u in testapp.get('/api/users', params={'limit': 100}).json['items']}
+    assert (counts['sari'], counts['joko']) == (2, 0)
+    res = testapp.get('/api/barang', params={'id_penanggung_jawab': sari}).json
+    assert res['pagination']['total_items'] == 2
+
+
+def test_rename_user_updates_asset_name(testapp, lokasi_id):
+    user_id = _create_user(testapp, 'rina')
+    _create_barang(testapp, lokasi_id, 'PJ101', penanggung_jawab='rina')
+    testapp.put_json(f'/api/users/update/{user_id}', {'username': 'rina.w'})
+    items = testapp.get(f'/api/users/{user_id}/barang').json['items']
+    assert [b['penanggung_jawab'] for b in items] == ['rina.w']
+
+
+def test_unknown_user(testapp, lokasi_id):
+    testapp.get('/api/users/999999/barang', status=404)
+    testapp.post_json('/api/barang/create', {
+        'nama_barang': 'Barang X', 'kode_barang': 'PJ900', 'kondisi': 'Baik', 'id_lokasi': lokasi_id,
+        'penanggung_jawab': 'siapa', 'id_penanggung_jawab': 999999, 'tanggal_masuk': '2024-01-02',
+    }, status=400)
+
+
+def test_deleting_user_unlinks_assets(testapp, dbsession, lokasi_id):
+    user_id = _create_user(testapp, 'dewi')
+    tetap = _create_barang(testapp, lokasi_id, 'PJ201', penanggung_jawab='dewi')
+    hapus = _create_barang(testapp, lokasi_id, 'PJ202', penanggung_jawab='dewi')
+    testapp.delete(f"/api/barang/delete/{hapus['id']}", status=204)
+
+    token = testapp.get('/api/barang/changes', params={'since': 0, 'limit': 5000}).json['next_token']
+
+    testapp.delete(f'/api/users/delete/{user_id}', status=204)
+    barang = testapp.get(f"/api/barang/detail/{tetap['id']}", status=200).json
+    assert (barang['penanggung_jawab'], barang['id_penanggung_jawab']) == ('dewi', None)
+    changes = testapp.get('/api/barang/changes', params={'since': token}).json
+    assert [item['id'] for item in changes['items']] == [tetap['id']]
+    # Barang terhapus yang belum diarsipkan juga dilepas, agar id tidak menggantung
+    deleted = dbsession.execute(
+        select(Barang.id_penanggung_jawab).where(Barang.id == hapus['id']), execution_options={INCLUDE_DELETED: True}
+    ).scalar_one()
+    assert deleted is None
@@ -1,7 +1,13 @@
 import React from 'react';
 import { useTheme } from '../../contexts/ThemeContext';
 
-const AssetFilter = ({ filters, onFilterChange, locations, penanggungJawabList }) => {
+// Tambahkan jumlah dari facet ke label opsi, mis. "Baik (12)"
+const withCount = (label, facet, value) => {
+    const entry = facet && facet.find(f => String(f.value) === String(value));
+    return entry ? `${label} (${entry.count})` : label;
+};
+
+const AssetFilter = ({ filters, onFilterChange, locations, penanggungJawabList, facets = {} }) => {
     const { theme } = useTheme();
     const isDarkMode = theme === 'dark';
 
@@ -32,7 +38,7 @@ const AssetFilter = ({ filters, onFilterChange, locations, penanggungJawabList }
                 >
                     <option value="">Semua Lokasi</option>
                     {locations.map(loc => (
-                        <option key={loc.id} value={loc.id}>{loc.nama_lokasi}</option>
+                        <option key={loc.id} value={loc.id}>{withCount(loc.nama_lokasi, facets.id_lokasi, loc.id)}</option>
                     ))}
                 </select>
             </div>
@@ -47,7 +53,7 @@ const AssetFilter = ({ filters, onFilterChange, locations, penanggungJawabList }
                 >
                     <option value="">Semua Kondisi</option>
                     {conditions.map(cond => (
-                        <option key={cond} value={cond}>{cond}</option>
+                        <option key={cond} value={cond}>{withCount(cond, facets.kondisi, cond)}</option>
                     ))}
                 </select>
             </div>
@@ -62,7 +68,7 @@ const AssetFilter = ({ filters, onFilterChange, locations, penanggungJawabList }
                 >
                     <option value="">Semua Penanggung Jawab</option>
                     {penanggungJawabList.map(pj => (
-                        <option key={pj} value={pj}>{pj}</option>
+                        <option key={pj} value={pj}>{withCount(pj, facets.penanggung_jawab, pj)}</option>
                     ))}
                 </select>
             </div>
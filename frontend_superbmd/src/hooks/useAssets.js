@@ -13,6 +13,8 @@ export function useBarangList(filters = {}, currentPage = 1, itemsPerPage = 10)
         current_page: 1,
         items_per_page: itemsPerPage,
     });
+    // Jumlah barang per kondisi/lokasi/penanggung jawab untuk filter yang sedang aktif
+    const [facets, setFacets] = useState({});
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
 
@@ -23,10 +25,12 @@ export function useBarangList(filters = {}, currentPage = 1, itemsPerPage = 10)
             const params = {
                 page: currentPage,
                 limit: itemsPerPage,
+                facets: 'kondisi,id_lokasi,penanggung_jawab',
                 ...filters,
             };
             const response = await api.get(API_BASE_URL, { params });
             setBarang(response.data.items);
+            setFacets(response.data.facets || {});
             setPagination({
                 total_items: response.data.pagination.total_items,
                 total_pages: response.data.pagination.total_pages,
@@ -44,7 +48,7 @@ export function useBarangList(filters = {}, currentPage = 1, itemsPerPage = 10)
         fetchBarang();
     }, [fetchBarang]);
 
-    return { barang, pagination, loading, error, refetchBarang: fetchBarang };
+    return { barang, pagination, facets, loading, error, refetchBarang: fetchBarang };
 }
 
 // Hook for fetching a single Barang by ID
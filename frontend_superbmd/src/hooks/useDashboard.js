@@ -2,11 +2,43 @@
 import { useState, useEffect, useCallback } from "react";
 import api from '../services/api';
 
+/**
+ * Terapkan delta dari stream /dashboard/stream ke data dashboard yang ada.
+ */
+function applyDashboardDelta(data, delta) {
+    const rename = (name) => {
+        const renamed = (delta.renamed_locations || []).find(r => r.old === name);
+        return renamed ? renamed.new : name;
+    };
+    const mergeCounts = (items, counts, sortItems) => {
+        const merged = items.map(item => ({ ...item, name: rename(item.name) }));
+        Object.entries(counts || {}).forEach(([name, value]) => {
+            const existing = merged.find(item => item.name === name);
+            if (existing) {
+                existing.value += value;
+            } else {
+                merged.push({ name, value });
+            }
+        });
+        return sortItems ? merged.sort((a, b) => a.name.localeCompare(b.name)) : merged;
+    };
+
+    return {
+        ...data,
+        total_assets: data.total_assets + (delta.total_assets || 0),
+        total_locations: data.total_locations + (delta.total_locations || 0),
+        assets_by_condition: mergeCounts(data.assets_by_condition, delta.assets_by_condition, false),
+        assets_by_location: mergeCounts(data.assets_by_location, delta.assets_by_location, true),
+    };
+}
+
 /**
  * Hook kustom untuk mengambil data dashboard.
  * Mengelola state loading, error, dan data dashboard.
+ * Jika browser mendukung EventSource, data diperbarui secara live lewat
+ * Server-Sent Events alih-alih polling.
  */
-export function useDashboardData() {
+export function useDashboardData({ live = true } = {}) {
     const [dashboardData, setDashboardData] = useState({
         total_assets: 0,
         total_locations: 0,
@@ -31,8 +63,33 @@ export function useDashboardData() {
     }, []); // Tidak ada dependencies karena ini hanya fetch data statis dashboard
 
     useEffect(() => {
-        fetchDashboardData();
-    }, [fetchDashboardData]);
+        if (!live || typeof EventSource === 'undefined') {
+            fetchDashboardData();
+            return undefined;
+        }
+
+        // Snapshot pertama datang dari stream, lalu delta setiap ada perubahan
+        const source = new EventSource(`${api.defaults.baseURL}/dashboard/stream`);
+        source.addEventListener('snapshot', (event) => {
+            setDashboardData(JSON.parse(event.data));
+            setError(null);
+            setLoading(false);
+        });
+        source.addEventListener('delta', (event) => {
+            setDashboardData(prev => applyDashboardDelta(prev, JSON.parse(event.data)));
+        });
+        source.addEventListener('resync', () => {
+            fetchDashboardData();
+        });
+        source.onerror = () => {
+            // EventSource menyambung ulang sendiri; jika belum ada data, ambil sekali lewat REST
+            if (source.readyState === EventSource.CLOSED) {
+                fetchDashboardData();
+            }
+        };
+
+        return () => source.close();
+    }, [live, fetchDashboardData]);
 
     return { dashboardData, loading, error, refetchDashboardData: fetchDashboardData };
-}
\ No newline at end of file
+}
@@ -39,6 +39,7 @@ const AssetListPage = () => {
     const {
         barang: assets,
         pagination,
+        facets,
         loading: isLoadingAssets,
         error: fetchAssetsError,
         refetchBarang,
@@ -208,6 +209,7 @@ const AssetListPage = () => {
                     onFilterChange={handleFilterChange}
                     locations={locations}
                     penanggungJawabList={penanggungJawabList}
+                    facets={facets}
                 />
 
                 {overallLoading ? (